@@ -1,66 +1,135 @@
 # File: anomaly_detection/anomaly_detector.py
 
 import time
-from configs.config import restricted_areas
+from configs.config import restricted_areas, loitering_config
 from notifications.alert_manager import NotificationManager
+from notifications.alert_engine import alert_engine
+from notifications.snapshot_store import snapshot_store
+from configs.config import snapshot_config
 from data_analytics.analytics_manager import AnalyticsManager
 from data_analytics.anomaly_report import AnomalyReport  # Import AnomalyReport
+from object_detection.detection_batch import DetectionBatch
 import numpy as np
-from sklearn.ensemble import IsolationForest
 from datetime import datetime
 
 
+def area_for_bbox(bbox, frame_shape, areas=None):
+    """
+    Find the restricted area a detection is in.
+    :param bbox: [x1, y1, x2, y2] in pixels.
+    :param frame_shape: Shape of the frame the box belongs to.
+    :param areas: Restricted areas like restricted_areas (e.g. a camera profile's zones), defaults to restricted_areas.
+    :return: Name of the restricted area whose region contains the box centre, or None.
+    """
+    return areas_for_boxes([bbox], frame_shape, areas)[0]
+
+
+def areas_for_boxes(boxes, frame_shape, areas=None):
+    """
+    Vectorised area_for_bbox for all boxes of a frame.
+    :param boxes: (N, 4) xyxy boxes in pixels.
+    :param frame_shape: Shape of the frame the boxes belong to.
+    :param areas: Restricted areas, defaults to restricted_areas.
+    :return: (N,) object array of restricted area names, None outside every area.
+    """
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    height, width = frame_shape[:2]
+    cx = (boxes[:, 0] + boxes[:, 2]) / 2 / width
+    cy = (boxes[:, 1] + boxes[:, 3]) / 2 / height
+    found = np.full(len(boxes), None, dtype=object)
+    unassigned = np.ones(len(boxes), dtype=bool)
+    for name, area in (restricted_areas if areas is None else areas).items():
+        region = area.get('region')
+        if not area['is_restricted'] or not region:
+            continue
+        inside = unassigned & (cx >= region[0]) & (cx < region[2]) & (cy >= region[1]) & (cy < region[3])
+        found[inside] = name
+        unassigned &= ~inside
+    return found
+
+
 class LoiteringDetector:
-    def __init__(self):
-        self.active_loiters = {}
+    def __init__(self, areas=None, max_gap=None):
+        """
+        :param areas: Restricted areas like restricted_areas, e.g. a camera profile's zones; may be replaced later.
+        :param max_gap: Seconds a person may go undetected before being forgotten,
+                        defaults to loitering_config["max_gap"].
+        """
+        self.areas = restricted_areas if areas is None else areas
+        self.max_gap = loitering_config["max_gap"] if max_gap is None else max_gap
+        self.active_loiters = {}  # (camera, person ID) -> entry time, area and last time seen
         self.notification_manager = NotificationManager()
         self.analytics_manager = AnalyticsManager()  # Initialize AnalyticsManager
         self.anomaly_report = AnomalyReport(self.analytics_manager)  # Initialize AnomalyReport
-        self.alerted_messages = set()  # Track alerted messages to avoid duplicates
 
-    def update(self, person_id, area_name):
+    def update(self, person_id, area_name, camera=None):
+        """
+        :param camera: Camera the person was seen by; track IDs are only unique per camera.
+        :return: True if this update raised a new loitering alert.
+        """
         current_time = time.time()
+        key = (camera, person_id)
 
-        if area_name in restricted_areas and restricted_areas[area_name]["is_restricted"]:
-            if person_id not in self.active_loiters:
+        areas = self.areas
+        if area_name in areas and areas[area_name]["is_restricted"]:
+            loiter = self.active_loiters.get(key)
+            if loiter is None or loiter["area_name"] != area_name:
                 # Start tracking when entering the restricted area
-                self.active_loiters[person_id] = {
+                self.active_loiters[key] = {
                     "entry_time": current_time,
-                    "area_name": area_name
+                    "area_name": area_name,
+                    "last_seen": current_time
                 }
             else:
+                loiter["last_seen"] = current_time
                 # Check if they are still in the area
-                elapsed_time = current_time - self.active_loiters[person_id]["entry_time"]
-                if elapsed_time > restricted_areas[area_name]["time_threshold"]:
-                    self.flag_loitering(person_id, area_name)
+                elapsed_time = current_time - loiter["entry_time"]
+                if elapsed_time > areas[area_name]["time_threshold"]:
+                    return self.flag_loitering(person_id, area_name, camera)
+        else:
+            self.exit_area(person_id, camera)
+        return False
+
+    def end_frame(self, camera, person_ids):
+        """
+        Forget the people of a camera that have not been seen for more than max_gap seconds.
+        A single missed detection keeps the entry time, like find_loitering in offline processing.
+        :param camera: Camera the frame came from.
+        :param person_ids: Person IDs passed to update for this frame.
+        """
+        seen = set(person_ids)
+        expired = time.time() - self.max_gap
+        for key in [key for key, loiter in self.active_loiters.items()
+                    if key[0] == camera and key[1] not in seen and loiter["last_seen"] < expired]:
+            del self.active_loiters[key]
 
-    def flag_loitering(self, person_id, area_name):
+    def flag_loitering(self, person_id, area_name, camera=None):
         current_time = time.time()
 
         anomaly_message = (
             f"Loitering detected: {person_id} in {area_name} "
-            f"for more than {restricted_areas[area_name]['time_threshold']} seconds."
+            f"for more than {self.areas[area_name]['time_threshold']} seconds."
         )
 
-        # Check if this message has already been alerted
-        if anomaly_message not in self.alerted_messages:
-            print(anomaly_message)  # Print to console for debugging (optional)
-
-            # Record the anomaly in analytics manager
-            duration = current_time - self.active_loiters[person_id]["entry_time"]
+        # The alert engine drops repeats while the person stays, and folds alerts of the same zone into one incident
+        alert = alert_engine.submit('loitering', anomaly_message, camera=camera, zone=area_name, track=person_id,
+                                    severity='warning', now=current_time)
+        if alert is None:
+            return False
+        print(anomaly_message)  # Print to console for debugging (optional)
 
-            # Record anomaly details
-            self.analytics_manager.record_anomaly(person_id, current_time, duration)
+        # Record the anomaly in analytics manager
+        duration = current_time - self.active_loiters[(camera, person_id)]["entry_time"]
 
-            # Send alert via NotificationManager
-            self.notification_manager.alert(anomaly_message)
+        # Record anomaly details
+        self.analytics_manager.record_anomaly(person_id, current_time, duration)
 
-            # Add this message to alerted messages set
-            self.alerted_messages.add(anomaly_message)
+        # Send alert via NotificationManager
+        self.notification_manager.alert(anomaly_message, alert)
+        return True
 
-    def exit_area(self, person_id):
-        if person_id in self.active_loiters:
-            del self.active_loiters[person_id]
+    def exit_area(self, person_id, camera=None):
+        self.active_loiters.pop((camera, person_id), None)
 
     def generate_report(self, filename="anomalies_report.csv"):
         """Generate a report of anomalies."""
@@ -74,40 +143,60 @@ class ObjectInteractionDetector:
     def __init__(self):
         self.notification_manager = NotificationManager()
         self.analytics_manager = AnalyticsManager()
-        self.active_detections = {}
+        self.active_detections = {}  # (camera, person track ID or position if untracked) -> consecutive frames near a phone
         self.detection_threshold = 3  # Number of consecutive frames to confirm detection
-        self.last_alert_time = {}
-        self.alert_cooldown = 30  # Seconds between alerts for the same area
+        self.alert_cooldown = 30  # Seconds before the same person raises this alert again
+        self.proximity_threshold = 100  # Pixels between the box centres of a person and a phone
 
-    def update(self, frame_detections, frame_id, location=None):
+    def update(self, frame_detections, frame_id, location=None, frame=None):
         """
         Update detector with current frame detections
-        frame_detections: list of detection dictionaries
+        frame_detections: DetectionBatch, or list of detection dictionaries
+        frame_id: Camera name
+        frame: Frame the detections belong to, for the alert snapshot (optional)
+        Returns True if an alert was triggered for this frame
         """
+        alerted = False
+        # Streaks of other cameras are kept, track IDs are only unique per camera
+        self.active_detections, previous = self._other_cameras(frame_id)
         # Find persons and cell phones in current frame
-        persons = [det for det in frame_detections if det.get('class_name') == 'person']
-        phones = [det for det in frame_detections if det.get('class_name') == 'cell phone']
-
-        # Check for close interactions
-        for person in persons:
-            person_bbox = person['bbox']  # Access bbox from the dictionary
-            for phone in phones:
-                phone_bbox = phone['bbox']  # Access bbox from the dictionary
-                
-                # If phone is near person
-                if self._check_proximity(person_bbox, phone_bbox):
-                    area_key = f"{location or 'unknown'}_{int(person_bbox[0])}_{int(person_bbox[1])}"
-                    
-                    if area_key not in self.active_detections:
-                        self.active_detections[area_key] = 1
-                    else:
-                        self.active_detections[area_key] += 1
-
-                    # Alert if threshold reached and cooldown passed
-                    if (self.active_detections[area_key] >= self.detection_threshold and 
-                        self._check_alert_cooldown(area_key)):
-                        self._trigger_alert(area_key, person, phone, location)
-                        self.active_detections[area_key] = 0
+        batch = DetectionBatch.coerce(frame_detections)
+        persons = batch[batch.class_mask('person')]
+        phones = batch[batch.class_mask('cell phone')]
+        if not len(persons) or not len(phones):
+            return False
+
+        # Check for close interactions, all person/phone pairs at once
+        distance = np.linalg.norm(persons.centers()[:, None] - phones.centers()[None], axis=2)
+        streaks = {}
+        for person_index in np.nonzero((distance < self.proximity_threshold).any(axis=1))[0]:
+            person = persons[int(person_index)]
+            phone = phones[int(distance[person_index].argmin())]
+            person_bbox = person['bbox']
+            area_key = person.get('track_id', f"{int(person_bbox[0])}_{int(person_bbox[1])}")
+            streaks[(frame_id, area_key)] = previous.get(area_key, 0) + 1
+
+            # Alert if threshold reached; the alert engine applies the cooldown
+            if streaks[(frame_id, area_key)] >= self.detection_threshold:
+                if self._trigger_alert(area_key, person, phone, location or frame_id, frame):
+                    alerted = True
+        # Only persons near a phone in this frame keep their streak
+        self.active_detections.update(streaks)
+
+        return alerted
+
+    def _other_cameras(self, camera):
+        """
+        Split the streaks by camera.
+        :return: (streaks of other cameras, {person key: streak} of this camera).
+        """
+        others, own = {}, {}
+        for (streak_camera, area_key), frames in self.active_detections.items():
+            if streak_camera == camera:
+                own[area_key] = frames
+            else:
+                others[(streak_camera, area_key)] = frames
+        return others, own
 
     def _check_proximity(self, bbox1, bbox2, threshold=100):
         """Check if two bounding boxes are close to each other"""
@@ -119,29 +208,35 @@ class ObjectInteractionDetector:
         distance = ((x1_center - x2_center) ** 2 + (y1_center - y2_center) ** 2) ** 0.5
         return distance < threshold
 
-    def _check_alert_cooldown(self, area_key):
-        """Check if enough time has passed since last alert"""
-        current_time = time.time()
-        if area_key not in self.last_alert_time:
-            return True
-        
-        time_since_last_alert = current_time - self.last_alert_time[area_key]
-        return time_since_last_alert > self.alert_cooldown
-
-    def _trigger_alert(self, area_key, person_detection, phone_detection, location):
-        """Send alert and record the incident"""
+    def _trigger_alert(self, area_key, person_detection, phone_detection, location, frame=None):
+        """
+        Send alert and record the incident, unless the alert engine suppresses it.
+        :return: True if the alert was sent.
+        """
         current_time = time.strftime("%Y-%m-%d %H:%M:%S")
         location_str = location or "Unknown Location"
         
         alert_message = (
             f"ALERT: Person with cell phone detected at {location_str}\n"
             f"Time: {current_time}\n"
-            f"Person confidence: {person_detection[1]:.2f}\n"
-            f"Phone confidence: {phone_detection[1]:.2f}"
+            f"Person confidence: {person_detection['confidence']:.2f}\n"
+            f"Phone confidence: {phone_detection['confidence']:.2f}"
         )
         
+        alert = alert_engine.submit('person_with_phone', alert_message, camera=location,
+                                    zone=person_detection.get('zone'), track=area_key,
+                                    severity='warning', ttl=self.alert_cooldown)
+        if alert is None:
+            return False
+
+        # Crop and context JPEGs are encoded by the snapshot store's threads and attached when ready
+        snapshot = None
+        if frame is not None and snapshot_config["enabled"]:
+            snapshot = snapshot_store.submit(frame, [(person_detection['bbox'], person_detection['class_id']),
+                                                     (phone_detection['bbox'], phone_detection['class_id'])])
+
         # Send alert
-        self.notification_manager.alert(alert_message)
+        self.notification_manager.alert(alert_message, alert, snapshot)
         
         # Record for analytics
         self.analytics_manager.record_anomaly(
@@ -150,12 +245,9 @@ class ObjectInteractionDetector:
             anomaly_type="person_with_phone",
             location=location_str
         )
-        
-        # Update last alert time
-        self.last_alert_time[area_key] = time.time()
+        return True
 
     def reset(self):
         """Reset all detections"""
         self.active_detections.clear()
-        self.last_alert_time.clear()
 
@@ -0,0 +1,403 @@
+# File: benchmarks/pipeline_benchmark.py
+
+import argparse
+import json
+import os
+import platform
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from configs.camera_profiles import camera_profiles
+from data_acquisition.video_stream import VideoStreamHandler
+from metrics.pipeline_metrics import CameraMetrics
+from object_detection.detection_batch import DetectionBatch
+from object_detection.model_loader import model_loader
+from anomaly_detection.anomaly_detector import LoiteringDetector, ObjectInteractionDetector
+
+# Stages timed by VideoStreamHandler itself, plus track (its _track) and the GUI's anomaly and notify work
+STAGES = ['capture', 'queue', 'detect', 'track', 'render', 'anomaly', 'notify']
+SYNTHETIC_CLASSES = ['person', 'cell phone']
+# Left half of every benchmark camera is a restricted area, so the loitering rule has work to do
+BENCHMARK_ZONES = {'flag_room': {'is_restricted': True, 'time_threshold': 10, 'region': (0.0, 0.0, 0.5, 1.0)}}
+
+
+class SyntheticScene:
+    def __init__(self, width=1280, height=720, num_boxes=8, seed=0):
+        """
+        Generated scene of boxes moving at constant speed and bouncing off the frame edges.
+        Seeded, so every run produces the same frames.
+        Mimics cv2.VideoCapture.read() so it can stand in for a camera.
+        """
+        rng = np.random.default_rng(seed)
+        self.width = width
+        self.height = height
+        self.sizes = rng.integers(40, 160, size=(num_boxes, 2))
+        self.positions = rng.uniform(0, 1, size=(num_boxes, 2)) * (np.array([width, height]) - self.sizes)
+        self.velocities = rng.uniform(-8, 8, size=(num_boxes, 2))
+        self.colors = rng.integers(0, 255, size=(num_boxes, 3))
+        self.background = rng.integers(60, 90, size=(height, width, 3), dtype=np.uint8)
+        self.boxes = np.zeros((num_boxes, 4), dtype=np.int32)
+
+    def read(self):
+        limits = np.array([self.width, self.height]) - self.sizes
+        self.positions += self.velocities
+        bounced = (self.positions < 0) | (self.positions > limits)
+        self.velocities[bounced] *= -1
+        self.positions = np.clip(self.positions, 0, limits)
+
+        frame = self.background.copy()
+        self.boxes[:, :2] = self.positions
+        self.boxes[:, 2:] = self.positions + self.sizes
+        for (x1, y1, x2, y2), color in zip(self.boxes, self.colors):
+            cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), color.tolist(), -1)
+        return True, frame
+
+    def ground_truth(self):
+        """Boxes of the most recent frame as detections, in the format ObjectDetector returns."""
+        count = len(self.boxes)
+        return DetectionBatch(self.boxes.astype(np.float32), np.full(count, 0.9, dtype=np.float32),
+                              np.arange(count, dtype=np.int32) % len(SYNTHETIC_CLASSES), SYNTHETIC_CLASSES)
+
+    def release(self):
+        pass
+
+
+class LoopingVideo:
+    def __init__(self, path):
+        """Video file source that rewinds at the end, so any run length can be benchmarked."""
+        self.capture = cv2.VideoCapture(str(path))
+        if not self.capture.isOpened():
+            raise ValueError(f"Cannot open video file: {path}")
+        self.width = int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    def read(self):
+        ret, frame = self.capture.read()
+        if not ret:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.capture.read()
+        return ret, frame
+
+    def release(self):
+        self.capture.release()
+
+
+class PacedCapture:
+    def __init__(self, source, fps):
+        """
+        Capture backend (see data_acquisition/capture_backends.py) delivering the frames of a
+        SyntheticScene or LoopingVideo at a camera's frame rate. As with a live camera, the
+        capture stage includes waiting for the next frame; with fps 0 it is frame generation alone.
+        :param fps: Frames per second, 0 to deliver frames as fast as they are read.
+        """
+        self.source = source
+        self.interval = 1.0 / fps if fps else 0.0
+        self.keyframes_only = False
+        self.last_timestamp = None
+        self.packet_sink = None
+        self.next_frame = time.perf_counter()
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        delay = self.next_frame - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        self.next_frame = max(self.next_frame + self.interval, time.perf_counter() - self.interval)
+        return self.source.read()
+
+    def set_keyframes_only(self, enabled):
+        return False
+
+    def release(self):
+        pass  # The source is released when the benchmark ends
+
+
+class SyntheticModel:
+    def __init__(self, scene):
+        """Stands in for ObjectDetector, returning the scene's ground truth; isolates the rest of the pipeline."""
+        self.scene = scene
+        self.names = SYNTHETIC_CLASSES
+
+    def class_filter(self, *args, **kwargs):
+        return None
+
+    def detect_objects(self, frame, size=640, **kwargs):
+        return self.scene.ground_truth()
+
+    def detect_tiled(self, frame, windows, size=640, include_full_frame=True, **kwargs):
+        return self.scene.ground_truth()
+
+
+class StageSamples(CameraMetrics):
+    def __init__(self, camera_name):
+        """CameraMetrics that keeps every latency sample, for exact percentiles instead of histogram buckets."""
+        super().__init__(camera_name)
+        self.samples = {stage: [] for stage in STAGES + ['end_to_end']}
+
+    def observe(self, stage, seconds):
+        self.samples[stage].append(seconds)
+
+    def reset(self):
+        """Start a new measurement window. :return: Counter values at its start."""
+        self.samples = {stage: [] for stage in self.samples}
+        return dict(self.counters)
+
+
+class CameraPipeline:
+    def __init__(self, source, model, camera_name, fps, archive=False):
+        """
+        One camera run by the application's own VideoStreamHandler: its capture and processing
+        threads, detection cache, rate controller, tracking and display rendering. A consumer
+        thread feeds the anomaly detectors with the handler's detections the way the GUI does.
+        :param source: SyntheticScene or LoopingVideo the camera delivers.
+        :param model: ObjectDetector, or a SyntheticModel.
+        :param fps: Camera frame rate, 0 for as fast as possible.
+        :param archive: Write tracks to the track archive like the live application.
+        """
+        self.source = source
+        self.camera_name = camera_name
+        # The profile's fps caps the detection rate; unpaced cameras get no cap
+        camera_profiles.setdefault(camera_name, camera_type='RTSP', camera_source='benchmark',
+                                   width=source.width, height=source.height,
+                                   fps=max(round(fps), 1) if fps else 1000, zones=BENCHMARK_ZONES)
+        self.handler = VideoStreamHandler(camera_name=camera_name)
+        self.metrics = self.handler.metrics = StageSamples(camera_name)
+        self.handler._connect = lambda: PacedCapture(source, fps)
+        self.handler.model = model
+        self.handler.ml_enabled = True
+        if not archive:
+            self.handler.archive = None
+        self.track = self.handler._track
+        self.handler._track = self._timed_track
+
+        self.loitering_detector = LoiteringDetector(self.handler.profile.zones)
+        self.interaction_detector = ObjectInteractionDetector()
+        self._notify_time = 0.0
+        # Time the notification path separately from the rules that trigger it
+        for manager in (self.loitering_detector.notification_manager,
+                        self.interaction_detector.notification_manager):
+            manager.sound_enabled = False
+            manager.alert = self._timed(manager.alert)
+        self.stop = threading.Event()
+        self.consumer = threading.Thread(target=self._consume, daemon=True)
+
+    def _timed_track(self, detections, frame_shape, frame_time):
+        start = time.monotonic()
+        try:
+            return self.track(detections, frame_shape, frame_time)
+        finally:
+            self.metrics.observe('track', time.monotonic() - start)
+
+    def _timed(self, alert):
+        def timed_alert(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return alert(*args, **kwargs)
+            finally:
+                self._notify_time += time.perf_counter() - start
+        return timed_alert
+
+    def _consume(self):
+        """Feed new detections to the anomaly rules, as MainWindow.process_camera_detections does."""
+        last_seq = None
+        while not self.stop.is_set():
+            seq, detections = self.handler.get_detections(last_seq)
+            if detections is None:
+                time.sleep(0.002)
+                continue
+            last_seq = seq
+            start = time.perf_counter()
+            self._notify_time = 0.0
+            person_ids = []
+            for detection in detections:
+                if detection['class_name'] == 'person':
+                    person_id = f"track_{detection.get('track_id')}"
+                    person_ids.append(person_id)
+                    self.loitering_detector.update(person_id, detection.get('zone'), camera=self.camera_name)
+            self.loitering_detector.end_frame(self.camera_name, person_ids)
+            self.interaction_detector.update(detections, frame_id=self.camera_name,
+                                             frame=self.handler.detection_frame(seq))
+            self.metrics.observe('anomaly', time.perf_counter() - start - self._notify_time)
+            self.metrics.observe('notify', self._notify_time)
+
+    def start(self):
+        self.handler.start_stream()
+        self.consumer.start()
+
+    def close(self):
+        self.stop.set()
+        self.consumer.join()
+        self.handler.stop_stream()
+        self.source.release()
+
+
+def make_model(kind, source):
+    """
+    Detection stage: 'synthetic' returns the scene's ground truth, 'yolo' the configured ObjectDetector,
+    loaded once and shared by all cameras like in the application.
+    """
+    if kind == 'synthetic':
+        if not isinstance(source, SyntheticScene):
+            raise ValueError("The synthetic detector requires a synthetic source")
+        return SyntheticModel(source)
+    detector = model_loader.wait()
+    if detector is None:
+        raise RuntimeError(f"The detection model could not be loaded: {model_loader.error}")
+    return detector
+
+
+def current_rss_mb():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2 ** 20
+    except ImportError:
+        import resource  # POSIX only
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Peak, in KiB on Linux
+
+
+def summarize(samples):
+    values = np.asarray(samples) * 1000.0
+    if values.size == 0:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'mean_ms': None}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {'p50_ms': round(float(p50), 3), 'p95_ms': round(float(p95), 3),
+            'p99_ms': round(float(p99), 3), 'mean_ms': round(float(values.mean()), 3)}
+
+
+def run_benchmark(camera_count, args):
+    """Run camera_count cameras concurrently through VideoStreamHandler for the configured duration."""
+    pipelines = []
+    for index in range(camera_count):
+        if args.video:
+            source = LoopingVideo(args.video[index % len(args.video)])
+        else:
+            source = SyntheticScene(args.width, args.height, args.boxes, seed=args.seed + index)
+        pipelines.append(CameraPipeline(source, make_model(args.detector, source), f"benchmark_{index}",
+                                        args.fps, archive=args.archive))
+
+    for pipeline in pipelines:
+        pipeline.start()
+    # Warm up outside the measurement window
+    time.sleep(args.warmup)
+    counters = [pipeline.metrics.reset() for pipeline in pipelines]
+
+    rss_peak = current_rss_mb()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    while time.perf_counter() - wall_start < args.duration:
+        time.sleep(0.25)
+        rss_peak = max(rss_peak, current_rss_mb())
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    samples = [pipeline.metrics.samples for pipeline in pipelines]
+    counts = [{name: value - start[name] for name, value in pipeline.metrics.counters.items()}
+              for pipeline, start in zip(pipelines, counters)]
+
+    for pipeline in pipelines:
+        pipeline.close()
+
+    def total(counter):
+        return sum(count[counter] for count in counts)
+
+    processed = [count['frames_processed'] for count in counts]
+    detected = [len(camera_samples['track']) for camera_samples in samples]
+    return {
+        'cameras': camera_count,
+        'duration_s': round(wall, 3),
+        'frames': sum(processed),
+        'fps_total': round(sum(processed) / wall, 2),
+        'fps_per_camera': round(sum(processed) / wall / camera_count, 2),
+        'fps_min_camera': round(min(processed) / wall, 2),
+        'detect_fps_per_camera': round(sum(detected) / wall / camera_count, 2),
+        'frames_captured': total('frames_captured'),
+        'capture_dropped': total('capture_dropped'),
+        'process_dropped': total('process_dropped'),
+        'cpu_percent': round(100.0 * cpu / wall, 1),
+        'rss_peak_mb': round(rss_peak, 1),
+        'stages': {stage: summarize([s for camera_samples in samples for s in camera_samples[stage]])
+                   for stage in STAGES},
+        'end_to_end': summarize([s for camera_samples in samples for s in camera_samples['end_to_end']])
+    }
+
+
+def compare(results, baseline_path, tolerance):
+    """Report p95 latencies that regressed by more than tolerance relative to a baseline run."""
+    with open(baseline_path) as f:
+        baseline = {run['cameras']: run for run in json.load(f)['runs']}
+    regressions = []
+    for run in results['runs']:
+        base = baseline.get(run['cameras'])
+        if base is None:
+            continue
+        for stage, stats in list(run['stages'].items()) + [('end_to_end', run['end_to_end'])]:
+            old_stats = base['end_to_end'] if stage == 'end_to_end' else base['stages'].get(stage, {})
+            old = old_stats.get('p95_ms')
+            new = stats['p95_ms']
+            if old and new and new > old * (1 + tolerance):
+                regressions.append(f"{run['cameras']} cameras, {stage}: p95 {old:.2f} -> {new:.2f} ms")
+    return regressions
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser(description='End-to-end pipeline benchmark')
+    parser.add_argument('--video', nargs='*', default=[], help='video files to use instead of synthetic scenes')
+    parser.add_argument('--detector', choices=['synthetic', 'yolo'], default='synthetic')
+    parser.add_argument('--cameras', type=int, nargs='+', default=[1, 4, 16], help='camera counts to benchmark')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds measured per camera count')
+    parser.add_argument('--warmup', type=float, default=2.0, help='seconds the cameras run before measuring')
+    parser.add_argument('--fps', type=float, default=30, help='camera frame rate, 0 to read frames as fast as possible')
+    parser.add_argument('--archive', action='store_true', help='write tracks to the track archive as well')
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--boxes', type=int, default=8, help='moving boxes per synthetic scene')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=str, default='benchmark_results', help='directory for JSON results')
+    parser.add_argument('--compare', type=str, default=None, help='baseline JSON to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='allowed p95 regression fraction')
+    return parser.parse_args()
+
+
+def main(opt):
+    if opt.video and opt.detector == 'synthetic':
+        opt.detector = 'yolo'
+
+    results = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'config': vars(opt),
+        'runs': []
+    }
+    for camera_count in opt.cameras:
+        run = run_benchmark(camera_count, opt)
+        results['runs'].append(run)
+        print(f"{camera_count:>3} cameras: {run['fps_per_camera']:.1f} fps/camera "
+              f"({run['detect_fps_per_camera']:.1f} detected), "
+              f"e2e p95 {run['end_to_end']['p95_ms']} ms, CPU {run['cpu_percent']}%, RSS {run['rss_peak_mb']} MB")
+        for stage, stats in run['stages'].items():
+            print(f"      {stage:<10} p50 {stats['p50_ms']} ms  p95 {stats['p95_ms']} ms  p99 {stats['p99_ms']} ms")
+
+    output_dir = Path(opt.output)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / f"pipeline_{time.strftime('%Y%m%d-%H%M%S')}.json"
+    with open(output_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {output_path}")
+
+    if opt.compare:
+        regressions = compare(results, opt.compare, opt.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main(parse_opt()))
@@ -0,0 +1,336 @@
+# File: configs/camera_profiles.py
+
+import os
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+from types import MappingProxyType
+
+import yaml
+
+from configs.config import camera_config, model_config, restricted_areas, profile_config
+
+SCHEMA_VERSION = 1
+
+# One camera's settings. Instances are never modified; a change produces a new profile with a higher version.
+CameraProfile = namedtuple('CameraProfile', [
+    'name', 'version',
+    'camera_type', 'camera_source', 'width', 'height', 'fps',
+    'backend', 'rtsp_transport', 'hwaccel',
+    'model_path', 'confidence_threshold', 'iou_threshold',
+    'classes',           # Tuple of class names to detect, None for all
+    'class_thresholds',  # Read-only {class name: confidence threshold}, overriding confidence_threshold
+    'zones',  # Read-only {area name: {'is_restricted', 'time_threshold', 'region'}}, like restricted_areas
+])
+
+# Changing any of these means reopening the camera; everything else applies to the next frame
+CAPTURE_FIELDS = ('camera_type', 'camera_source', 'width', 'height', 'backend', 'rtsp_transport', 'hwaccel')
+SETTINGS_FIELDS = CameraProfile._fields[2:]
+
+_CONVERTERS = {
+    'camera_type': str, 'width': int, 'height': int, 'fps': int,
+    'backend': str, 'rtsp_transport': str, 'model_path': str,
+    'confidence_threshold': float, 'iou_threshold': float,
+}
+
+
+def _freeze_zones(zones):
+    frozen = {}
+    for name, zone in (zones or {}).items():
+        region = zone.get('region')
+        frozen[str(name)] = MappingProxyType({
+            'is_restricted': bool(zone.get('is_restricted', True)),
+            'time_threshold': float(zone.get('time_threshold', 10)),
+            'region': tuple(float(value) for value in region) if region else None,
+        })
+    return MappingProxyType(frozen)
+
+
+def _validate(profile):
+    """
+    Convert the fields of a profile to their types and check their ranges.
+    :return: The converted profile.
+    """
+    fields = profile._asdict()
+    try:
+        for field, convert in _CONVERTERS.items():
+            fields[field] = convert(fields[field])
+        if fields['camera_type'] == 'USB':
+            fields['camera_source'] = int(fields['camera_source'])
+        if fields['hwaccel'] is not None:
+            fields['hwaccel'] = str(fields['hwaccel'])
+        if fields['classes'] is not None:
+            classes = fields['classes']
+            fields['classes'] = (str(classes),) if isinstance(classes, str) else tuple(str(name) for name in classes)
+        fields['class_thresholds'] = MappingProxyType({
+            str(name): float(value) for name, value in (fields['class_thresholds'] or {}).items()})
+        if not isinstance(fields['zones'], MappingProxyType):
+            fields['zones'] = _freeze_zones(fields['zones'])
+    except (TypeError, ValueError, AttributeError) as e:
+        raise ValueError(f"{profile.name}: invalid setting ({e})")
+
+    if fields['camera_type'] not in ('USB', 'IP', 'RTSP'):
+        raise ValueError(f"{profile.name}: unknown camera_type {fields['camera_type']!r}")
+    if fields['backend'] not in ('opencv', 'ffmpeg', 'pyav'):
+        raise ValueError(f"{profile.name}: unknown backend {fields['backend']!r}")
+    if fields['width'] <= 0 or fields['height'] <= 0 or fields['fps'] <= 0:
+        raise ValueError(f"{profile.name}: width, height and fps must be positive")
+    for field in ('confidence_threshold', 'iou_threshold'):
+        if not 0 < fields[field] <= 1:
+            raise ValueError(f"{profile.name}: {field} must be in (0, 1]")
+    for name, value in fields['class_thresholds'].items():
+        if not 0 < value <= 1:
+            raise ValueError(f"{profile.name}: confidence threshold of {name} must be in (0, 1]")
+    for area, zone in fields['zones'].items():
+        region = zone['region']
+        if region is not None and (len(region) != 4 or not 0 <= region[0] < region[2] <= 1
+                                   or not 0 <= region[1] < region[3] <= 1):
+            raise ValueError(f"{profile.name}: region of {area} must be (x1, y1, x2, y2) fractions of the frame")
+    return CameraProfile(**fields)
+
+
+def default_profile(name, **overrides):
+    """Profile built from the defaults in config.py."""
+    profile = CameraProfile(
+        name=name, version=0,
+        camera_type=camera_config["camera_type"], camera_source=camera_config["camera_source"],
+        width=camera_config["resolution"]["width"], height=camera_config["resolution"]["height"],
+        fps=camera_config["fps"], backend=camera_config["backend"],
+        rtsp_transport=camera_config["rtsp_transport"], hwaccel=camera_config["hwaccel"],
+        model_path=model_config["model_path"], confidence_threshold=model_config["confidence_threshold"],
+        iou_threshold=model_config["iou_threshold"], classes=model_config["classes"],
+        class_thresholds=model_config["class_thresholds"], zones=restricted_areas,
+    )
+    return _validate(profile._replace(**overrides))
+
+
+def capture_options(profile):
+    """
+    :return: Capture options for CameraManager (see camera_config) with the profile's camera settings.
+    """
+    return dict(
+        camera_config,
+        camera_type=profile.camera_type, camera_source=profile.camera_source,
+        resolution={"width": profile.width, "height": profile.height}, fps=profile.fps,
+        backend=profile.backend, rtsp_transport=profile.rtsp_transport, hwaccel=profile.hwaccel,
+        # Network streams are scaled while decoding, USB cameras deliver the size they are set to
+        decode_size=None if profile.camera_type == "USB" else (profile.width, profile.height),
+    )
+
+
+def _plain(value):
+    """A profile value as YAML can write it."""
+    if isinstance(value, MappingProxyType):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_plain(item) for item in value]
+    return value
+
+
+def _read_cameras(path):
+    """
+    Read the cameras of a settings file, with its defaults applied.
+    :return: {camera: {setting: value}}, empty if the file does not exist.
+    """
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        data = yaml.safe_load(f) or {}
+    if data.get('version', SCHEMA_VERSION) > SCHEMA_VERSION:
+        raise ValueError(f"version {data['version']} is newer than supported ({SCHEMA_VERSION})")
+    defaults = data.get('defaults') or {}
+    cameras = {}
+    for name, fields in (data.get('cameras') or {}).items():
+        settings = dict(defaults, **(fields or {}))
+        unknown = set(settings) - set(SETTINGS_FIELDS)
+        if unknown:
+            raise ValueError(f"{name}: unknown settings {', '.join(sorted(unknown))}")
+        cameras[name] = settings
+    return cameras
+
+
+class CameraProfiles:
+    def __init__(self, path=None, watch_interval=None, overrides_path=None):
+        """
+        Per-camera settings loaded from a YAML file, reloaded when the file changes.
+        Changes made in the application are saved to a separate overrides file, holding only the
+        settings that differ from the main file, so the main file and its comments stay as written.
+        Readers get immutable CameraProfile snapshots; every change replaces the whole
+        {camera: profile} mapping in one assignment, so a reader never sees half an update.
+        :param path: YAML file, defaults to profile_config["path"].
+        :param watch_interval: Seconds between checks of the files, defaults to profile_config["watch_interval"].
+        :param overrides_path: YAML file for changes made in the application, defaults to profile_config["overrides_path"].
+        """
+        self.path = Path(path or profile_config["path"])
+        self.overrides_path = Path(overrides_path or profile_config["overrides_path"])
+        self.watch_interval = profile_config["watch_interval"] if watch_interval is None else watch_interval
+        self._profiles = {}   # Replaced, never modified
+        self._settings = {}   # Camera -> settings from the main file
+        self._overrides = {}  # Camera -> settings changed in the application
+        self._seeded = {}     # Camera -> settings given to setdefault, used when the file does not define it
+        self._generation = 0
+        self._mtime = None
+        self._lock = threading.RLock()  # Serialises writers
+        self._listeners = []
+        self._thread = None
+        self._stop = threading.Event()
+        if self.path.exists() or self.overrides_path.exists():
+            self.reload()
+
+    def get(self, name):
+        """:return: The current profile of a camera; defaults from config.py for unknown cameras."""
+        profile = self._profiles.get(name)
+        if profile is None:
+            with self._lock:
+                profile = self._profiles.get(name)
+                if profile is None:
+                    profile = default_profile(name)
+                    self._profiles = dict(self._profiles, **{name: profile})
+        return profile
+
+    def names(self):
+        """:return: Cameras defined in the files, in the order of the main file, then those only in the overrides."""
+        settings, overrides = self._settings, self._overrides
+        return list(settings) + [name for name in overrides if name not in settings]
+
+    def add_listener(self, callback):
+        """Call callback(old, new) after a camera's profile changed."""
+        self._listeners.append(callback)
+
+    def setdefault(self, name, **fields):
+        """Use these settings for a camera unless the file defines it. :return: The current profile."""
+        with self._lock:
+            self._seeded[name] = fields
+            if name not in self._settings:
+                self._swap({name: self._build(name)}, save=False)
+        return self.get(name)
+
+    def update(self, name, **changes):
+        """
+        Change settings of a camera and save them to the overrides file.
+        :return: The new profile.
+        :raises ValueError: If a value is invalid; nothing is changed then.
+        """
+        unknown = set(changes) - set(SETTINGS_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown camera settings: {', '.join(sorted(unknown))}")
+        with self._lock:
+            profile = _validate(self.get(name)._replace(**changes))
+            # Only what differs from the main file is saved, so later edits of the file still apply
+            base = self._build(name, overrides=False)
+            overrides = {field: _plain(getattr(profile, field)) for field in SETTINGS_FIELDS
+                         if getattr(profile, field) != getattr(base, field)}
+            if overrides:
+                self._overrides[name] = overrides
+            else:
+                self._overrides.pop(name, None)
+            self._swap({name: profile}, save=True)
+        return self.get(name)
+
+    def _build(self, name, overrides=True):
+        """Profile of a camera from the main file (or setdefault) and, optionally, its overrides."""
+        settings = self._settings.get(name, self._seeded.get(name, {}))
+        if overrides:
+            settings = dict(settings, **self._overrides.get(name, {}))
+        return default_profile(name, **settings)
+
+    def _mtimes(self):
+        return tuple(path.stat().st_mtime if path.exists() else None for path in (self.path, self.overrides_path))
+
+    def reload(self):
+        """
+        Read the files. An invalid file is reported and the current profiles are kept.
+        Cameras removed from the files go back to their defaults.
+        :return: Names of the cameras whose settings changed.
+        """
+        # Remembered even if a file is invalid, so the error is reported once per edit
+        self._mtime = self._mtimes()
+        try:
+            settings = _read_cameras(self.path)
+            overrides = _read_cameras(self.overrides_path)
+        except Exception as e:
+            print(f"Error loading camera settings: {e}")
+            return []
+
+        with self._lock:
+            previous = (self._settings, self._overrides)
+            self._settings, self._overrides = settings, overrides
+            try:
+                loaded = {name: self._build(name) for name in set(settings) | set(overrides) | set(self._seeded)}
+            except ValueError as e:
+                print(f"Error loading camera settings: {e}")
+                self._settings, self._overrides = previous
+                return []
+            removed = (set(previous[0]) | set(previous[1])) - set(loaded)
+            return self._swap(loaded, save=False, removed=removed)
+
+    def _swap(self, profiles, save, removed=()):
+        """
+        Publish changed profiles with new versions; called with the lock held.
+        :param removed: Cameras to drop; get returns defaults for them.
+        """
+        changed = []
+        current = dict(self._profiles)
+        for name in removed:
+            old = current.pop(name, None)
+            if old is not None:
+                changed.append((old, None))
+        for name, profile in profiles.items():
+            old = current.get(name)
+            if old is not None and old._replace(version=0) == profile._replace(version=0):
+                continue
+            self._generation += 1
+            current[name] = profile._replace(version=self._generation)
+            changed.append((old, current[name]))
+        if not changed:
+            return []
+        self._profiles = current
+        if save:
+            self._save()
+        for old, new in changed:
+            for callback in self._listeners:
+                try:
+                    callback(old, new)
+                except Exception as e:
+                    print(f"Error in camera settings listener: {e}")
+        return [(new or old).name for old, new in changed]
+
+    def _save(self):
+        """Write the overrides file; the main file is never written."""
+        self.overrides_path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.overrides_path.with_suffix('.tmp')
+        with open(temporary, 'w') as f:
+            f.write(f"# Camera settings changed in the application, applied on top of {self.path.name}.\n"
+                    f"# Delete a camera's entry to go back to the settings in {self.path.name}.\n")
+            yaml.safe_dump({'version': SCHEMA_VERSION, 'cameras': self._overrides}, f, sort_keys=False)
+        os.replace(temporary, self.overrides_path)
+        self._mtime = self._mtimes()
+
+    def watch(self):
+        """Start checking the files for changes in a background thread."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch_loop, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _watch_loop(self):
+        while not self._stop.wait(self.watch_interval):
+            try:
+                mtime = self._mtimes()
+            except OSError:
+                continue
+            if mtime != self._mtime:
+                changed = self.reload()
+                if changed:
+                    print(f"Reloaded camera settings for {', '.join(changed)}")
+
+
+# Process-wide settings, shared by the GUI and the stream handlers
+camera_profiles = CameraProfiles()
@@ -3,10 +3,16 @@
 restricted_areas = {
     "flag_room": {
         "is_restricted": True,
-        "time_threshold": 10  # Time in seconds
+        "time_threshold": 10,  # Time in seconds
+        "region": None  # (x1, y1, x2, y2) as fractions of the frame, used by offline processing
     }
 }
 
+# Live loitering detection (anomaly_detection/anomaly_detector.py)
+loitering_config = {
+    "max_gap": 2.0  # Seconds a person may go undetected before their time in an area starts over
+}
+
 # Camera configuration
 camera_config = {
     "camera_type": "USB",  # Options: 'USB', 'IP', or 'RTSP'
@@ -15,11 +21,193 @@ camera_config = {
         "width": 640,
         "height": 480
     },
-    "fps": 30
+    "fps": 30,
+    "backend": "opencv",       # Capture backend: 'opencv', 'ffmpeg' (ffmpeg subprocess) or 'pyav'
+    "rtsp_transport": "tcp",   # 'tcp' or 'udp' for RTSP sources
+    "low_latency": True,       # Disable demuxer buffering for network streams
+    "decode_size": None,       # (width, height) to scale to while decoding, None keeps the native size
+    "hwaccel": None,           # FFmpeg hardware decoder (e.g. 'cuda', 'vaapi'), ffmpeg/pyav backends only
+    "timeout": 10.0            # Seconds a network stream may take to open or to deliver data before it counts as lost
+}
+
+# Per-camera settings (configs/camera_profiles.py); the values above are the defaults for cameras not listed there
+profile_config = {
+    "path": "configs/cameras.yaml",
+    "overrides_path": "configs/cameras.local.yaml",  # Changes made in the application; cameras.yaml is never written
+    "watch_interval": 1.0  # Seconds between checks of the file for changes
 }
 
 # Model configuration
 model_config = {
     "model_path": "datasets/model/yolov5s.pt",  # Path to the YOLOv5 model file (weights)
-    "confidence_threshold": 0.5                   # Minimum confidence score for a detection to be considered valid
+    "confidence_threshold": 0.5,                  # Minimum confidence score for a detection to be considered valid
+    "iou_threshold": 0.45,                        # Overlap above which non-maximum suppression drops a box
+    "max_detections": 300,                        # Detections kept per image after non-maximum suppression
+    "classes": None,                              # Class names to detect, None for all; others are dropped before NMS
+    "class_thresholds": {}                        # Per-class confidence thresholds, e.g. {"cell phone": 0.35}
+}
+
+# Video wall configuration
+video_wall_config = {
+    "active_fps": 15,        # Tile refresh rate while there is motion or a recent alert
+    "idle_fps": 2,           # Tile refresh rate for quiet cameras
+    "activity_hold": 5.0,    # Seconds a tile stays at the active rate after the last activity
+    "motion_size": (160, 120),  # Resolution motion is evaluated at
+    "motion_min_area": 32,   # Minimum contour area at motion_size (500 px at 640x480)
+    "idle_keyframes_only": True  # Decode only keyframes of quiet tiles (pyav backend; switching costs nothing there)
+}
+
+# Detection overlay drawn on the display images
+overlay_config = {
+    "layer": False,  # Draw on a separate transparent layer composited by the GUI instead of into the image
+    "font_scale": 0.45,
+    "thickness": 2,
+    "label_alpha": 0.6,  # Opacity of the label background
+    "sprite_cache": 512  # Label sprites kept, one per (text, colour)
+}
+
+# Training configuration
+training_config = {
+    "reserved_cores": 2,     # CPU cores kept free for live detection while training runs
+    "nice": 10,              # Priority increment for the training process (POSIX nice value)
+    "poll_interval": 500     # Milliseconds between progress updates in the GUI
+}
+
+# Hard-negative mining configuration
+hard_negative_config = {
+    "enabled": True,
+    "root": "training_data/hard_negatives",  # Review queue; only samples accepted after review are used for training
+    "max_samples": 2000,       # Oldest unreviewed samples are evicted beyond this
+    "min_interval": 10.0,      # Minimum seconds between samples from the same camera
+    "min_confidence": 0.5,     # Detections in [min_confidence, max_confidence) count as uncertain;
+    "max_confidence": 0.6,     # the lower bound cannot go below the model's confidence threshold
+    "hash_distance": 6,        # Frames within this dHash Hamming distance count as duplicates
+    "queue_size": 4            # Pending frames; offers are dropped when the writer falls behind
+}
+
+# Metrics configuration
+metrics_config = {
+    "enabled": True,
+    "host": "127.0.0.1",     # Local only; put a reverse proxy in front to expose it
+    "port": 9108             # Serves Prometheus text format at /metrics
+}
+
+# Pipeline rate control configuration
+pipeline_config = {
+    "latency_budget": 0.25,          # Target capture-to-result latency per camera, in seconds
+    "min_detect_fps": 1.0,           # Detection rate never drops below this under overload
+    "input_sizes": [640, 512, 416, 320],  # Model input sizes to step through, largest first
+    "ewma_alpha": 0.2,               # Smoothing of the measured stage latencies
+    "size_cooldown": 3.0             # Minimum seconds between input size changes
+}
+
+# Camera reconnect configuration
+reconnect_config = {
+    "initial_delay": 1.0,    # Seconds before the first reconnect attempt
+    "max_delay": 60.0,       # Upper bound of the backoff delay
+    "multiplier": 2.0,       # Backoff growth per failed attempt
+    "jitter": 0.5,           # Fraction of the delay randomised, so cameras do not retry in lockstep
+    "read_failures": 5,      # Consecutive failed reads before the connection is considered lost
+    "stable_after": 30.0     # Seconds a connection must last before the backoff resets
+}
+
+# Tiled inference for high-resolution cameras, so small objects survive the downscale to the model input
+tiling_config = {
+    "overlap": 0.2,              # Fraction of a tile shared with its neighbour
+    "include_full_frame": True,  # Also run the whole frame in the same batch, for objects larger than a tile
+    "cameras": {
+        # "Camera 1": {
+        #     "grid": (3, 2),                    # (columns, rows)
+        #     "zones": [(0.0, 0.4, 1.0, 1.0)]    # Optional normalised (x1, y1, x2, y2) regions; other tiles are skipped
+        # }
+    }
+}
+
+# Reuse of detections on near-identical frames
+detection_cache_config = {
+    "enabled": True,
+    "signature_size": (32, 18),  # Block grid of the frame signature (columns, rows)
+    "threshold": 6.0,            # Largest block brightness change (0-255) still treated as the same scene
+    "max_age": 2.0               # Seconds after which the model runs again regardless
+}
+
+# Recording configuration
+recording_config = {
+    "root": "recordings",      # Clips go to <root>/clips/<camera>, continuous segments to <root>/segments/<camera>
+    "event_clips": "packets",  # Keep a pre-roll buffer and write a clip when an alert fires: True, False, or
+                               # "packets" for cameras whose backend delivers encoded packets (pyav) only
+    "pre_roll": 5.0,           # Seconds kept before an alert
+    "post_roll": 10.0,         # Seconds recorded after the last alert of a clip
+    "segment_length": 300.0,   # Length of continuous recording files, in seconds
+    "max_disk_gb": 50.0,       # Oldest recordings are deleted beyond this; segments go before clips
+    "frame_codec": "mp4v",     # Codec used when only decoded frames are available (non-PyAV backends)
+    "queue_size": 1024,        # Items waiting for the writer before new ones are dropped
+    "max_buffer_mb": 256,      # Memory of each camera's pre-roll buffer; decoded frames (non-PyAV backends) may shorten the pre-roll
+    "max_queue_mb": 256        # Memory of the items waiting for each camera's writer before new ones are dropped
+}
+
+# Offline processing of recorded footage (python -m offline_processing.batch_processor)
+offline_config = {
+    "chunk_seconds": 120,  # Length of the chunk each worker process decodes
+    "batch_size": 8,  # Frames per model call
+    "stride": 1,  # Detect on every Nth frame
+    "link_window": 1.0,  # Seconds around a chunk boundary in which tracks are re-linked
+    "link_iou": 0.3,  # Minimum overlap of boxes on both sides of a boundary to re-link
+    "max_gap": 2.0,  # Seconds a track may go unseen before a loitering interval ends
+    "classes": ["person", "cell phone"]  # Classes the offline rules use, others are dropped before NMS; None for all
+}
+
+# Archive of per-frame track metadata, searchable with data_analytics.track_archive
+archive_config = {
+    "enabled": True,
+    "root": "track_archive",
+    "flush_interval": 5.0,  # Seconds between appends to the column files
+    "max_gap": 1.0  # Seconds without a match that split two ranges returned by a query
+}
+
+# Alert deduplication, correlation into incidents and rate limiting (notifications/alert_engine.py)
+alert_config = {
+    "dedup_ttl": 60.0,  # Seconds a repeat of the same (rule, camera, zone, track) alert is suppressed after it was last seen
+    "incident_window": 120.0,  # Seconds after its last alert that an incident stays open for related alerts
+    "rate_limits": {  # Per severity: (alerts per minute, burst); None for no limit
+        "info": (6, 3),
+        "warning": (20, 5),
+        "critical": None
+    }
+}
+
+# Machine-readable alert channels, sent from a background thread (notifications/dispatcher.py)
+notification_config = {
+    "queue_size": 256,  # Notifications waiting for each channel's dispatcher thread before new ones are dropped
+    "webhook": {
+        "enabled": False,
+        "urls": [],        # Each alert is POSTed as JSON to every URL
+        "headers": {},     # e.g. {"Authorization": "Bearer ..."}
+        "timeout": 5.0,
+        "retries": 2       # Retries on connection errors and 502/503/504 responses
+    },
+    "mqtt": {  # Requires paho-mqtt
+        "enabled": False,
+        "host": "localhost",
+        "port": 1883,
+        "topic": "cctv/alerts",
+        "client_id": "cctv-monitor",  # Fixed, so the broker keeps the session across reconnects
+        "username": None,
+        "password": None,
+        "keepalive": 60,
+        "spool_dir": "notification_spool",  # Alerts are kept here until the broker acknowledges them
+        "max_spool": 10000  # Oldest spooled alerts are dropped beyond this
+    }
+}
+
+# JPEG snapshots attached to alerts (notifications/snapshot_store.py)
+snapshot_config = {
+    "enabled": True,
+    "root": "alert_snapshots",  # Stored as <root>/<first 2 hex digits>/<sha256>.jpg
+    "quality": 80,             # JPEG quality, 0-100
+    "crop_margin": 0.5,        # Context added around the involved boxes, as a fraction of their size
+    "context_width": 640,      # Width of the downscaled whole frame stored with the crop
+    "workers": 2,              # Encoding threads
+    "max_disk_mb": 500,        # Least recently used snapshots are deleted beyond this
+    "inline": True             # Embed the JPEGs (base64) in webhook and MQTT payloads
 }
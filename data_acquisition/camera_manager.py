@@ -1,34 +1,27 @@
 # File: data_acquisition/camera_manager.py
-import cv2
 from configs.config import camera_config
+from data_acquisition.capture_backends import open_capture
 
 
 class CameraManager:
-    def __init__(self):
+    def __init__(self, options=None):
         """
-        Initialize the Camera Manager with settings strictly from config.py.
+        Initialize the Camera Manager with settings from config.py.
+        :param options: Overrides of camera_config entries (e.g. backend, decode_size).
         """
-        self.camera_type = camera_config["camera_type"]
-        self.camera_source = camera_config["camera_source"]
+        self.options = dict(camera_config, **(options or {}))
+        self.camera_type = self.options["camera_type"]
+        self.camera_source = self.options["camera_source"]
         self.capture = None
 
     def connect(self):
         """
-        Connect to the camera using settings from config.py.
+        Connect to the camera using the configured capture backend.
         """
         try:
-            if self.camera_type == 'USB':
-                self.capture = cv2.VideoCapture(self.camera_source)
-                
-                # Set fixed camera properties
-                self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-                self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-                self.capture.set(cv2.CAP_PROP_FPS, 30)
-                
-            elif self.camera_type in ['IP', 'RTSP']:
-                self.capture = cv2.VideoCapture(self.camera_source)
-            else:
+            if self.camera_type not in ['USB', 'IP', 'RTSP']:
                 raise ValueError(f"Unsupported camera type: {self.camera_type}")
+            self.capture = open_capture(self.camera_source, self.options)
 
             if not self.capture.isOpened():
                 raise ConnectionError("Failed to connect to the camera")
@@ -38,10 +31,11 @@ class CameraManager:
             if not ret:
                 raise ConnectionError("Camera connected but failed to read frame")
 
-            print(f"Connected to {self.camera_type} camera at {self.camera_source}")
+            print(f"Connected to {self.camera_type} camera at {self.camera_source} ({self.options['backend']} backend)")
             
         except Exception as e:
             print(f"Error connecting to camera: {str(e)}")
+            self.disconnect()
             raise
 
     def disconnect(self):
@@ -0,0 +1,317 @@
+# File: data_acquisition/capture_backends.py
+
+import os
+import json
+import subprocess
+import threading
+
+import cv2
+import numpy as np
+
+# OpenCV reads FFmpeg options from the process environment when a capture is opened; cameras
+# connect in parallel threads, so setting the variable and opening hold this lock
+_ffmpeg_env_lock = threading.Lock()
+FFMPEG_OPTIONS_ENV = "OPENCV_FFMPEG_CAPTURE_OPTIONS"
+
+
+def _ffmpeg_input_options(source, options):
+    """FFmpeg demuxer options for a network source, as a name -> value dictionary."""
+    if not isinstance(source, str) or not source.lower().startswith(('rtsp://', 'rtmp://', 'http://', 'https://')):
+        return {}
+    input_options = {}
+    if source.lower().startswith('rtsp://'):
+        input_options['rtsp_transport'] = options.get("rtsp_transport", "tcp")
+    if options.get("low_latency", True):
+        input_options['fflags'] = 'nobuffer'
+        input_options['flags'] = 'low_delay'
+    if options.get("timeout"):
+        # Socket I/O timeout in microseconds, so a stalled camera ends the read instead of blocking it
+        name = 'timeout' if source.lower().startswith('rtsp://') else 'rw_timeout'
+        input_options[name] = str(int(options["timeout"] * 1e6))
+    return input_options
+
+
+def _open_with_env(ffmpeg_options, open_capture):
+    """
+    Open a capture with OPENCV_FFMPEG_CAPTURE_OPTIONS set to ffmpeg_options, restoring the
+    previous value afterwards. With None the variable is left as it is, but other cameras
+    cannot change it while the capture opens.
+    :return: Result of open_capture.
+    """
+    with _ffmpeg_env_lock:
+        previous = os.environ.get(FFMPEG_OPTIONS_ENV)
+        if ffmpeg_options is not None:
+            os.environ[FFMPEG_OPTIONS_ENV] = ffmpeg_options
+        try:
+            return open_capture()
+        finally:
+            if previous is None:
+                os.environ.pop(FFMPEG_OPTIONS_ENV, None)
+            else:
+                os.environ[FFMPEG_OPTIONS_ENV] = previous
+
+
+class OpenCVCapture:
+    def __init__(self, source, options):
+        """
+        cv2.VideoCapture based capture.
+        Network streams go through OpenCV's FFmpeg backend with the configured transport and
+        low-latency flags; scaling happens after decoding, so decode_size saves no decode work here.
+        :param source: Device index or stream URL.
+        :param options: Capture options (see camera_config).
+        """
+        self.source = source
+        self.options = options
+        self.decode_size = options.get("decode_size")
+        self.keyframes_only = False
+        self.last_timestamp = None
+        self.packet_sink = None  # Encoded packets are not available through OpenCV
+        self.capture = None
+
+    def open(self):
+        input_options = _ffmpeg_input_options(self.source, self.options)
+        if input_options:
+            params = []
+            if self.options.get("timeout"):
+                timeout_ms = int(self.options["timeout"] * 1000)
+                params = [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout_ms, cv2.CAP_PROP_READ_TIMEOUT_MSEC, timeout_ms]
+            self.capture = _open_with_env(
+                "|".join(f"{k};{v}" for k, v in input_options.items()),
+                lambda: cv2.VideoCapture(self.source, cv2.CAP_FFMPEG, params))
+        elif not isinstance(self.source, int):
+            # Files go through FFmpeg as well and must not see another camera's options
+            self.capture = _open_with_env(None, lambda: cv2.VideoCapture(self.source))
+        else:
+            self.capture = cv2.VideoCapture(self.source)
+            width, height = self.decode_size or (self.options["resolution"]["width"],
+                                                 self.options["resolution"]["height"])
+            self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            self.capture.set(cv2.CAP_PROP_FPS, self.options.get("fps", 30))
+        # Keep at most one decoded frame queued inside the backend
+        self.capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return self.capture.isOpened()
+
+    def isOpened(self):
+        return self.capture is not None and self.capture.isOpened()
+
+    def read(self):
+        ret, frame = self.capture.read()
+        if not ret:
+            return False, None
+        self.last_timestamp = self.capture.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        if self.decode_size and (frame.shape[1], frame.shape[0]) != tuple(self.decode_size):
+            frame = cv2.resize(frame, tuple(self.decode_size), interpolation=cv2.INTER_AREA)
+        return True, frame
+
+    def set_keyframes_only(self, enabled):
+        """Not supported by OpenCV; every frame is decoded."""
+        return False
+
+    def release(self):
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+
+
+class FFmpegPipeCapture:
+    def __init__(self, source, options):
+        """
+        Decode with an ffmpeg subprocess that writes raw BGR frames to a pipe.
+        Scaling is done by FFmpeg's scale filter at decode time and hardware decoding is used
+        when hwaccel is set. Keyframe-only decoding is not offered, as switching it would
+        restart ffmpeg and so reconnect to the camera.
+        :param source: Stream URL or device path.
+        :param options: Capture options (see camera_config).
+        """
+        self.source = source
+        self.options = options
+        self.keyframes_only = False
+        self.last_timestamp = None
+        self.packet_sink = None  # Encoded packets are not available through the raw pipe
+        self.process = None
+        self.frame_count = 0
+        self.size = tuple(options["decode_size"]) if options.get("decode_size") else None
+        self.buffer = None
+        self.first_frame = None  # Read by open to check the stream, returned by the first read
+
+    def _probe_size(self):
+        result = subprocess.run(
+            ['ffprobe', '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'stream=width,height',
+             '-of', 'json', *self._input_args()],
+            capture_output=True, text=True, timeout=self.options.get("timeout") or 15
+        )
+        stream = json.loads(result.stdout or '{}').get('streams', [{}])[0]
+        if 'width' not in stream:
+            raise ConnectionError(f"Cannot determine the frame size of {self.source}")
+        return stream['width'], stream['height']
+
+    def _input_args(self):
+        args = []
+        for name, value in _ffmpeg_input_options(self.source, self.options).items():
+            args += [f'-{name}', value]
+        return args + ['-i', str(self.source)]
+
+    def open(self):
+        if self.size is None:
+            self.size = self._probe_size()
+        width, height = self.size
+        self.buffer = bytearray(width * height * 3)
+
+        command = ['ffmpeg', '-loglevel', 'error', '-nostdin']
+        if self.options.get("hwaccel"):
+            command += ['-hwaccel', self.options["hwaccel"]]
+        command += self._input_args()
+        command += ['-an', '-vf', f'scale={width}:{height}', '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-']
+        self.process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                        bufsize=len(self.buffer))
+        # ffmpeg starts even when the camera cannot be reached; only a decoded frame shows it is
+        ret, self.first_frame = self._read_frame()
+        return ret
+
+    def isOpened(self):
+        return self.process is not None and self.process.poll() is None
+
+    def read(self):
+        if self.first_frame is not None:
+            frame, self.first_frame = self.first_frame, None
+            return True, frame
+        return self._read_frame()
+
+    def _read_frame(self):
+        if self.process is None:
+            return False, None
+        view = memoryview(self.buffer)
+        filled = 0
+        while filled < len(self.buffer):
+            count = self.process.stdout.readinto(view[filled:])
+            if not count:
+                return False, None
+            filled += count
+        self.frame_count += 1
+        self.last_timestamp = None  # Not available through the raw pipe
+        width, height = self.size
+        # Copy, as the buffer is reused for the next frame
+        return True, np.frombuffer(self.buffer, dtype=np.uint8).reshape(height, width, 3).copy()
+
+    def set_keyframes_only(self, enabled):
+        """Not supported without restarting ffmpeg; every frame is decoded."""
+        return False
+
+    def release(self):
+        self.first_frame = None
+        if self.process is not None:
+            self.process.kill()
+            self.process.wait()
+            self.process = None
+
+
+class PyAVCapture:
+    def __init__(self, source, options):
+        """
+        Decode with PyAV (libav bindings) in-process.
+        Frames carry presentation timestamps, scaling is done by libswscale during
+        the colour conversion, and the decoder can skip non-keyframes. Demuxed packets
+        can be passed on before decoding, so they can be recorded without re-encoding.
+        :param source: Stream URL or file path.
+        :param options: Capture options (see camera_config).
+        """
+        self.source = source
+        self.options = options
+        self.size = tuple(options["decode_size"]) if options.get("decode_size") else None
+        self.keyframes_only = False
+        self.last_timestamp = None
+        self.packet_sink = None  # Callable(packet, stream) receiving every demuxed packet, e.g. for recording
+        self.container = None
+        self.stream = None
+        self.frames = None
+
+    def open(self):
+        import av  # Optional dependency, only needed for this backend
+
+        kwargs = {}
+        if self.options.get("timeout"):
+            kwargs['timeout'] = (self.options["timeout"], self.options["timeout"])  # Open, then each read
+        hwaccel = self._hwaccel()
+        if hwaccel is not None:
+            kwargs['hwaccel'] = hwaccel
+        self.container = av.open(str(self.source), options=_ffmpeg_input_options(self.source, self.options), **kwargs)
+        self.stream = self.container.streams.video[0]
+        self.stream.thread_type = 'AUTO'
+        self.frames = self._decode()
+        return True
+
+    def _hwaccel(self):
+        """:return: PyAV hardware decoding settings for options["hwaccel"], or None to decode in software."""
+        if not self.options.get("hwaccel"):
+            return None
+        try:
+            from av.codec.hwaccel import HWAccel  # PyAV 14 and later
+            return HWAccel(device_type=self.options["hwaccel"], allow_software_fallback=True)
+        except (ImportError, ValueError) as e:
+            print(f"Hardware decoding ({self.options['hwaccel']}) is not available for {self.source}, "
+                  f"decoding in software: {e}")
+            return None
+
+    def _decode(self):
+        for packet in self.container.demux(self.stream):
+            frames = packet.decode()
+            # Packets still reach the sink when the decoder skips them (keyframes only)
+            if self.packet_sink is not None and packet.size:
+                self.packet_sink(packet, self.stream)
+            yield from frames
+
+    def isOpened(self):
+        return self.container is not None
+
+    def read(self):
+        if self.container is None:
+            return False, None
+        try:
+            frame = next(self.frames)
+        except Exception:  # End of stream or decode/network error
+            return False, None
+        self.last_timestamp = frame.time
+        if self.size:
+            image = frame.to_ndarray(format='bgr24', width=self.size[0], height=self.size[1])
+        else:
+            image = frame.to_ndarray(format='bgr24')
+        return True, image
+
+    def set_keyframes_only(self, enabled):
+        self.keyframes_only = enabled
+        if self.stream is not None:
+            self.stream.codec_context.skip_frame = 'NONKEY' if enabled else 'DEFAULT'
+        return True
+
+    def release(self):
+        if self.container is not None:
+            self.container.close()
+            self.container = None
+            self.stream = None
+            self.frames = None
+
+
+BACKENDS = {
+    'opencv': OpenCVCapture,
+    'ffmpeg': FFmpegPipeCapture,
+    'pyav': PyAVCapture
+}
+
+
+def open_capture(source, options):
+    """
+    Create and open the capture backend selected by options["backend"].
+    USB device indices always use OpenCV.
+    :return: An opened capture object with read(), isOpened(), set_keyframes_only() and release().
+    """
+    backend = options.get("backend", "opencv")
+    if isinstance(source, int):
+        backend = 'opencv'
+    if backend not in BACKENDS:
+        raise ValueError(f"Unsupported capture backend: {backend}")
+    capture = BACKENDS[backend](source, options)
+    if not capture.open():
+        capture.release()
+        raise ConnectionError(f"Failed to open {source} with the {backend} backend")
+    return capture
@@ -0,0 +1,103 @@
+# File: data_acquisition/connection_supervisor.py
+
+import random
+import threading
+import time
+
+from configs.config import reconnect_config
+
+
+class ConnectionSupervisor:
+    def __init__(self, connect, camera_metrics=None, stop_event=None):
+        """
+        Keep a camera connection up, reconnecting with jittered exponential backoff.
+        Runs on the caller's capture thread, so a camera that is down only ever delays itself.
+        :param connect: Callable that opens the camera and returns the capture, raising on failure.
+        :param camera_metrics: Optional CameraMetrics receiving connection counters and gauges.
+        :param stop_event: threading.Event that interrupts the backoff wait when set.
+        """
+        self.connect = connect
+        self.metrics = camera_metrics
+        self.stop_event = stop_event or threading.Event()
+        self.initial_delay = reconnect_config["initial_delay"]
+        self.max_delay = reconnect_config["max_delay"]
+        self.multiplier = reconnect_config["multiplier"]
+        self.jitter = reconnect_config["jitter"]
+        self.stable_after = reconnect_config["stable_after"]
+
+        self.state = 'disconnected'  # 'connecting', 'connected', 'reconnecting' or 'stopped'
+        self.attempt = 0
+        self.connections = 0
+        self.connected_since = None
+        self.uptime_total = 0.0
+        self.started = time.monotonic()
+        self.last_error = None
+
+    def next_delay(self):
+        """Backoff before the next attempt: exponential in the attempt count, capped and jittered."""
+        delay = min(self.max_delay, self.initial_delay * self.multiplier ** max(self.attempt - 1, 0))
+        return delay * (1 - self.jitter * random.random())
+
+    def establish(self):
+        """
+        Connect, retrying until it succeeds or the stop event is set.
+        :return: The capture, or None if stopped.
+        """
+        self.state = 'reconnecting' if self.connections else 'connecting'
+        while not self.stop_event.is_set():
+            if self.attempt:
+                if self.stop_event.wait(self.next_delay()):
+                    break
+            self.attempt += 1
+            try:
+                capture = self.connect()
+            except Exception as e:
+                self.last_error = str(e)
+                self._increment('connect_failures')
+                continue
+            if self.connections:
+                self._increment('reconnects')
+            self.connections += 1
+            self.connected_since = time.monotonic()
+            self.state = 'connected'
+            self._set_gauge('connected', 1)
+            return capture
+        self.state = 'stopped'
+        return None
+
+    def connection_lost(self, reason=None):
+        """Record that the current connection dropped. The backoff only resets after a stable connection."""
+        if self.connected_since is not None:
+            duration = time.monotonic() - self.connected_since
+            self.uptime_total += duration
+            if duration >= self.stable_after:
+                self.attempt = 0
+            self.connected_since = None
+        self.last_error = reason
+        self.state = 'reconnecting'
+        self._set_gauge('connected', 0)
+
+    def stop(self):
+        self.stop_event.set()
+        if self.connected_since is not None:
+            self.uptime_total += time.monotonic() - self.connected_since
+            self.connected_since = None
+        self.state = 'stopped'
+        self._set_gauge('connected', 0)
+
+    def uptime(self):
+        """Total seconds connected since the supervisor was created."""
+        current = time.monotonic() - self.connected_since if self.connected_since is not None else 0.0
+        return self.uptime_total + current
+
+    def availability(self):
+        """Fraction of time connected since the supervisor was created."""
+        return self.uptime() / max(time.monotonic() - self.started, 1e-6)
+
+    def _increment(self, counter):
+        if self.metrics is not None:
+            self.metrics.increment(counter)
+
+    def _set_gauge(self, gauge, value):
+        if self.metrics is not None:
+            self.metrics.set_gauge(gauge, value)
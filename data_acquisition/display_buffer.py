@@ -0,0 +1,116 @@
+# File: data_acquisition/display_buffer.py
+
+import threading
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+
+class DisplayBuffer:
+    def __init__(self, width=640, height=480, overlay_layer=False):
+        """
+        Double-buffered, preallocated BGR image sized for on-screen display.
+        The stream worker renders into the back buffer while the GUI reads the
+        front buffer, so no per-frame allocation happens on either side.
+        :param width: Display width in pixels.
+        :param height: Display height in pixels.
+        :param overlay_layer: Keep detections on a separate BGRA layer instead of drawing them into the image.
+        """
+        self.lock = threading.Lock()
+        self.seq = -1
+        self.overlay_layer = overlay_layer
+        self._pending_size = None  # Requested by resize, applied by the worker in render
+        self._allocate(width, height)
+
+    def _allocate(self, width, height):
+        self.width = width
+        self.height = height
+        self._buffers = [np.zeros((height, width, 3), dtype=np.uint8) for _ in range(2)]
+        self._overlays = ([np.zeros((height, width, 4), dtype=np.uint8) for _ in range(2)]
+                          if self.overlay_layer else None)
+        self._overlay_drawn = [False, False]  # Whether each layer has anything to clear
+        self._front = 0
+
+    def resize(self, width, height):
+        """
+        Request a new display size. The worker may be rendering into the back buffer right now,
+        so the buffers are reallocated by render, on the worker, before the next frame.
+        """
+        if width <= 0 or height <= 0:
+            return
+        size = (width, height)
+        with self.lock:
+            self._pending_size = None if size == (self.width, self.height) else size
+
+    def back_buffer(self):
+        """
+        Return the buffer the worker may render into next.
+        """
+        return self._buffers[1 - self._front]
+
+    def render(self, frame, seq, renderer=None, detections=None):
+        """
+        Resize a BGR frame into the back buffer and publish it as the front buffer.
+        Detections are drawn after the resize, at display resolution.
+        :param frame: Full resolution BGR frame (left untouched).
+        :param seq: Sequence number of the source frame.
+        :param renderer: OverlayRenderer used to draw the detections.
+        :param detections: Detections in frame coordinates, or None.
+        :return: The buffer that was rendered into.
+        """
+        if self._pending_size is not None:
+            with self.lock:
+                if self._pending_size is not None:
+                    self._allocate(*self._pending_size)
+                    self._pending_size = None
+                    self.seq = -1
+        back = self.back_buffer()
+        if frame.shape[:2] == back.shape[:2]:
+            np.copyto(back, frame)
+        else:
+            cv2.resize(frame, (self.width, self.height), dst=back, interpolation=cv2.INTER_AREA)
+
+        has_detections = renderer is not None and detections is not None and len(detections) > 0
+        scale = (self.width / frame.shape[1], self.height / frame.shape[0])
+        if self._overlays is not None:
+            index = 1 - self._front
+            if self._overlay_drawn[index]:
+                self._overlays[index].fill(0)
+            if has_detections:
+                renderer.draw(self._overlays[index], detections, scale)
+            self._overlay_drawn[index] = has_detections
+        elif has_detections:
+            renderer.draw(back, detections, scale)
+        self.publish(seq)
+        return back
+
+    def publish(self, seq):
+        """
+        Swap the back buffer to the front once it has been fully rendered.
+        """
+        with self.lock:
+            self._front = 1 - self._front
+            self.seq = seq
+
+    @contextmanager
+    def latest(self, last_seq=None):
+        """
+        Hold the front buffer for reading.
+        Yields (seq, image) where image is None if nothing newer than last_seq is available.
+        The image must not be used after the context exits.
+        """
+        with self.lock:
+            if self.seq < 0 or self.seq == last_seq:
+                yield self.seq, None
+            else:
+                yield self.seq, self._buffers[self._front]
+
+    def front_overlay(self):
+        """
+        BGRA detection layer matching the front buffer, or None if there is nothing to composite.
+        Only valid inside latest().
+        """
+        if self._overlays is None or not self._overlay_drawn[self._front]:
+            return None
+        return self._overlays[self._front]
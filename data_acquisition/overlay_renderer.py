@@ -0,0 +1,117 @@
+# File: data_acquisition/overlay_renderer.py
+
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from configs.config import overlay_config
+from object_detection.detection_batch import DetectionBatch
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+PADDING = 2
+# BGR colours assigned to class IDs in turn
+PALETTE = [
+    (0, 255, 0), (255, 128, 0), (0, 128, 255), (255, 0, 255), (0, 255, 255),
+    (255, 255, 0), (128, 0, 255), (0, 0, 255), (128, 255, 128), (255, 128, 128),
+]
+
+
+class OverlayRenderer:
+    def __init__(self, font_scale=None, thickness=None, label_alpha=None, cache_size=None):
+        """
+        Draw detection boxes and labels, at whatever resolution the target image has.
+        Boxes of one class are drawn with a single polylines call. Labels are rendered once per
+        text and colour into sprites (colour patch plus alpha mask) and afterwards only blended in.
+        Targets are either BGR images (labels burnt in) or BGRA overlay layers composited by the GUI.
+        """
+        self.font_scale = overlay_config["font_scale"] if font_scale is None else font_scale
+        self.thickness = overlay_config["thickness"] if thickness is None else thickness
+        self.label_alpha = overlay_config["label_alpha"] if label_alpha is None else label_alpha
+        self.cache_size = overlay_config["sprite_cache"] if cache_size is None else cache_size
+        self.sprites = OrderedDict()  # (text, colour) -> (colour patch, alpha, 1 - alpha, alpha as uint8)
+
+    @staticmethod
+    def color(class_id):
+        return PALETTE[int(class_id) % len(PALETTE)]
+
+    def sprite(self, text, color):
+        """
+        Label sprite for text on a translucent box of the given colour, rendered on first use.
+        :return: (uint8 colour patch, float32 alpha, float32 1 - alpha, uint8 alpha), all (h, w) sized.
+        """
+        key = (text, color)
+        entry = self.sprites.get(key)
+        if entry is not None:
+            self.sprites.move_to_end(key)
+            return entry
+
+        (width, height), baseline = cv2.getTextSize(text, FONT, self.font_scale, 1)
+        mask = np.zeros((height + baseline + 2 * PADDING, width + 2 * PADDING), dtype=np.uint8)
+        cv2.putText(mask, text, (PADDING, PADDING + height), FONT, self.font_scale, 255, 1, cv2.LINE_AA)
+        text_alpha = mask.astype(np.float32) / 255
+        # Dark text, opaque, on a box of the class colour
+        patch = (np.array(color, dtype=np.float32) * (1 - text_alpha[..., None])).astype(np.uint8)
+        alpha = self.label_alpha + (1 - self.label_alpha) * text_alpha
+        entry = (patch, alpha, 1 - alpha, (alpha * 255).astype(np.uint8))
+
+        self.sprites[key] = entry
+        if len(self.sprites) > self.cache_size:
+            self.sprites.popitem(last=False)
+        return entry
+
+    def _blit(self, image, sprite, x, y):
+        """Blend a sprite into the image with its top-left corner at (x, y), clipped to the image."""
+        patch, alpha, inverse, alpha_u8 = sprite
+        height, width = alpha.shape
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + width, image.shape[1]), min(y + height, image.shape[0])
+        if x0 >= x1 or y0 >= y1:
+            return 0
+        rows, columns = slice(y0 - y, y1 - y), slice(x0 - x, x1 - x)
+        region = image[y0:y1, x0:x1]
+        if image.shape[2] == 4:
+            # Overlay layer: straight colour and alpha, the GUI does the blending
+            region[..., :3] = patch[rows, columns]
+            region[..., 3] = alpha_u8[rows, columns]
+        else:
+            # Per-pixel weighted sum, written straight back into the image
+            cv2.blendLinear(region, patch[rows, columns], inverse[rows, columns], alpha[rows, columns], dst=region)
+        return x1 - x0
+
+    def draw(self, image, detections, scale=(1.0, 1.0), names=None):
+        """
+        Draw detections onto an image in place.
+        :param image: BGR image, or BGRA overlay layer.
+        :param detections: DetectionBatch, or list of detection dictionaries.
+        :param scale: (x, y) factors from frame coordinates to image coordinates.
+        :param names: Class names, only needed for lists of dictionaries.
+        :return: The image.
+        """
+        detections = DetectionBatch.coerce(detections, names)
+        if not len(detections):
+            return image
+        opaque = (255,) if image.shape[2] == 4 else ()
+
+        boxes = (detections.boxes * np.array(scale * 2, dtype=np.float32)).astype(np.int32)
+        corners = boxes[:, [0, 1, 2, 1, 2, 3, 0, 3]].reshape(-1, 4, 2)
+        for class_id in np.unique(detections.class_ids).tolist():
+            mask = detections.class_ids == class_id
+            cv2.polylines(image, list(corners[mask]), True, self.color(class_id) + opaque, self.thickness)
+
+        for (x1, y1, _, _), score, class_id in zip(boxes.tolist(), detections.scores.tolist(),
+                                                   detections.class_ids.tolist()):
+            color = self.color(class_id)
+            name = self.sprite(detections.class_name(class_id), color)
+            confidence = self.sprite(f"{score:.2f}", color)
+            # Above the box, or inside it at the top edge of the image
+            y = y1 - name[0].shape[0]
+            if y < 0:
+                y = y1
+            width = self._blit(image, name, x1, y)
+            self._blit(image, confidence, x1 + width, y)
+        return image
+
+
+# Shared by all camera handlers; the sprite cache is the same for every camera
+overlay_renderer = OverlayRenderer()
@@ -0,0 +1,77 @@
+# File: data_acquisition/rate_controller.py
+
+from configs.config import pipeline_config
+
+
+class AdaptiveRateController:
+    def __init__(self, max_fps=30, latency_budget=None):
+        """
+        Pick a camera's detection rate and model input size from measured stage latencies,
+        so the pipeline stays within its latency budget instead of building up lag.
+        Under overload the detection rate is lowered first, then the input size;
+        both recover once there is headroom again.
+        :param max_fps: Upper bound on the detection rate, normally the camera's fps setting.
+        :param latency_budget: Target end-to-end latency in seconds.
+        """
+        self.max_fps = max_fps
+        self.latency_budget = latency_budget or pipeline_config["latency_budget"]
+        self.min_fps = pipeline_config["min_detect_fps"]
+        self.input_sizes = pipeline_config["input_sizes"]
+        self.alpha = pipeline_config["ewma_alpha"]
+        self.size_cooldown = pipeline_config["size_cooldown"]
+
+        self.detect_fps = float(max_fps)
+        self.size_index = 0
+        self.detect_latency = None
+        self.queue_latency = 0.0
+        self.last_detect = float('-inf')
+        self.last_size_change = float('-inf')
+
+    @property
+    def input_size(self):
+        return self.input_sizes[self.size_index]
+
+    def set_max_fps(self, max_fps):
+        self.max_fps = max_fps
+        self.detect_fps = min(self.detect_fps, float(max_fps))
+
+    def _smooth(self, current, value):
+        return value if current is None else current + self.alpha * (value - current)
+
+    def should_detect(self, now):
+        """Whether a frame picked up at time now should go through detection."""
+        if now - self.last_detect >= 1.0 / self.detect_fps:
+            self.last_detect = now
+            return True
+        return False
+
+    def observe_queue(self, seconds):
+        """Age of a frame when the worker picked it up."""
+        self.queue_latency = self._smooth(self.queue_latency, seconds)
+
+    def observe_detect(self, seconds, now):
+        """Duration of a detection pass; adjusts rate and size."""
+        self.detect_latency = self._smooth(self.detect_latency, seconds)
+        self._adjust(now)
+
+    def _adjust(self, now):
+        latency = self.detect_latency + self.queue_latency
+        # A detection pass must also fit in the frame interval, or frames queue behind it
+        load = self.detect_latency * self.detect_fps
+
+        if latency > self.latency_budget or load > 1.0:
+            if self.detect_fps > self.min_fps:
+                self.detect_fps = max(self.min_fps, self.detect_fps * 0.8)
+            if (self.detect_latency > 0.8 * self.latency_budget
+                    and self.size_index < len(self.input_sizes) - 1
+                    and now - self.last_size_change >= self.size_cooldown):
+                self.size_index += 1
+                self.last_size_change = now
+        elif latency < 0.5 * self.latency_budget and load < 0.7:
+            if self.detect_fps < self.max_fps:
+                self.detect_fps = min(float(self.max_fps), self.detect_fps * 1.1)
+            elif (self.size_index > 0
+                  and self.detect_latency < 0.3 * self.latency_budget
+                  and now - self.last_size_change >= self.size_cooldown):
+                self.size_index -= 1
+                self.last_size_change = now
@@ -5,45 +5,99 @@ import threading
 import time
 
 from data_acquisition.camera_manager import CameraManager
+from data_acquisition.connection_supervisor import ConnectionSupervisor
+from data_acquisition.display_buffer import DisplayBuffer
+from data_acquisition.overlay_renderer import overlay_renderer
+from data_acquisition.rate_controller import AdaptiveRateController
+from recording.recorder import CameraRecorder, event_clips_enabled
 from preprocessing.frame_preprocessor import FramePreprocessor
 from preprocessing.motion_detection import MotionDetector
-from object_detection.object_detector import ObjectDetector
-from anomaly_detection.anomaly_detector import LoiteringDetector
-from configs.config import camera_config, model_config
+from object_detection.model_loader import model_loader
+from object_detection.tiling import tile_windows
+from object_detection.detection_cache import DetectionCache
+from object_detection.detection_batch import DetectionBatch
+from anomaly_detection.anomaly_detector import LoiteringDetector, areas_for_boxes
+from tracking.tracker import Tracker
+from data_analytics.track_archive import track_archive
+from configs.camera_profiles import camera_profiles, capture_options, CAPTURE_FIELDS
+from configs.config import (video_wall_config, reconnect_config, tiling_config,
+                            detection_cache_config, archive_config, overlay_config)
+from metrics.pipeline_metrics import metrics
 
 
 class VideoStreamHandler:
-    def __init__(self, display_window=False):
+    def __init__(self, display_window=False, camera_name=None, hard_negative_sampler=None):
         """
         Initialize the Video Stream Handler.
         :param display_window: Whether to display the video stream in a window.
+        :param camera_name: Name of the camera this handler streams from.
+        :param hard_negative_sampler: Optional HardNegativeSampler fed with uncertain frames.
         """
+        self.camera_name = camera_name
+        self.profile = camera_profiles.get(camera_name)  # Settings snapshot, refreshed between frames
+        self.hard_negative_sampler = hard_negative_sampler
         self.camera_manager = CameraManager() 
         self.display_window = display_window
         self.running = False
         self.current_frame = None
+        self.frame_seq = 0  # Incremented for every captured frame
+        self.frame_time = 0.0  # Monotonic capture time of the current frame
+        self.taken_seq = 0  # Last frame picked up by the processing thread
+        self.metrics = metrics.camera(camera_name)
         self.lock = threading.Lock()
+        self.new_frame = threading.Condition(self.lock)
+        self.display_buffer = DisplayBuffer(overlay_layer=overlay_config["layer"])
+        self.latest_detections = None
+        self.drawn_detections = []  # Last detections, redrawn on frames between detection passes
+        self.latest_raw_frame = None  # Unannotated frame the latest detections belong to
+        self.detection_seq = -1
+        self.capture_thread = None
+        self.process_thread = None
         self.preprocessor = FramePreprocessor()
-        self.motion_detector = MotionDetector()
-        self.object_detector = ObjectDetector()
-        self.loitering_detector = LoiteringDetector()
+        self.motion_detector = MotionDetector(min_area=video_wall_config["motion_min_area"])
+        self.loitering_detector = LoiteringDetector(self.profile.zones)
+        self.tracker = Tracker()
+        self.archive = track_archive if archive_config["enabled"] else None
         self.ml_enabled = False
         self.capture = None
-        self.model = None  # YOLO model will be initialized when needed
+        self.model = None  # Shared ObjectDetector, available once ML is enabled and the model has loaded
+        self.tiling = tiling_config["cameras"].get(camera_name)  # Tiled inference settings of this camera
+        self.tile_windows = None  # (frame shape, windows) cached for the current resolution
+        self.detection_cache = DetectionCache() if detection_cache_config["enabled"] else None
+        self.detect_lock = threading.Lock()
+        self.rate_controller = AdaptiveRateController(max_fps=self.profile.fps)
+
+        # Adaptive display rate, used when the stream is shown as a video wall tile
+        self.adaptive_display = False
+        self.last_activity = 0.0
+        self.last_render = 0.0
+        self.keyframes_only = False  # Requested by the processing thread, applied by the capture thread
+        self.reconnect_requested = False  # Set when capture settings change, handled by the capture thread
+
+        # Pre-roll buffer, event clips and continuous recording
+        self.recorder = None
+        if event_clips_enabled(self.profile.backend):
+            self.recorder = CameraRecorder(camera_name, fps=self.profile.fps)
+
+        # Connection handling, set up by start_stream
+        self.camera_options = None
+        self.stop_event = None
+        self.supervisor = None
         
     def start_stream(self):
         """
-        Start the video stream.
+        Start the video stream. Returns immediately; the camera is opened (and reopened
+        after connection loss) by the capture thread, so several cameras connect in parallel.
+        The model is loaded by the processing thread when ML is enabled.
         """
         try:
-            # Initialize video capture
-            if camera_config["camera_type"] == "USB":
-                self.capture = cv2.VideoCapture(camera_config["camera_source"])
-            elif camera_config["camera_type"] == "IP":
-                self.capture = cv2.VideoCapture(camera_config["camera_source"])
-            
-            if not self.capture.isOpened():
-                raise Exception("Failed to open video stream")
+            # The settings are read now, as they may have changed since the handler was created
+            self.profile = camera_profiles.get(self.camera_name)
+            self.camera_options = capture_options(self.profile)
+            self.rate_controller.set_max_fps(self.profile.fps)
+            self.reconnect_requested = False
+            self.stop_event = threading.Event()
+            self.supervisor = ConnectionSupervisor(self._connect, self.metrics, self.stop_event)
             
             self.running = True
             
@@ -51,49 +105,294 @@ class VideoStreamHandler:
             self.capture_thread = threading.Thread(target=self._capture_frames)
             self.capture_thread.daemon = True
             self.capture_thread.start()
-            
-            # Initialize YOLO model if ML is enabled
-            if self.ml_enabled and self.model is None:
-                self.model = self._initialize_model()
+
+            # Start processing thread (detection and display rendering)
+            self.process_thread = threading.Thread(target=self._process_frames)
+            self.process_thread.daemon = True
+            self.process_thread.start()
                 
         except Exception as e:
             print(f"Error starting stream: {str(e)}")
             self.running = False
 
+    def _connect(self):
+        """
+        Open the camera through the configured capture backend.
+        :return: The opened capture.
+        """
+        self.camera_manager.disconnect()
+        self.camera_manager = CameraManager(self.camera_options)
+        self.camera_manager.connect()
+        return self.camera_manager.capture
+
+    @property
+    def connection_state(self):
+        """'connecting', 'connected', 'reconnecting', 'stopped', or None before the first start."""
+        return self.supervisor.state if self.supervisor is not None else None
+
     def _capture_frames(self):
         """
-        Continuously capture frames in a separate thread.
+        Continuously capture frames in a separate thread, reconnecting whenever the camera drops out.
         """
+        failures = 0
         while self.running:
+            if self.capture is None:
+                self.capture = self.supervisor.establish()
+                if self.capture is None:
+                    break  # Stopped while reconnecting
+                if self.recorder is not None:
+                    self.capture.packet_sink = self.recorder.add_packet
+                failures = 0
+            if self.keyframes_only != self.capture.keyframes_only:
+                self.capture.set_keyframes_only(self.keyframes_only)
+            start = time.monotonic()
             ret, frame = self.capture.read()
-            if ret:
-                self.current_frame = frame
-            else:
-                print("Failed to capture frame")
-                self.running = False
+            captured = time.monotonic()
+            with self.new_frame:
+                if ret:
+                    if self.frame_seq > self.taken_seq:
+                        # The previous frame was never processed
+                        self.metrics.increment('capture_dropped')
+                    self.current_frame = frame
+                    self.frame_time = captured
+                    self.frame_seq += 1
+                    self.metrics.increment('frames_captured')
+                    self.metrics.observe('capture', captured - start)
+                    failures = 0
+                else:
+                    self.metrics.increment('capture_failures')
+                    failures += 1
+                self.new_frame.notify_all()
+            # Outside the lock, so the processing thread does not wait for the pre-roll buffer
+            if ret and self.recorder is not None:
+                self.recorder.add_frame(frame)
+            if failures >= reconnect_config["read_failures"] or self.reconnect_requested:
+                if self.reconnect_requested:
+                    print(f"Camera settings of {self.camera_name or 'camera'} changed, reconnecting")
+                    self.reconnect_requested = False
+                    self.supervisor.connection_lost("settings changed")
+                else:
+                    print(f"Lost connection to {self.camera_name or 'camera'}, reconnecting")
+                    self.supervisor.connection_lost("read failed")
+                self.camera_manager.disconnect()
+                self.capture = None
+                continue
             time.sleep(0.01)  # Small delay to prevent excessive CPU usage
 
+    def _process_frames(self):
+        """
+        Run detection and render the display image for each new frame in a separate thread,
+        so the GUI thread only has to paint a ready-made image.
+        """
+        last_seq = 0
+        while self.running:
+            with self.new_frame:
+                while self.running and self.frame_seq == last_seq:
+                    self.new_frame.wait(0.5)
+                if not self.running:
+                    break
+                frame = self.current_frame
+                frame_time = self.frame_time
+                last_seq = self.taken_seq = self.frame_seq
+
+            # Settings changes take effect here, between frames, without restarting the stream
+            self._refresh_profile()
+            now = time.monotonic()
+            self.metrics.observe('queue', now - frame_time)
+            self.rate_controller.observe_queue(now - frame_time)
+            if self.adaptive_display:
+                small = cv2.resize(frame, video_wall_config["motion_size"], interpolation=cv2.INTER_AREA)
+                if self.motion_detector.detect_motion(small):
+                    self.last_activity = now
+                # Quiet cameras only need their keyframes decoded until something moves
+                self.keyframes_only = (video_wall_config["idle_keyframes_only"]
+                                       and now - self.last_activity >= video_wall_config["activity_hold"])
+            else:
+                self.keyframes_only = False
+
+            detections = None
+            raw_frame = None
+            if self.ml_enabled:
+                if self.model is None:
+                    # Frames keep flowing without detections while the model loads in the background
+                    self.model = self._initialize_model()
+                    if self.model is not None and self.hard_negative_sampler is not None:
+                        self.hard_negative_sampler.set_class_names(self.model.names)
+                if self.model is not None:
+                    # Frames that waited longer than the latency budget are not worth detecting on
+                    if now - frame_time > self.rate_controller.latency_budget:
+                        self.metrics.increment('process_dropped')
+                    elif self.rate_controller.should_detect(now):
+                        raw_frame = frame
+                        detect_start = time.monotonic()
+                        detections, cached = self._detect(frame, self.rate_controller.input_size)
+                        detect_end = time.monotonic()
+                        detections = self._track(detections, frame.shape, frame_time)
+                        if not cached:
+                            # Cache hits are counted separately; their ~0 ms would fake headroom
+                            self.metrics.observe('detect', detect_end - detect_start)
+                            self.rate_controller.observe_detect(detect_end - detect_start, detect_end)
+                        self.drawn_detections = detections
+                        if self.hard_negative_sampler is not None:
+                            self.hard_negative_sampler.offer(self.camera_name, raw_frame, detections)
+                self.metrics.set_gauge('detect_fps', round(self.rate_controller.detect_fps, 2))
+                self.metrics.set_gauge('input_size', self.rate_controller.input_size)
+
+            if not self.adaptive_display or self._display_due(now):
+                render_start = time.monotonic()
+                # Detections are drawn on the display image, the captured frame stays untouched
+                self.display_buffer.render(frame, last_seq, overlay_renderer,
+                                           self.drawn_detections if self.ml_enabled else None)
+                self.last_render = now
+                self.metrics.observe('render', time.monotonic() - render_start)
+            if detections is not None or not self.ml_enabled:
+                with self.lock:
+                    self.latest_detections = detections
+                    self.latest_raw_frame = raw_frame
+                    self.detection_seq = last_seq
+            self.metrics.increment('frames_processed')
+            self.metrics.observe('end_to_end', time.monotonic() - frame_time)
+
+    def _refresh_profile(self):
+        """
+        Pick up a changed camera profile. Detection settings, zones and the frame rate apply
+        to the next frame; capture settings make the capture thread reopen the camera.
+        """
+        profile = camera_profiles.get(self.camera_name)
+        old = self.profile
+        if profile.version == old.version:
+            return
+        self.profile = profile
+        if profile.fps != old.fps:
+            self.rate_controller.set_max_fps(profile.fps)
+            if self.recorder is not None:
+                self.recorder.fps = profile.fps
+        if self.recorder is None and event_clips_enabled(profile.backend):
+            self.recorder = CameraRecorder(self.camera_name, fps=profile.fps)
+        if any(getattr(profile, field) != getattr(old, field) for field in CAPTURE_FIELDS):
+            self.camera_options = capture_options(profile)
+            self.reconnect_requested = True
+        if profile.model_path != old.model_path:
+            self.model = None  # Requested again for the next frame
+        self.loitering_detector.areas = profile.zones
+        if self.detection_cache is not None:
+            with self.detect_lock:
+                self.detection_cache.clear()
+        print(f"Applied settings version {profile.version} to {self.camera_name}")
+
+    def _display_due(self, now):
+        """
+        Check whether the display image should be refreshed, based on recent activity.
+        """
+        if now - self.last_activity < video_wall_config["activity_hold"]:
+            fps = video_wall_config["active_fps"]
+        else:
+            fps = video_wall_config["idle_fps"]
+        return now - self.last_render >= 1.0 / fps
+
+    def set_max_fps(self, fps):
+        """
+        Set the highest detection rate the rate controller may pick, normally the camera's fps setting.
+        """
+        self.rate_controller.set_max_fps(fps)
+
+    def mark_activity(self):
+        """
+        Flag activity (e.g. an alert) so the display is refreshed at the full rate.
+        """
+        self.last_activity = time.monotonic()
+
+    def set_display_size(self, width, height):
+        """
+        Set the size the processing thread renders display images at.
+        """
+        self.display_buffer.resize(width, height)
+
+    def start_recording(self):
+        """
+        Record the stream continuously in fixed-length segments.
+        """
+        if self.recorder is None:
+            self.recorder = CameraRecorder(self.camera_name, fps=self.profile.fps)
+            capture = self.capture
+            if capture is not None:
+                capture.packet_sink = self.recorder.add_packet
+        self.recorder.start_continuous()
+
+    def stop_recording(self):
+        """
+        Stop continuous recording; event clips continue. Open files are finished by the
+        recorder's writer thread, so this returns at once.
+        """
+        if self.recorder is not None:
+            self.recorder.stop_continuous()
+
+    def record_event(self, reason):
+        """
+        Save a clip around an alert, starting pre_roll seconds before it.
+        """
+        if self.recorder is None or not self.running:
+            return None
+        return self.recorder.trigger(reason)
+
+    def sample_alert_frame(self, reason):
+        """
+        Hand the frame behind the latest detections to the hard-negative sampler after an alert.
+        """
+        if self.hard_negative_sampler is None:
+            return False
+        with self.lock:
+            frame, detections = self.latest_raw_frame, self.latest_detections
+        return self.hard_negative_sampler.offer(self.camera_name, frame, detections, reason=reason)
+
+    def detection_frame(self, seq):
+        """
+        :return: The unannotated frame the detections of seq were made on, None if a newer frame has replaced it.
+        """
+        with self.lock:
+            return self.latest_raw_frame if self.detection_seq == seq else None
+
+    def get_detections(self, last_seq=None):
+        """
+        Get the detections for the most recently rendered frame.
+        :param last_seq: Sequence number already consumed by the caller.
+        :return: (seq, detections) where detections is None if nothing new is available.
+        """
+        with self.lock:
+            if self.detection_seq == last_seq:
+                return self.detection_seq, None
+            return self.detection_seq, self.latest_detections
+
     def stop_stream(self):
         """
         Stop the video stream.
         """
-        self.running = False
+        with self.new_frame:
+            self.running = False
+            self.new_frame.notify_all()
+        if self.supervisor is not None:
+            self.supervisor.stop()
+        if self.recorder is not None:
+            self.recorder.stop_continuous()
+        if self.archive is not None:
+            self.archive.flush()
         if self.capture_thread is not None:
             self.capture_thread.join()
-        if self.capture is not None:
-            self.capture.release()
+        if self.process_thread is not None:
+            self.process_thread.join()
         self.current_frame = None
         self.camera_manager.disconnect()
+        self.capture = None
         if self.display_window:
             cv2.destroyAllWindows()
 
     def get_latest_frame(self):
         """
         Get the latest frame from the video stream.
-        :return: The latest frame with object detection.
+        :return: The latest captured frame, without overlays, or None before the first one.
         """
-        with self.lock:
-            return self.frame
+        with self.new_frame:
+            return self.current_frame
 
     def get_latest_frame_with_detections(self):
         """Get the latest frame and its detections"""
@@ -103,44 +402,67 @@ class VideoStreamHandler:
         frame = self.current_frame.copy()
         
         if self.ml_enabled and self.model is not None:
-            # Perform YOLO detection
-            results = self.model(frame)
-            detections = []
-            
-            # Process YOLO results
-            for *xyxy, conf, cls in results.xyxy[0]:
-                x1, y1, x2, y2 = map(int, xyxy)
-                class_name = self.model.names[int(cls)]
-                confidence = float(conf)
-                
-                # Add detection to list
-                detections.append({
-                    'class_name': class_name,
-                    'confidence': confidence,
-                    'bbox': [x1, y1, x2, y2]
-                })
-                
-                # Draw bounding box on frame
-                color = (0, 255, 0)  # Green box
-                cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                label = f'{class_name} {confidence:.2f}'
-                cv2.putText(frame, label, (x1, y1 - 10), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-            
+            detections, _ = self._detect(frame, self.rate_controller.input_size)
+            overlay_renderer.draw(frame, detections, names=self.model.names)
             return frame, detections
         
         return frame, None
 
+    def _detect(self, frame, size=640):
+        """
+        Run YOLO on the frame, or reuse the previous detections if the scene has not changed.
+        :param frame: BGR frame.
+        :param size: Model input size; smaller is faster but misses small objects.
+        :return: (detections, cached), cached being True if the model did not run.
+        """
+        # Also called from get_latest_frame_with_detections; the model's input buffers are not shared safely
+        with self.detect_lock:
+            if self.detection_cache is None:
+                return self._run_model(frame, size), False
+            signature = self.detection_cache.signature(frame)
+            # Cached results are only valid for the classes and thresholds they were produced with
+            key = (size, self.profile.version)
+            detections = self.detection_cache.lookup(signature, key=key)
+            if detections is not None:
+                self.metrics.increment('detect_cache_hits')
+                return detections, True
+            self.metrics.increment('detect_cache_misses')
+            detections = self._run_model(frame, size)
+            self.detection_cache.store(signature, detections, key=key)
+            return detections, False
+
+    def _track(self, detections, frame_shape, frame_time):
+        """
+        Add the track ID and restricted area to each detection, and archive them.
+        :return: New DetectionBatch with track IDs and zones set.
+        """
+        detections = DetectionBatch.coerce(detections, self.model.names).copy()  # Cached results stay untouched
+        detections.set_track_ids(self.tracker.assign_ids(detections))
+        detections.set_zones(areas_for_boxes(detections.boxes, frame_shape, self.profile.zones))
+        if self.archive is not None:
+            # Wall-clock time at which the frame was captured
+            self.archive.append(self.camera_name, time.time() - (time.monotonic() - frame_time), detections)
+        return detections
+
+    def _run_model(self, frame, size):
+        profile = self.profile
+        # Classes the camera does not need are dropped inside the detector, before NMS
+        class_filter = self.model.class_filter(profile.classes, profile.class_thresholds,
+                                               profile.confidence_threshold)
+        if self.tiling is not None:
+            shape = frame.shape[:2]
+            if self.tile_windows is None or self.tile_windows[0] != shape:
+                self.tile_windows = (shape, tile_windows(shape, self.tiling["grid"],
+                                                         tiling_config["overlap"], self.tiling.get("zones")))
+            return self.model.detect_tiled(frame, self.tile_windows[1], size,
+                                           tiling_config["include_full_frame"], preprocessor=self.preprocessor,
+                                           iou_threshold=profile.iou_threshold, class_filter=class_filter)
+        return self.model.detect_objects(frame, size, preprocessor=self.preprocessor,
+                                         iou_threshold=profile.iou_threshold, class_filter=class_filter)
+
     def _initialize_model(self):
         """
-        Initialize the YOLO model.
-        :return: The initialized YOLO model.
+        Request the camera's YOLO model, starting its background load on first use.
+        :return: The ObjectDetector, or None while it is loading or if loading failed.
         """
-        try:
-            import torch
-            model = torch.hub.load('ultralytics/yolov5', 'yolov5s', pretrained=True)
-            model.conf = model_config.get("confidence_threshold", 0.5)
-            return model
-        except Exception as e:
-            print(f"Error initializing YOLO model: {str(e)}")
-            return None
+        return model_loader.request(self.profile.model_path)
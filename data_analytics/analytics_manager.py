@@ -11,12 +11,14 @@ class AnalyticsManager:
         self.anomaly_count = defaultdict(int)  # Count of anomalies per person
         self.total_duration = defaultdict(int)  # Total duration of loitering per person
 
-    def record_anomaly(self, person_id, timestamp, duration):
-        """Record an anomaly with the person's ID, timestamp, and duration."""
+    def record_anomaly(self, person_id, timestamp, duration=0, anomaly_type="loitering", location=None):
+        """Record an anomaly with the person's ID, timestamp, duration, type and location."""
         self.anomalies.append({
             'person_id': person_id,
             'timestamp': timestamp,
-            'duration': duration
+            'duration': duration,
+            'anomaly_type': anomaly_type,
+            'location': location
         })
         self.anomaly_count[person_id] += 1
         self.total_duration[person_id] += duration
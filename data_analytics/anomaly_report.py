@@ -1,7 +1,6 @@
 # File: data_analytics/anomaly_report.py
 
 import csv
-import matplotlib.pyplot as plt
 
 
 class AnomalyReport:
@@ -11,13 +10,15 @@ class AnomalyReport:
     def export_csv(self, filename):
         """Export recorded anomalies to a CSV file."""
         with open(filename, mode='w', newline='') as file:
-            writer = csv.DictWriter(file, fieldnames=['person_id', 'timestamp', 'duration'])
+            writer = csv.DictWriter(file, fieldnames=['person_id', 'timestamp', 'duration', 'anomaly_type', 'location'])
             writer.writeheader()
             for anomaly in self.analytics_manager.anomalies:
                 writer.writerow(anomaly)
 
     def create_visualizations(self):
         """Create visualizations based on the analyzed data."""
+        import matplotlib.pyplot as plt  # Imported on first use, it is slow to load
+
         analysis_results = self.analytics_manager.analyze_data()
 
         # Plotting total anomalies per person
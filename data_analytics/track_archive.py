@@ -0,0 +1,260 @@
+# File: data_analytics/track_archive.py
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from configs.config import archive_config
+from object_detection.detection_batch import DetectionBatch
+
+# Column name -> (dtype, values per row); one append-only file per column and hour
+COLUMNS = {
+    'time': (np.int64, 1),   # Milliseconds since the epoch
+    'track': (np.int32, 1),
+    'class': (np.uint16, 1),  # Code in the camera's dictionary
+    'zone': (np.uint16, 1),   # Code in the camera's dictionary, 0 when outside every zone
+    'bbox': (np.int16, 4),
+}
+HOUR_MS = 3600 * 1000
+
+
+def _hour_key(hour):
+    """Directory name of an hour number (hours since the epoch, UTC)."""
+    return time.strftime('%Y%m%d-%H', time.gmtime(hour * 3600))
+
+
+def _write_json(path, data):
+    """Replace a JSON file atomically, so readers never see a half-written index."""
+    temporary = path.with_suffix('.tmp')
+    with open(temporary, 'w') as f:
+        json.dump(data, f)
+    os.replace(temporary, path)
+
+
+def _align(hour_dir):
+    """Cut the column files of an hour back to the same row count, after an interrupted append."""
+    sizes = {}
+    for name, (dtype, width) in COLUMNS.items():
+        path = hour_dir / f"{name}.bin"
+        sizes[name] = (path, np.dtype(dtype).itemsize * width, path.stat().st_size if path.exists() else 0)
+    rows = min(size // row_bytes for _, row_bytes, size in sizes.values())
+    for path, row_bytes, size in sizes.values():
+        if size != rows * row_bytes:
+            with open(path, 'r+b') as f:
+                f.truncate(rows * row_bytes)
+
+
+class _CameraLog:
+    def __init__(self, directory):
+        """Column files, dictionary and index of one camera."""
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.dictionary = self._load('dictionary.json', {'class': [], 'zone': [None]})
+        self.index = self._load('index.json', {})  # hour key -> {"class|zone": minute bitmask}
+        self.rows = []  # (n, 8) int64 blocks: time, track, class, zone, x1, y1, x2, y2
+        self.last_flush = time.monotonic()
+
+    def _load(self, name, default):
+        path = self.directory / name
+        if path.exists():
+            with open(path) as f:
+                return json.load(f)
+        return default
+
+    def code(self, kind, value):
+        values = self.dictionary[kind]
+        if value not in values:
+            values.append(value)
+        return values.index(value)
+
+    def flush(self):
+        if not self.rows:
+            return
+        rows = np.concatenate(self.rows)
+        self.rows = []
+        _write_json(self.directory / 'dictionary.json', self.dictionary)
+
+        hours = rows[:, 0] // HOUR_MS
+        for hour in np.unique(hours):
+            block = rows[hours == hour]
+            key = _hour_key(int(hour))
+            hour_dir = self.directory / key
+            hour_dir.mkdir(exist_ok=True)
+            _align(hour_dir)
+            columns = {'time': block[:, 0], 'track': block[:, 1], 'class': block[:, 2],
+                       'zone': block[:, 3], 'bbox': block[:, 4:8]}
+            for name, (dtype, _) in COLUMNS.items():
+                with open(hour_dir / f"{name}.bin", 'ab') as f:
+                    f.write(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+
+            # Minutes in which each class/zone combination was seen
+            entry = self.index.setdefault(key, {})
+            minutes = (block[:, 0] % HOUR_MS) // 60000
+            for class_code, zone_code in set(zip(block[:, 2].tolist(), block[:, 3].tolist())):
+                combination = f"{self.dictionary['class'][class_code]}|{self.dictionary['zone'][zone_code] or ''}"
+                selected = minutes[(block[:, 2] == class_code) & (block[:, 3] == zone_code)]
+                mask = entry.get(combination, 0)
+                for minute in np.unique(selected).tolist():
+                    mask |= 1 << minute
+                entry[combination] = mask
+        _write_json(self.directory / 'index.json', self.index)
+        self.last_flush = time.monotonic()
+
+
+class TrackArchive:
+    def __init__(self, root=None):
+        """
+        Append-only archive of per-frame track metadata, for searching footage without re-running the model.
+        Every camera and hour (UTC) has a directory of column files (time, track, class, zone, bbox)
+        that rows are only ever appended to. Class and zone names are stored as codes, and a per-camera
+        index records for every hour in which minutes each class/zone combination was seen, so queries
+        only read the hours that can match.
+        :param root: Archive directory, defaults to archive_config["root"].
+        """
+        self.root = Path(root or archive_config["root"])
+        self.flush_interval = archive_config["flush_interval"]
+        self.cameras = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def camera_tag(camera_name):
+        return str(camera_name or 'camera').replace(' ', '_')
+
+    def _camera(self, camera_name):
+        tag = self.camera_tag(camera_name)
+        log = self.cameras.get(tag)
+        if log is None:
+            log = self.cameras[tag] = _CameraLog(self.root / tag)
+        return log
+
+    def append(self, camera_name, timestamp, detections):
+        """
+        Add the tracked detections of one frame. Rows are written in batches every flush_interval seconds.
+        :param camera_name: Camera the frame came from.
+        :param timestamp: Wall-clock time of the frame, in seconds since the epoch.
+        :param detections: DetectionBatch with track IDs and zones, or detections with
+                           'track_id', 'class_name', 'bbox' and optionally 'zone'.
+        """
+        detections = DetectionBatch.coerce(detections)
+        block = np.empty((len(detections), 8), dtype=np.int64)
+        block[:, 0] = int(timestamp * 1000)
+        block[:, 1] = -1 if detections.track_ids is None else detections.track_ids
+        block[:, 4:] = detections.boxes
+        with self.lock:
+            log = self._camera(camera_name)
+            for class_id in np.unique(detections.class_ids).tolist():
+                block[detections.class_ids == class_id, 2] = log.code('class', detections.class_name(class_id))
+            block[:, 3] = 0
+            if detections.zones is not None:
+                for zone in set(detections.zones.tolist()) - {None}:
+                    block[detections.zones == zone, 3] = log.code('zone', zone)
+            if len(block):
+                log.rows.append(block)
+            if time.monotonic() - log.last_flush >= self.flush_interval:
+                self._flush(log)
+
+    def flush(self):
+        """Write all buffered rows."""
+        with self.lock:
+            for log in self.cameras.values():
+                self._flush(log)
+
+    def _flush(self, log):
+        try:
+            log.flush()
+        except Exception as e:
+            print(f"Error writing track archive {log.directory}: {e}")
+
+    def _read_hour(self, hour_dir):
+        """Load the columns of one hour; a partially appended last row is ignored."""
+        columns = {}
+        for name, (dtype, width) in COLUMNS.items():
+            path = hour_dir / f"{name}.bin"
+            values = np.fromfile(path, dtype=dtype) if path.exists() else np.empty(0, dtype=dtype)
+            columns[name] = values[:len(values) // width * width].reshape(-1, width) if width > 1 else values
+        rows = min(len(values) for values in columns.values())
+        return {name: values[:rows] for name, values in columns.items()}
+
+    def query(self, start, end, camera_name=None, class_name=None, zone=None, max_gap=None):
+        """
+        Find when objects matching the filters were seen.
+        :param start: Start of the search, in seconds since the epoch.
+        :param end: End of the search, in seconds since the epoch.
+        :param camera_name: Camera, or list of cameras, to search; all cameras by default.
+        :param class_name: Only this class, e.g. 'person'.
+        :param zone: Only detections inside this zone, e.g. 'flag_room'.
+        :param max_gap: Seconds without a match that split two ranges, defaults to archive_config["max_gap"].
+        :return: List of dicts with 'camera', 'start', 'end' (seconds since the epoch) and 'track_ids', in time order.
+        """
+        self.flush()
+        max_gap = archive_config["max_gap"] if max_gap is None else max_gap
+        if camera_name is None:
+            cameras = sorted(p.name for p in self.root.iterdir() if p.is_dir()) if self.root.exists() else []
+        elif isinstance(camera_name, (list, tuple)):
+            cameras = [self.camera_tag(name) for name in camera_name]
+        else:
+            cameras = [self.camera_tag(camera_name)]
+
+        start_ms, end_ms = int(start * 1000), int(end * 1000)
+        ranges = []
+        for tag in cameras:
+            if tag not in self.cameras and not (self.root / tag).is_dir():
+                continue
+            with self.lock:
+                log = self._camera(tag)
+                index = {key: dict(entry) for key, entry in log.index.items()}
+                dictionary = {kind: list(values) for kind, values in log.dictionary.items()}
+            if class_name is not None and class_name not in dictionary['class']:
+                continue
+            if zone is not None and zone not in dictionary['zone']:
+                continue
+
+            times, tracks = [], []
+            for hour in range(start_ms // HOUR_MS, end_ms // HOUR_MS + 1):
+                key = _hour_key(hour)
+                # Use the index to skip hours, and minutes, that cannot match
+                mask = 0
+                for combination, minutes in index.get(key, {}).items():
+                    seen_class, seen_zone = combination.split('|', 1)
+                    if ((class_name is None or seen_class == class_name)
+                            and (zone is None or seen_zone == zone)):
+                        mask |= minutes
+                first = max(0, (start_ms - hour * HOUR_MS) // 60000)
+                last = min(59, (end_ms - hour * HOUR_MS) // 60000)
+                if not mask >> first & ((1 << (last - first + 1)) - 1):
+                    continue
+
+                columns = self._read_hour(log.directory / key)
+                selected = (columns['time'] >= start_ms) & (columns['time'] <= end_ms)
+                if class_name is not None:
+                    selected &= columns['class'] == dictionary['class'].index(class_name)
+                if zone is not None:
+                    selected &= columns['zone'] == dictionary['zone'].index(zone)
+                times.append(columns['time'][selected])
+                tracks.append(columns['track'][selected])
+
+            if not times:
+                continue
+            times, tracks = np.concatenate(times), np.concatenate(tracks)
+            if not len(times):
+                continue
+            order = np.argsort(times, kind='stable')
+            times, tracks = times[order], tracks[order]
+            breaks = np.flatnonzero(np.diff(times) > max_gap * 1000) + 1
+            for run_times, run_tracks in zip(np.split(times, breaks), np.split(tracks, breaks)):
+                ranges.append({
+                    'camera': tag,
+                    'start': int(run_times[0]) / 1000,
+                    'end': int(run_times[-1]) / 1000,
+                    'track_ids': sorted(set(run_tracks.tolist()) - {-1})
+                })
+        ranges.sort(key=lambda found: (found['start'], found['camera']))
+        return ranges
+
+
+# Process-wide archive, shared by all camera handlers
+track_archive = TrackArchive()
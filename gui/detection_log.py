@@ -0,0 +1,190 @@
+# File: gui/detection_log.py
+
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QLineEdit, QListView
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QSortFilterProxyModel, QTimer, Signal
+
+
+class RingBuffer:
+    def __init__(self, capacity):
+        """
+        Fixed-capacity ring buffer; appending to a full buffer overwrites the oldest item.
+        :param capacity: Maximum number of items kept.
+        """
+        self.capacity = capacity
+        self._items = [None] * capacity
+        self._start = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        if not 0 <= index < self._size:
+            raise IndexError("RingBuffer index out of range")
+        return self._items[(self._start + index) % self.capacity]
+
+    def append(self, item):
+        if self._size < self.capacity:
+            self._items[(self._start + self._size) % self.capacity] = item
+            self._size += 1
+        else:
+            self._items[self._start] = item
+            self._start = (self._start + 1) % self.capacity
+
+    def drop_oldest(self, count):
+        """Discard the oldest count items"""
+        count = min(count, self._size)
+        for _ in range(count):
+            self._items[self._start] = None
+            self._start = (self._start + 1) % self.capacity
+        self._size -= count
+
+
+class LogModel(QAbstractListModel):
+    CameraRole = Qt.UserRole + 1
+    ClassesRole = Qt.UserRole + 2
+
+    flushed = Signal()
+
+    def __init__(self, capacity=2000, flush_interval=250):
+        """
+        List model over a bounded ring buffer of log entries.
+        Appends are queued and inserted in one batch every flush_interval ms,
+        so the view refreshes at most a few times per second.
+        :param capacity: Maximum number of entries kept.
+        :param flush_interval: Interval in milliseconds between view updates.
+        """
+        super().__init__()
+        self.entries = RingBuffer(capacity)
+        self.pending = []
+
+        self.flush_timer = QTimer(self)
+        self.flush_timer.timeout.connect(self.flush)
+        self.flush_timer.start(flush_interval)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.entries)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.entries):
+            return None
+        entry = self.entries[index.row()]
+        if role == Qt.DisplayRole:
+            return entry['text']
+        if role == self.CameraRole:
+            return entry['camera']
+        if role == self.ClassesRole:
+            return entry['classes']
+        return None
+
+    def append(self, text, camera=None, classes=()):
+        """Queue an entry; it becomes visible on the next flush"""
+        self.pending.append({'text': text, 'camera': camera, 'classes': frozenset(classes)})
+        if len(self.pending) > self.entries.capacity:
+            del self.pending[:-self.entries.capacity]
+
+    def flush(self):
+        """Insert all queued entries in one batch, dropping the oldest rows when full"""
+        if not self.pending:
+            return
+        new_entries, self.pending = self.pending, []
+
+        overflow = len(self.entries) + len(new_entries) - self.entries.capacity
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            self.entries.drop_oldest(overflow)
+            self.endRemoveRows()
+
+        first = len(self.entries)
+        self.beginInsertRows(QModelIndex(), first, first + len(new_entries) - 1)
+        for entry in new_entries:
+            self.entries.append(entry)
+        self.endInsertRows()
+        self.flushed.emit()
+
+
+class LogFilterProxy(QSortFilterProxyModel):
+    def __init__(self):
+        """Filter log entries by camera and detected class"""
+        super().__init__()
+        self.camera_filter = None
+        self.class_filter = None
+
+    def set_camera_filter(self, camera):
+        self.camera_filter = camera or None
+        self.invalidateFilter()
+
+    def set_class_filter(self, class_name):
+        self.class_filter = class_name.strip().lower() or None
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self.camera_filter is None and self.class_filter is None:
+            return True
+        index = self.sourceModel().index(source_row, 0, source_parent)
+        if self.camera_filter is not None and index.data(LogModel.CameraRole) != self.camera_filter:
+            return False
+        if self.class_filter is not None and self.class_filter not in index.data(LogModel.ClassesRole):
+            return False
+        return True
+
+
+class LogView(QListView):
+    def __init__(self, model):
+        """List view that follows new entries while scrolled to the bottom"""
+        super().__init__()
+        self.setUniformItemSizes(True)  # Lets the view skip measuring every row
+        self.setModel(model)
+        self._follow = True
+        self.verticalScrollBar().valueChanged.connect(self._update_follow)
+
+    def _update_follow(self, value):
+        self._follow = value >= self.verticalScrollBar().maximum()
+
+    def follow_tail(self):
+        if self._follow:
+            self.scrollToBottom()
+
+
+class DetectionLogWidget(QWidget):
+    def __init__(self, camera_names=(), capacity=2000):
+        super().__init__()
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.model = LogModel(capacity=capacity)
+        self.proxy = LogFilterProxy()
+        self.proxy.setSourceModel(self.model)
+
+        # Filters
+        filter_layout = QHBoxLayout()
+        self.camera_filter = QComboBox()
+        self.camera_filter.addItem("All Cameras", None)
+        for camera_name in camera_names:
+            self.camera_filter.addItem(camera_name, camera_name)
+        self.camera_filter.currentIndexChanged.connect(
+            lambda _: self.proxy.set_camera_filter(self.camera_filter.currentData())
+        )
+        filter_layout.addWidget(QLabel("Camera:"))
+        filter_layout.addWidget(self.camera_filter)
+
+        self.class_filter = QLineEdit()
+        self.class_filter.setPlaceholderText("Filter by class (e.g. person)")
+        self.class_filter.textChanged.connect(self.proxy.set_class_filter)
+        filter_layout.addWidget(QLabel("Class:"))
+        filter_layout.addWidget(self.class_filter)
+        layout.addLayout(filter_layout)
+
+        # Log view
+        self.view = LogView(self.proxy)
+        self.view.setStyleSheet("background-color: #2a2a2a; color: white; border: none;")
+        self.model.flushed.connect(self.view.follow_tail)
+        layout.addWidget(self.view)
+
+        self.setLayout(layout)
+
+    def append(self, text, camera=None, classes=()):
+        """Add an entry to the log"""
+        self.model.append(text, camera, classes)
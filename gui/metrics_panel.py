@@ -0,0 +1,81 @@
+# File: gui/metrics_panel.py
+
+import time
+
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QHeaderView
+from PySide6.QtCore import QTimer
+
+from metrics.pipeline_metrics import metrics
+
+COLUMNS = ["Camera", "Link", "Reconnects", "FPS", "Dropped", "Capture p95", "Detect p50", "Detect p95", "Detect rate", "End-to-end p95"]
+
+
+def _format_ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.1f} ms"
+
+
+def _format_rate(gauges):
+    if 'detect_fps' not in gauges:
+        return "-"
+    return f"{gauges['detect_fps']:.1f} fps @ {gauges['input_size']}"
+
+
+class MetricsPanel(QWidget):
+    def __init__(self, refresh_interval=1000):
+        super().__init__()
+        layout = QVBoxLayout()
+
+        layout.addWidget(QLabel("Pipeline Status"))
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setStyleSheet("background-color: #2a2a2a; color: white; border: none;")
+        layout.addWidget(self.table)
+
+        self.setLayout(layout)
+
+        self._last_processed = {}
+        self._last_refresh = time.monotonic()
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(refresh_interval)
+
+    def refresh(self):
+        """Update the table from the metrics registry; only runs while the panel is visible"""
+        now = time.monotonic()
+        elapsed = max(now - self._last_refresh, 1e-6)
+        self._last_refresh = now
+
+        cameras = metrics.cameras()
+        if not self.isVisible():
+            # Keep the fps baseline current without touching the table
+            for camera in cameras:
+                self._last_processed[camera.camera_name] = camera.counters['frames_processed']
+            return
+
+        self.table.setRowCount(len(cameras))
+        for row, camera in enumerate(cameras):
+            processed = camera.counters['frames_processed']
+            fps = (processed - self._last_processed.get(camera.camera_name, processed)) / elapsed
+            self._last_processed[camera.camera_name] = processed
+
+            values = [
+                camera.camera_name,
+                {1: "up", 0: "down"}.get(camera.gauges.get('connected'), "-"),
+                str(camera.counters['reconnects']),
+                f"{fps:.1f}",
+                str(camera.frames_dropped),
+                _format_ms(camera.stages['capture'].quantile(0.95)),
+                _format_ms(camera.stages['detect'].quantile(0.5)),
+                _format_ms(camera.stages['detect'].quantile(0.95)),
+                _format_rate(camera.gauges),
+                _format_ms(camera.stages['end_to_end'].quantile(0.95))
+            ]
+            for column, value in enumerate(values):
+                item = self.table.item(row, column)
+                if item is None:
+                    self.table.setItem(row, column, QTableWidgetItem(value))
+                else:
+                    item.setText(value)
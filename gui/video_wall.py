@@ -0,0 +1,102 @@
+# File: gui/video_wall.py
+
+import math
+
+from PySide6.QtWidgets import QWidget, QGridLayout, QVBoxLayout, QLabel, QSizePolicy
+from PySide6.QtGui import QPixmap, QImage, QPainter
+from PySide6.QtCore import Qt
+
+
+def display_pixmap(image, overlay=None):
+    """
+    Convert a display buffer image to a QPixmap, compositing the BGRA detection layer if there is one.
+    fromImage copies the pixels, so the buffers are free again once this returns.
+    """
+    height, width = image.shape[:2]
+    pixmap = QPixmap.fromImage(QImage(image.data, width, height, image.strides[0], QImage.Format_BGR888))
+    if overlay is not None:
+        painter = QPainter(pixmap)
+        # BGRA bytes are ARGB32 on little-endian machines
+        painter.drawImage(0, 0, QImage(overlay.data, width, height, overlay.strides[0], QImage.Format_ARGB32))
+        painter.end()
+    return pixmap
+
+
+class VideoTile(QWidget):
+    def __init__(self, camera_name):
+        super().__init__()
+        self.camera_name = camera_name
+        self.last_frame_seq = None
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(2, 2, 2, 2)
+        layout.setSpacing(0)
+
+        self.title_label = QLabel(camera_name)
+        self.title_label.setStyleSheet("color: white; font-size: 11px;")
+        layout.addWidget(self.title_label)
+
+        self.video_label = QLabel()
+        self.video_label.setAlignment(Qt.AlignCenter)
+        self.video_label.setMinimumSize(160, 120)
+        # Ignore the pixmap size so painted frames never grow the grid
+        self.video_label.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+        self.video_label.setStyleSheet("background-color: #1e1e1e; border: 1px solid #3a3a3a;")
+        layout.addWidget(self.video_label, 1)
+
+        self.setLayout(layout)
+
+    def paint(self, handler):
+        """Paint the latest rendered frame of the handler, if it changed since the last paint"""
+        handler.set_display_size(self.video_label.width(), self.video_label.height())
+        with handler.display_buffer.latest(self.last_frame_seq) as (seq, image):
+            if image is None:
+                return False
+            self.video_label.setPixmap(display_pixmap(image, handler.display_buffer.front_overlay()))
+        self.last_frame_seq = seq
+        return True
+
+
+class VideoWallWidget(QWidget):
+    def __init__(self):
+        super().__init__()
+        self.grid = QGridLayout()
+        self.grid.setSpacing(4)
+        self.setLayout(self.grid)
+        self.tiles = {}
+        self.handlers = {}
+
+    def set_handlers(self, video_handlers):
+        """Build one tile per camera, laid out on a near-square grid"""
+        for tile in self.tiles.values():
+            self.grid.removeWidget(tile)
+            tile.deleteLater()
+        self.tiles = {}
+        self.handlers = video_handlers
+
+        columns = max(1, math.ceil(math.sqrt(len(video_handlers))))
+        for index, camera_name in enumerate(video_handlers):
+            tile = VideoTile(camera_name)
+            self.grid.addWidget(tile, index // columns, index % columns)
+            self.tiles[camera_name] = tile
+
+    def set_active(self, active):
+        """Switch the handlers between per-tile adaptive rendering and full-rate rendering"""
+        for handler in self.handlers.values():
+            handler.adaptive_display = active
+
+    def mark_alert(self, camera_name):
+        """Bring the camera's tile to the full refresh rate after an alert"""
+        if camera_name in self.handlers:
+            self.handlers[camera_name].mark_activity()
+
+    def refresh(self):
+        """Repaint every tile with a new frame in a single pass"""
+        painted = 0
+        for camera_name, tile in self.tiles.items():
+            handler = self.handlers[camera_name]
+            if not handler.running:
+                continue
+            if tile.paint(handler):
+                painted += 1
+        return painted
@@ -3,28 +3,31 @@
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                                QComboBox, QSpinBox, QDoubleSpinBox, QPushButton, 
                                QListWidget, QFileDialog, QProgressBar, QLineEdit, QCheckBox)
-from PySide6.QtCore import Qt, Signal, QMimeData
+from PySide6.QtCore import Qt, Signal, QMimeData, QTimer
 from PySide6.QtGui import QDragEnterEvent, QDropEvent
-import shutil
 import os
 import time
-from PySide6.QtWidgets import QApplication
 import yaml
 from pathlib import Path
-import torch
-from lib.yolov5 import train as yolo_train
 import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from gui.detection_log import LogModel, LogView
+from training.training_process import TrainingProcess
+from training.dataset_cache import DatasetCache
+from training.hard_negative_miner import accept_reviewed
+from configs.config import training_config
 
 class AlertWidget(QWidget):
     def __init__(self):
         super().__init__()
         layout = QVBoxLayout()
         
-        # Alert list
-        self.alert_list = QListWidget()
+        # Alert list, bounded so it does not grow for the lifetime of the app
+        self.alert_model = LogModel(capacity=1000)
+        self.alert_list = LogView(self.alert_model)
         self.alert_list.setStyleSheet("background-color: #2a2a2a; color: white; border: none;")
+        self.alert_model.flushed.connect(self.alert_list.follow_tail)
         layout.addWidget(self.alert_list)
         
         # Email notification settings
@@ -110,8 +113,7 @@ class AlertWidget(QWidget):
         """Add an alert to the list"""
         timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
         alert_item = f"[{timestamp}] {message}"
-        self.alert_list.addItem(alert_item)
-        self.alert_list.scrollToBottom()
+        self.alert_model.append(alert_item)
         
         # Send email for gun detection, person with phone alerts, or anomalies if enabled
         if self.email_toggle.isChecked() and (
@@ -350,6 +352,15 @@ class TrainingWidget(QWidget):
         layout.addLayout(controls_layout)
         
         self.setLayout(layout)
+
+        # Dropped folders are registered with the dataset cache instead of being copied
+        self.dataset_cache = DatasetCache('training_data')
+        self.update_data_list()
+
+        # Training runs in a separate process; progress is polled from its pipe
+        self.training_process = TrainingProcess()
+        self.poll_timer = QTimer(self)
+        self.poll_timer.timeout.connect(self.poll_training)
         
     def browse_weights(self):
         file_name, _ = QFileDialog.getOpenFileName(
@@ -360,72 +371,81 @@ class TrainingWidget(QWidget):
     
     def prepare_training_config(self):
         """Prepare training configuration from GUI settings"""
-        # Create data configuration
-        data_yaml = {
-            'path': str(Path.cwd() / 'training_data'),
-            'train': 'images/train',
-            'val': 'images/val',
-            'test': 'images/test',
-            'nc': 1,  # number of classes (modify based on your dataset)
-            'names': ['object']  # class names (modify based on your dataset)
+        # Prepare training options, applied to the YOLOv5 defaults in the training process.
+        # The dataset is prepared from the cache there, so data.yaml is generated on the fly.
+        options = {
+            'weights': self.weights_input.text() or 'yolov5s.pt',
+            'dataset': {'root': str(self.dataset_cache.root), 'img_size': self.img_size_spin.value()},
+            'epochs': self.epochs_spin.value(),
+            'batch_size': self.batch_size_spin.value(),
+            'imgsz': self.img_size_spin.value(),
+            'rect': self.rect_check.isChecked(),
+            'multi_scale': self.multi_scale_check.isChecked(),
+            'sync_bn': self.sync_bn_check.isChecked()
         }
         
-        # Save data configuration
-        data_path = Path.cwd() / 'training_data' / 'data.yaml'
-        with open(data_path, 'w') as f:
-            yaml.dump(data_yaml, f)
-        
-        # Prepare training options
-        opt = yolo_train.parse_opt(True)
-        opt.weights = self.weights_input.text() or 'yolov5s.pt'
-        opt.data = str(data_path)
-        opt.epochs = self.epochs_spin.value()
-        opt.batch_size = self.batch_size_spin.value()
-        opt.imgsz = self.img_size_spin.value()
-        opt.rect = self.rect_check.isChecked()
-        opt.multi_scale = self.multi_scale_check.isChecked()
-        opt.sync_bn = self.sync_bn_check.isChecked()
-        
         # Handle cache setting
         cache_setting = self.cache_combo.currentText().lower()
-        opt.cache = cache_setting if cache_setting != "no cache" else None
+        options['cache'] = cache_setting if cache_setting != "no cache" else None
         
         # Handle device setting
-        opt.device = self.device_input.text() or ''
+        options['device'] = self.device_input.text() or ''
         
-        return opt
+        return options
     
     def start_training(self):
-        """Start the training process"""
-        if not Path('training_data').exists():
+        """Start the training process, or cancel it if it is already running"""
+        if self.training_process.is_running():
+            self.cancel_training()
+            return
+
+        # Mined frames are only used once a reviewer has labelled them
+        accepted = accept_reviewed(cache=self.dataset_cache)
+        if accepted:
+            self.training_started.emit(f"Added {accepted} reviewed samples to the training data")
+        if not self.dataset_cache.sources():
             self.training_started.emit("No training data available!")
             return
         
         try:
-            opt = self.prepare_training_config()
-            self.training_started.emit(f"Starting training with {opt.weights}")
-            self.train_button.setEnabled(False)
-            
-            # Create a custom callback to update progress
-            class ProgressCallback:
-                def __init__(self, widget):
-                    self.widget = widget
-                
-                def on_train_epoch_end(self, epoch, epochs):
-                    progress = int((epoch + 1) / epochs * 100)
-                    self.widget.progress_bar.setValue(progress)
-                    QApplication.processEvents()
-            
-            # Start training
-            callbacks = ProgressCallback(self)
-            results = yolo_train.train(opt.hyp, opt, torch.device(opt.device), callbacks)
-            
-            self.training_started.emit("Training completed!")
-            
+            options = self.prepare_training_config()
+            self.training_process.start(options)
+            self.training_started.emit(f"Starting training with {options['weights']}")
+            self.progress_bar.setValue(0)
+            self.train_button.setText("Cancel Training")
+            self.poll_timer.start(training_config["poll_interval"])
         except Exception as e:
             self.training_started.emit(f"Training error: {str(e)}")
-        finally:
-            self.train_button.setEnabled(True)
+
+    def cancel_training(self):
+        """Cancel training; a second request terminates the process immediately"""
+        force = self.training_process.cancel_event.is_set()
+        self.training_process.cancel(force=force)
+        self.train_button.setText("Force Stop")
+        self.training_started.emit("Cancelling training...")
+
+    def poll_training(self):
+        """Apply progress streamed back from the training process"""
+        for kind, payload in self.training_process.poll():
+            if kind == 'dataset':
+                self.training_started.emit(
+                    f"Dataset ready: {payload['added']} new, {payload['unchanged']} cached, "
+                    f"{payload['duplicates']} duplicates skipped"
+                )
+            elif kind in ('epoch', 'metrics'):
+                progress = int((payload['epoch'] + 1) / payload['epochs'] * 100)
+                self.progress_bar.setValue(progress)
+                self.training_progress.emit(progress, payload.get('metrics', {}))
+            elif kind == 'done':
+                self.training_started.emit("Training completed!")
+            elif kind == 'cancelled':
+                self.training_started.emit("Training cancelled")
+            elif kind == 'error':
+                self.training_started.emit(f"Training error: {payload['message']}")
+
+        if self.training_process.finished:
+            self.poll_timer.stop()
+            self.train_button.setText("Start Training")
     
     def dragEnterEvent(self, event: QDragEnterEvent):
         if event.mimeData().hasUrls():
@@ -435,20 +455,17 @@ class TrainingWidget(QWidget):
         for url in event.mimeData().urls():
             file_path = url.toLocalFile()
             if os.path.isdir(file_path):
-                self.copy_training_data(file_path)
+                self.add_training_data(file_path)
     
-    def copy_training_data(self, source_dir):
-        target_dir = os.path.join(os.getcwd(), "training_data")
-        os.makedirs(target_dir, exist_ok=True)
-        
+    def add_training_data(self, source_dir):
+        """Register a dropped folder; its images are cached incrementally when training starts"""
         try:
-            shutil.copytree(source_dir, os.path.join(target_dir, os.path.basename(source_dir)))
+            self.dataset_cache.add_source(source_dir)
             self.update_data_list()
         except Exception as e:
-            print(f"Error copying training data: {e}")
+            print(f"Error adding training data: {e}")
     
     def update_data_list(self):
         self.data_list.clear()
-        target_dir = os.path.join(os.getcwd(), "training_data")
-        for item in os.listdir(target_dir):
-            self.data_list.addItem(item)
+        for source in self.dataset_cache.sources():
+            self.data_list.addItem(source)
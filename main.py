@@ -2,17 +2,30 @@
 
 import sys
 import time
-from PySide6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QCheckBox, QTextEdit, QStatusBar, QPushButton, QTabWidget
-from PySide6.QtGui import QPixmap, QImage
+
+# Installed before the other imports so --profile-startup can time them
+from metrics.startup_profiler import startup_profiler
+if "--profile-startup" in sys.argv:
+    startup_profiler.install()
+
+from PySide6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QCheckBox, QStatusBar, QPushButton, QTabWidget, QStackedWidget
 from PySide6.QtCore import Qt, QTimer, Signal
-import cv2
-import numpy as np
-from configs.config import camera_config, model_config
+from configs.camera_profiles import camera_profiles
 from gui.widgets import AlertWidget, SettingsWidget, TrainingWidget
+from gui.video_wall import VideoWallWidget, display_pixmap
+from gui.detection_log import DetectionLogWidget
+from gui.metrics_panel import MetricsPanel
+from metrics.metrics_server import MetricsServer
 from data_acquisition.video_stream import VideoStreamHandler
 from data_analytics.analytics_manager import AnalyticsManager
 from data_analytics.anomaly_report import AnomalyReport
 from anomaly_detection.anomaly_detector import LoiteringDetector, ObjectInteractionDetector  # Import the detectors
+from training.hard_negative_miner import HardNegativeSampler
+from object_detection.model_loader import model_loader
+from notifications.alert_engine import alert_engine
+from notifications.dispatcher import notification_dispatcher
+from notifications.snapshot_store import snapshot_store
+from configs.config import hard_negative_config, metrics_config
 
 class CCTVMonitorApp(QMainWindow):
     alert_signal = Signal(str)
@@ -34,14 +47,22 @@ class CCTVMonitorApp(QMainWindow):
         self.video_label.setFixedSize(640, 480)  # Set fixed size for video display
         self.video_label.setAlignment(Qt.AlignCenter)
         self.video_label.setStyleSheet("background-color: #1e1e1e; border: 2px solid #3a3a3a;")
-        left_panel.addWidget(self.video_label)
+
+        # Video wall showing all cameras at once
+        self.video_wall = VideoWallWidget()
+
+        self.video_stack = QStackedWidget()
+        self.video_stack.addWidget(self.video_label)
+        self.video_stack.addWidget(self.video_wall)
+        left_panel.addWidget(self.video_stack)
 
         # Controls layout
         controls_layout = QHBoxLayout()
 
         # Camera selection
         self.camera_combo = QComboBox()
-        self.camera_combo.addItems(["Camera 1", "Camera 2", "Camera 3"])
+        # Cameras come from the camera settings file; without one there is a single default webcam
+        self.camera_combo.addItems(camera_profiles.names() or ["Camera 1"])
         self.camera_combo.setStyleSheet("background-color: #2a2a2a; color: white; padding: 5px;")
         controls_layout.addWidget(QLabel("Select Camera:"))
         controls_layout.addWidget(self.camera_combo)
@@ -51,6 +72,12 @@ class CCTVMonitorApp(QMainWindow):
         self.ml_toggle.setStyleSheet("color: white;")
         controls_layout.addWidget(self.ml_toggle)
 
+        # Video wall toggle
+        self.wall_toggle = QCheckBox("Video Wall")
+        self.wall_toggle.setStyleSheet("color: white;")
+        self.wall_toggle.stateChanged.connect(self.toggle_video_wall)
+        controls_layout.addWidget(self.wall_toggle)
+
         # Record button
         self.record_button = QPushButton("Start Recording")
         self.record_button.setStyleSheet("background-color: #2a2a2a; color: white; padding: 5px;")
@@ -82,10 +109,9 @@ class CCTVMonitorApp(QMainWindow):
         # Detection results tab
         results_widget = QWidget()
         results_layout = QVBoxLayout()
-        self.results_text = QTextEdit()
-        self.results_text.setReadOnly(True)
-        self.results_text.setStyleSheet("background-color: #2a2a2a; color: white; border: none;")
-        results_layout.addWidget(self.results_text)
+        camera_names = [self.camera_combo.itemText(i) for i in range(self.camera_combo.count())]
+        self.detection_log = DetectionLogWidget(camera_names)
+        results_layout.addWidget(self.detection_log)
         results_widget.setLayout(results_layout)
         right_panel.addTab(results_widget, "Detection Results")
 
@@ -98,9 +124,14 @@ class CCTVMonitorApp(QMainWindow):
         right_panel.addTab(self.settings_widget, "Settings")
 
         # Training tab
-        self.training_widget = TrainingWidget()
+        with startup_profiler.stage("training widget"):
+            self.training_widget = TrainingWidget()
         right_panel.addTab(self.training_widget, "Training")
 
+        # Pipeline status tab
+        self.metrics_panel = MetricsPanel()
+        right_panel.addTab(self.metrics_panel, "Status")
+
         main_layout.addWidget(right_panel, 1)
 
         # Set main layout
@@ -135,10 +166,14 @@ class CCTVMonitorApp(QMainWindow):
         # Timer for updating video feed
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.update_video_feed)
-        self.timer.start(30)  # Update every 30 ms
+        self.timer.start(30)  # Update every 30 ms, adjusted to the camera fps settings once streams start
+
+        # Local /metrics endpoint for scraping
+        self.metrics_server = MetricsServer()
+        if metrics_config["enabled"]:
+            self.metrics_server.start()
 
         # Initialize backend components
-        self.video_handler = VideoStreamHandler(display_window=False)  # Set display_window to False since we'll show in GUI
         self.analytics_manager = AnalyticsManager()
         self.anomaly_report = AnomalyReport(self.analytics_manager)
         
@@ -153,46 +188,47 @@ class CCTVMonitorApp(QMainWindow):
         self.is_recording = False
         self.ml_enabled = False
 
-        # Initialize camera settings dictionary
-        self.camera_settings = {
-            "Camera 1": {
-                "resolution": "640x480",
-                "fps": 30,
-                "model": "YOLOv5",
-                "confidence": 0.5,
-                "source_type": "Webcam (0)",
-                "source_input": "0"
-            },
-            "Camera 2": {
-                "resolution": "640x480",
-                "fps": 30,
+        # Initialize camera settings dictionary from the camera profiles
+        self.camera_settings = {}
+        for camera in camera_names:
+            profile = camera_profiles.get(camera)
+            source = str(profile.camera_source)
+            self.camera_settings[camera] = {
+                "resolution": f"{profile.width}x{profile.height}",
+                "fps": profile.fps,
                 "model": "YOLOv5",
-                "confidence": 0.5,
-                "source_type": "Webcam (1)",
-                "source_input": "1"
-            },
-            "Camera 3": {
-                "resolution": "640x480",
-                "fps": 30,
-                "model": "YOLOv5",
-                "confidence": 0.5,
-                "source_type": "Webcam (2)",
-                "source_input": "2"
+                "confidence": profile.confidence_threshold,
+                "source_type": f"Webcam ({source})" if profile.camera_type == "USB" else "RTSP/RTMP/HTTP Stream",
+                "source_input": source
             }
-        }
+
+        # Edits of the file apply to running streams at their next frame
+        camera_profiles.watch()
 
         # Initialize video handlers for each camera but don't start streams
+        # Uncertain and alert-triggering frames are staged as training data
+        with startup_profiler.stage("hard-negative sampler"):
+            self.hard_negative_sampler = HardNegativeSampler() if hard_negative_config["enabled"] else None
+
         self.video_handlers = {}
         self.recording_status = {}
-        for camera in self.camera_settings.keys():
-            self.video_handlers[camera] = VideoStreamHandler(display_window=False)
-            self.recording_status[camera] = False
+        self.last_detection_seq = {}
+        self.wall_streams = set()  # Cameras whose streams were started only for the video wall
+        with startup_profiler.stage("video handlers"):
+            for camera in self.camera_settings.keys():
+                self.video_handlers[camera] = VideoStreamHandler(
+                    display_window=False, camera_name=camera, hard_negative_sampler=self.hard_negative_sampler
+                )
+                self.recording_status[camera] = False
+                self.last_detection_seq[camera] = None
+        self.video_wall.set_handlers(self.video_handlers)
 
         # Connect camera selection change event
         self.camera_combo.currentTextChanged.connect(self.on_camera_changed)
         
         # Load initial camera settings
-        self.current_camera = "Camera 1"
+        self.current_camera = camera_names[0]
+        self.last_frame_seq = None  # Sequence number of the frame currently displayed
         self.load_camera_settings(self.current_camera)
         
         # Initialize ML detection state
@@ -205,27 +241,27 @@ class CCTVMonitorApp(QMainWindow):
     def load_camera_settings(self, camera_name):
         """Load settings for the selected camera into the settings widget"""
         settings = self.camera_settings[camera_name]
-        self.settings_widget.resolution_combo.setCurrentText(settings["resolution"])
-        self.settings_widget.fps_spinbox.setValue(settings["fps"])
+        profile = camera_profiles.get(camera_name)
+        self.settings_widget.resolution_combo.setCurrentText(f"{profile.width}x{profile.height}")
+        self.settings_widget.fps_spinbox.setValue(profile.fps)
         self.settings_widget.model_combo.setCurrentText(settings["model"])
-        self.settings_widget.confidence_spinbox.setValue(settings["confidence"])
-        self.settings_widget.source_combo.setCurrentText(settings["source_type"])
-        self.settings_widget.source_input.setText(settings["source_input"])
+        self.settings_widget.confidence_spinbox.setValue(profile.confidence_threshold)
+        self.settings_widget.source_combo.setCurrentText(
+            settings["source_type"] if profile.camera_type == "USB" else "RTSP/RTMP/HTTP Stream")
+        self.settings_widget.source_input.setText(str(profile.camera_source))
 
     def on_camera_changed(self, camera_name):
         """Handle camera selection change"""
-        # Stop the current camera stream if it's running
-        if self.video_handlers[self.current_camera].running:
-            self.video_handlers[self.current_camera].stop_stream()
-
+        # Other streams keep running so detection continues on every camera
         # Update current camera
         self.current_camera = camera_name
+        self.last_frame_seq = None
         
         # Load settings for the selected camera
         self.load_camera_settings(camera_name)
         
         # Only start the stream if this camera was recording
-        if self.recording_status[camera_name]:
+        if self.recording_status[camera_name] and not self.video_handlers[camera_name].running:
             self.start_camera_stream(camera_name)
         
         # Update recording button state
@@ -233,22 +269,22 @@ class CCTVMonitorApp(QMainWindow):
 
     def start_camera_stream(self, camera_name):
         """Start video stream for the specified camera"""
-        settings = self.camera_settings[camera_name]
-        
-        # Configure camera settings
-        if settings["source_type"] == "Webcam (0)":
-            camera_config["camera_type"] = "USB"
-            camera_config["camera_source"] = int(settings["source_input"])
-        elif settings["source_type"] in ["RTSP/RTMP/HTTP Stream"]:
-            camera_config["camera_type"] = "IP"
-            camera_config["camera_source"] = settings["source_input"]
-        
-        # Start the stream
+        # The handler reads source, resolution and frame rate from the camera's profile
         self.video_handlers[camera_name].start_stream()
+        if self.recording_status[camera_name]:
+            # Write the stream to disk in fixed-length segments
+            self.video_handlers[camera_name].start_recording()
+        self.update_feed_interval()
         
         # Set ML detection state
         self.video_handlers[camera_name].ml_enabled = self.ml_enabled
 
+    def update_feed_interval(self):
+        """Poll the streams no faster than the highest fps setting among running cameras"""
+        fps = [camera_profiles.get(camera).fps
+               for camera, handler in self.video_handlers.items() if handler.running]
+        self.timer.setInterval(max(15, int(1000 / max(fps or [30]))))
+
     def apply_settings(self):
         """Apply settings to the current camera"""
         # Get settings values
@@ -262,12 +298,21 @@ class CCTVMonitorApp(QMainWindow):
         }
         
         # Update settings for current camera
+        width, height = map(int, settings["resolution"].split("x"))
+        changes = {"width": width, "height": height, "fps": settings["fps"],
+                   "confidence_threshold": settings["confidence"]}
+        if settings["source_type"].startswith("Webcam"):
+            changes.update(camera_type="USB", camera_source=settings["source_input"])
+        elif settings["source_type"] == "RTSP/RTMP/HTTP Stream":
+            changes.update(camera_type="IP", camera_source=settings["source_input"])
+        try:
+            # Saved to the settings file; a running stream picks the change up at its next frame
+            camera_profiles.update(self.current_camera, **changes)
+        except ValueError as e:
+            self.statusBar.showMessage(f"Invalid settings: {e}", 5000)
+            return
         self.camera_settings[self.current_camera] = settings
-        
-        # Restart the camera stream with new settings only if it's currently recording
-        if self.video_handlers[self.current_camera].running:
-            self.video_handlers[self.current_camera].stop_stream()
-            self.start_camera_stream(self.current_camera)
+        self.update_feed_interval()
         
         self.alert_signal.emit(f"Applied settings to {self.current_camera}")
         self.statusBar.showMessage("Settings applied", 3000)
@@ -284,7 +329,9 @@ class CCTVMonitorApp(QMainWindow):
             self.alert_signal.emit(f"Started recording on {self.current_camera}")
         else:
             # Stop the camera stream when recording stops
+            self.video_handlers[self.current_camera].stop_recording()
             self.video_handlers[self.current_camera].stop_stream()
+            self.update_feed_interval()
             self.record_button.setText("Start Recording")
             self.alert_signal.emit(f"Stopped recording on {self.current_camera}")
         
@@ -298,70 +345,83 @@ class CCTVMonitorApp(QMainWindow):
             self.record_button.setText("Start Recording")
 
     def update_video_feed(self):
-        """Update the video feed display"""
-        if not self.video_handlers[self.current_camera].running:
-            return
+        """Repaint the visible video and process new detections of every running camera"""
+        try:
+            if self.video_stack.currentWidget() is self.video_wall:
+                # All tiles are repainted in one pass from this single timer
+                self.video_wall.refresh()
+            else:
+                self.paint_current_camera()
+
+            for camera_name, handler in self.video_handlers.items():
+                if handler.running:
+                    self.process_camera_detections(camera_name, handler)
+
+            state = self.video_handlers[self.current_camera].connection_state
+            if self.recording_status[self.current_camera] and state in ("connecting", "reconnecting"):
+                self.statusBar.showMessage(f"{self.current_camera}: {state}...")
+            elif self.recording_status[self.current_camera]:
+                self.statusBar.showMessage(f"Recording {self.current_camera}...")
+            else:
+                self.statusBar.showMessage("System Ready")
+            
+        except Exception as e:
+            self.statusBar.showMessage(f"Error updating video feed: {str(e)}")
 
-        frame, detections = self.video_handlers[self.current_camera].get_latest_frame_with_detections()
-        if frame is None:
+    def paint_current_camera(self):
+        """Paint the latest frame of the selected camera into the single video view"""
+        handler = self.video_handlers[self.current_camera]
+        if not handler.running:
             return
 
-        # Check if detections is None or empty
+        handler.set_display_size(self.video_label.width(), self.video_label.height())
+
+        # Paint the image rendered by the stream worker, skipping frames already shown
+        with handler.display_buffer.latest(self.last_frame_seq) as (seq, image):
+            if image is None:
+                return
+            self.video_label.setPixmap(display_pixmap(image, handler.display_buffer.front_overlay()))
+        if self.last_frame_seq is None and startup_profiler.enabled and not startup_profiler.marks:
+            print(f"First frame shown at {startup_profiler.mark('first frame'):.2f} s")
+        self.last_frame_seq = seq
+
+    def process_camera_detections(self, camera_name, handler):
+        """Feed new detections of a camera to the anomaly detectors"""
+        seq, detections = handler.get_detections(self.last_detection_seq[camera_name])
         if detections is None:
-            detections = []  # Initialize as an empty list if None
+            return
+        self.last_detection_seq[camera_name] = seq
 
-        # Process detections with the detectors
+        # Process detections with the detectors, using this camera's restricted areas
+        self.loitering_detector.areas = handler.profile.zones
+        person_ids = []
         for detection in detections:
             class_name = detection['class_name']
-            bbox = detection['bbox']  # [x1, y1, x2, y2]
-            person_id = detection.get('person_id')  # Assuming person_id is part of the detection data
+            person_id = f"track_{detection.get('track_id')}"
 
             # Update loitering detector
             if class_name == 'person':
-                area_name = self.get_area_name_from_bbox(bbox)  # Implement this method to get area name
-                self.loitering_detector.update(person_id, area_name)
-
-            # Update object interaction detector
-            if class_name in ['person', 'cell phone']:
-                self.object_interaction_detector.update(detections, frame_id=self.current_camera)
-
-        try:
-            # Convert frame back to BGR format if it was normalized
-            if frame.dtype == np.float64 or frame.dtype == np.float32:
-                frame = (frame * 255).astype(np.uint8)
-            
-            # Convert BGR to RGB format
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            
-            # Resize frame to match video label size
-            display_size = (self.video_label.width(), self.video_label.height())
-            resized_frame = cv2.resize(rgb_frame, display_size)
-            
-            # Create QImage from the frame
-            height, width = resized_frame.shape[:2]
-            bytes_per_line = 3 * width
-            qt_image = QImage(resized_frame.data, width, height, bytes_per_line, QImage.Format_RGB888)
-            
-            # Convert to pixmap and display
-            pixmap = QPixmap.fromImage(qt_image)
-            self.video_label.setPixmap(pixmap)
-            
-            # Update detection results if ML is enabled
-            if self.ml_enabled and detections:
-                self.update_detection_results(detections)
-            
-            if self.recording_status[self.current_camera]:
-                self.statusBar.showMessage(f"Recording {self.current_camera}...")
-            else:
-                self.statusBar.showMessage("System Ready")
-            
-        except Exception as e:
-            self.statusBar.showMessage(f"Error updating video feed: {str(e)}")
-
-    def update_detection_results(self, detections):
+                person_ids.append(person_id)
+                area_name = detection.get('zone')  # Restricted area the box centre is in, if any
+                if self.loitering_detector.update(person_id, area_name, camera=camera_name):
+                    handler.record_event("loitering")
+        # People no longer tracked by this camera stop loitering
+        self.loitering_detector.end_frame(camera_name, person_ids)
+
+        # Update object interaction detector, once per frame
+        if self.object_interaction_detector.update(detections, frame_id=camera_name,
+                                                   frame=handler.detection_frame(seq)):
+            handler.sample_alert_frame("interaction")
+            handler.record_event("interaction")
+
+        # Update detection results if ML is enabled
+        if self.ml_enabled and detections:
+            self.update_detection_results(detections, camera_name)
+
+    def update_detection_results(self, detections, camera_name):
         """Update the detection results text area with YOLO detections"""
         timestamp = time.strftime("%H:%M:%S")
-        result_text = f"\n[{timestamp}] Detections:\n"
+        result_text = f"[{timestamp}] {camera_name}:"
         
         # Group detections by class
         detection_counts = {}
@@ -380,21 +440,20 @@ class CCTVMonitorApp(QMainWindow):
             detection_counts[class_name]['confidences'].append(confidence)
         
         # Format detection results
+        summaries = []
         for class_name, data in detection_counts.items():
             count = data['count']
             avg_confidence = sum(data['confidences']) / len(data['confidences'])
-            result_text += f"  • {class_name}: {count} detected (avg conf: {avg_confidence:.2f})\n"
+            summaries.append(f"{class_name}: {count} detected (avg conf: {avg_confidence:.2f})")
+        result_text += " " + ", ".join(summaries)
         
-        # Add to results text with auto-scroll
-        self.results_text.append(result_text)
-        self.results_text.verticalScrollBar().setValue(
-            self.results_text.verticalScrollBar().maximum()
-        )
+        # Add to the bounded detection log, the view refreshes on its own timer
+        self.detection_log.append(result_text, camera_name, detection_counts.keys())
         
         # Check for alerts based on detections
-        self.check_detection_alerts(detection_counts)
+        self.check_detection_alerts(detection_counts, camera_name)
 
-    def check_detection_alerts(self, detection_counts):
+    def check_detection_alerts(self, detection_counts, camera_name):
         """Check detections for alert conditions"""
         alert_classes = ['person', 'car', 'truck']  # Add more classes as needed
         alert_thresholds = {
@@ -407,21 +466,52 @@ class CCTVMonitorApp(QMainWindow):
             if class_name in detection_counts:
                 count = detection_counts[class_name]['count']
                 if count > threshold:
-                    alert_msg = f"Alert: Detected {count} {class_name}(s) in camera view"
+                    alert_msg = f"Alert: Detected {count} {class_name}(s) in {camera_name} view"
+                    # Raised on every frame while the count stays high; the alert engine lets the first one through
+                    if alert_engine.submit(f"{class_name}_count", alert_msg, camera=camera_name,
+                                           severity='info') is None:
+                        continue
                     self.alert_signal.emit(alert_msg)
+                    self.video_wall.mark_alert(camera_name)
+                    self.video_handlers[camera_name].sample_alert_frame(f"{class_name} count")
+                    self.video_handlers[camera_name].record_event(f"{class_name} count")
 
     def toggle_ml_detection(self, state):
         """Toggle ML detection on/off"""
         self.ml_enabled = bool(state)
         
-        # Update ML state for current camera if it's running
-        if self.video_handlers[self.current_camera].running:
-            self.video_handlers[self.current_camera].ml_enabled = self.ml_enabled
+        # Update ML state for every running camera
+        for handler in self.video_handlers.values():
+            if handler.running:
+                handler.ml_enabled = self.ml_enabled
         
         if self.ml_enabled:
-            self.results_text.append("ML Detection enabled")
+            # Start loading the model now rather than when the first frame needs it
+            model_loader.request()
+            self.detection_log.append("ML Detection enabled")
         else:
-            self.results_text.append("ML Detection disabled")
+            self.detection_log.append("ML Detection disabled")
+
+    def toggle_video_wall(self, state):
+        """Switch between the single camera view and the video wall"""
+        wall_enabled = bool(state)
+        self.video_wall.set_active(wall_enabled)
+        if wall_enabled:
+            # The wall shows every camera, so make sure all streams are running
+            for camera_name, handler in self.video_handlers.items():
+                if not handler.running:
+                    self.start_camera_stream(camera_name)
+                    self.wall_streams.add(camera_name)
+            self.video_stack.setCurrentWidget(self.video_wall)
+        else:
+            # Stop what the wall started, except the camera on screen and cameras that are recording
+            for camera_name in self.wall_streams:
+                handler = self.video_handlers[camera_name]
+                if handler.running and camera_name != self.current_camera and not self.recording_status[camera_name]:
+                    handler.stop_stream()
+            self.wall_streams.clear()
+            self.video_stack.setCurrentWidget(self.video_label)
+        self.last_frame_seq = None
 
     def on_training_started(self, message):
         self.alert_widget.add_alert(message)
@@ -435,16 +525,25 @@ class CCTVMonitorApp(QMainWindow):
         """Handle application closure"""
         for handler in self.video_handlers.values():
             handler.stop_stream()
+        for handler in self.video_handlers.values():
+            # Let the writers finish open clips and segments
+            if handler.recorder is not None:
+                handler.recorder.close(timeout=5.0)
+        camera_profiles.stop()
+        snapshot_store.close()
+        notification_dispatcher.stop()
+        self.metrics_server.stop()
         event.accept()
 
-    def get_area_name_from_bbox(self, bbox):
-        """Determine the area name based on the bounding box coordinates"""
-        # Implement logic to map bbox to area name
-        return "some_area_name"  # Placeholder
-
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = CCTVMonitorApp()
-    window.show()
+    with startup_profiler.stage("QApplication"):
+        app = QApplication(sys.argv)
+    with startup_profiler.stage("main window"):
+        window = CCTVMonitorApp()
+    with startup_profiler.stage("show window"):
+        window.show()
+    if startup_profiler.enabled:
+        # Printed once the event loop has started, i.e. when the window is responsive
+        QTimer.singleShot(0, lambda: print(startup_profiler.report()))
     sys.exit(app.exec())
@@ -0,0 +1,52 @@
+# File: metrics/metrics_server.py
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from configs.config import metrics_config
+from metrics.pipeline_metrics import metrics
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = metrics.render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would flood the console
+
+
+class MetricsServer:
+    def __init__(self, host=None, port=None):
+        """
+        Serve the pipeline metrics at http://host:port/metrics from a background thread.
+        """
+        self.host = host or metrics_config["host"]
+        self.port = port if port is not None else metrics_config["port"]
+        self.server = None
+        self.thread = None
+
+    def start(self):
+        try:
+            self.server = ThreadingHTTPServer((self.host, self.port), _MetricsRequestHandler)
+        except OSError as e:
+            print(f"Error starting metrics server: {e}")
+            return False
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        print(f"Metrics available at http://{self.host}:{self.server.server_address[1]}/metrics")
+        return True
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
@@ -0,0 +1,151 @@
+# File: metrics/pipeline_metrics.py
+
+import threading
+from bisect import bisect_left
+
+# Upper bounds of the latency buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+STAGES = ('capture', 'queue', 'detect', 'render', 'end_to_end')
+
+
+def _label_value(value):
+    """Escape a Prometheus label value: backslash, double quote and line feed."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class LatencyHistogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """
+        Fixed-bucket latency histogram.
+        Each histogram has a single writer (the thread running its stage), so observe()
+        takes no lock; readers may see a count one observation ahead of the sum, which is
+        fine for monitoring.
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def snapshot(self):
+        return list(self.counts), self.sum, self.count
+
+    def quantile(self, q):
+        """Estimate a quantile by linear interpolation inside the bucket that contains it."""
+        counts, _, total = self.snapshot()
+        if total == 0:
+            return None
+        rank = q * total
+        cumulative = 0
+        for index, count in enumerate(counts):
+            if cumulative + count >= rank and count > 0:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+
+class CameraMetrics:
+    def __init__(self, camera_name):
+        """Stage latencies and frame counters of one camera pipeline."""
+        self.camera_name = camera_name
+        self.stages = {stage: LatencyHistogram() for stage in STAGES}
+        self.counters = {
+            'frames_captured': 0,
+            'frames_processed': 0,
+            # Each counter has a single writer thread, like the histograms; see frames_dropped
+            'capture_dropped': 0,    # Captured but overwritten before the worker picked them up (capture thread)
+            'process_dropped': 0,    # Picked up too late to be worth detecting on (processing thread)
+            'capture_failures': 0,
+            'reconnects': 0,
+            'connect_failures': 0,
+            'detect_cache_hits': 0,
+            'detect_cache_misses': 0,
+            # Alerts are raised from the GUI thread and the notification threads, so these go through increment_shared
+            'alerts_delivered': 0,
+            'alerts_deduplicated': 0,  # Repeats of an alert within its TTL
+            'alerts_correlated': 0,    # Folded into an incident that was already announced
+            'alerts_rate_limited': 0
+        }
+        self.gauges = {}
+        self._shared_lock = threading.Lock()
+
+    def set_gauge(self, gauge, value):
+        self.gauges[gauge] = value
+
+    def observe(self, stage, seconds):
+        self.stages[stage].observe(seconds)
+
+    def increment(self, counter, amount=1):
+        self.counters[counter] += amount
+
+    def increment_shared(self, counter, amount=1):
+        """increment for counters with more than one writer thread."""
+        with self._shared_lock:
+            self.counters[counter] += amount
+
+    @property
+    def frames_dropped(self):
+        """Frames dropped by either thread."""
+        return self.counters['capture_dropped'] + self.counters['process_dropped']
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._cameras = {}
+        self._lock = threading.Lock()  # Only taken when a camera is first registered
+
+    def camera(self, camera_name):
+        camera_name = camera_name or 'default'
+        metrics = self._cameras.get(camera_name)
+        if metrics is None:
+            with self._lock:
+                metrics = self._cameras.setdefault(camera_name, CameraMetrics(camera_name))
+        return metrics
+
+    def cameras(self):
+        return list(self._cameras.values())
+
+    def render_prometheus(self):
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = [
+            '# HELP cctv_stage_latency_seconds Latency of each pipeline stage.',
+            '# TYPE cctv_stage_latency_seconds histogram'
+        ]
+        for camera in self.cameras():
+            camera_label = _label_value(camera.camera_name)
+            for stage, histogram in camera.stages.items():
+                counts, total_sum, total_count = histogram.snapshot()
+                labels = f'camera="{camera_label}",stage="{stage}"'
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, counts):
+                    cumulative += count
+                    lines.append(f'cctv_stage_latency_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                cumulative += counts[-1]
+                lines.append(f'cctv_stage_latency_seconds_bucket{{{labels},le="+Inf"}} {cumulative}')
+                lines.append(f'cctv_stage_latency_seconds_sum{{{labels}}} {total_sum:.6f}')
+                lines.append(f'cctv_stage_latency_seconds_count{{{labels}}} {cumulative}')
+
+        counter_names = sorted({name for camera in self.cameras() for name in camera.counters})
+        for name in counter_names:
+            lines.append(f'# TYPE cctv_{name}_total counter')
+            for camera in self.cameras():
+                lines.append(f'cctv_{name}_total{{camera="{_label_value(camera.camera_name)}"}} {camera.counters.get(name, 0)}')
+
+        gauge_names = sorted({name for camera in self.cameras() for name in camera.gauges})
+        for name in gauge_names:
+            lines.append(f'# TYPE cctv_{name} gauge')
+            for camera in self.cameras():
+                if name in camera.gauges:
+                    lines.append(f'cctv_{name}{{camera="{_label_value(camera.camera_name)}"}} {camera.gauges[name]}')
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry shared by all stream handlers
+metrics = MetricsRegistry()
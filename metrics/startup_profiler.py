@@ -0,0 +1,123 @@
+# File: metrics/startup_profiler.py
+
+import sys
+import time
+from contextlib import contextmanager
+
+
+class _TimedLoader:
+    def __init__(self, loader, profiler, name):
+        """Wraps a module loader to time the execution of the module body."""
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+
+    def __getattr__(self, attribute):
+        return getattr(self._loader, attribute)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profiler._enter_import(self._name)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._exit_import(self._name)
+
+
+class _TimingFinder:
+    def __init__(self, profiler):
+        """Meta path finder that defers to the regular finders and wraps the loader they return."""
+        self.profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(spec.loader, self.profiler, fullname)
+                return spec
+        return None
+
+
+class StartupProfiler:
+    def __init__(self):
+        """
+        Record how long startup spends importing each module and in each initialisation stage.
+        Import timing is only active after install(); stages are always recorded, they are cheap.
+        """
+        self.start = time.perf_counter()
+        self.imports = {}  # module -> [inclusive seconds, self seconds]
+        self.stages = []   # (name, seconds)
+        self.marks = []    # (name, seconds since start)
+        self.enabled = False
+        self._finder = None
+        self._stack = []
+
+    def install(self):
+        """Start timing imports. Modules imported before this call are not included."""
+        if self._finder is None:
+            self._finder = _TimingFinder(self)
+            sys.meta_path.insert(0, self._finder)
+        self.enabled = True
+
+    def uninstall(self):
+        if self._finder is not None:
+            sys.meta_path.remove(self._finder)
+            self._finder = None
+
+    def _enter_import(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def _exit_import(self, name):
+        _, started, children = self._stack.pop()
+        elapsed = time.perf_counter() - started
+        self.imports[name] = [elapsed, elapsed - children]
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    @contextmanager
+    def stage(self, name):
+        """Time an initialisation stage."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - started))
+
+    def mark(self, name):
+        """Record a point in time relative to process start, e.g. the first frame shown."""
+        elapsed = time.perf_counter() - self.start
+        self.marks.append((name, elapsed))
+        return elapsed
+
+    def report(self, top=20):
+        """
+        :param top: Number of modules listed.
+        :return: Text report of the slowest imports, by top-level package and by module, and of the stages.
+        """
+        packages = {}
+        for name, (_, self_time) in self.imports.items():
+            package = name.split('.')[0]
+            packages[package] = packages.get(package, 0.0) + self_time
+
+        lines = [f"Startup profile ({time.perf_counter() - self.start:.2f} s since start)"]
+        lines.append("Imports by package (self time):")
+        for package, seconds in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+            lines.append(f"  {seconds * 1000:9.1f} ms  {package}")
+        lines.append("Slowest modules (cumulative / self):")
+        for name, (total, self_time) in sorted(self.imports.items(), key=lambda item: -item[1][0])[:top]:
+            lines.append(f"  {total * 1000:9.1f} ms  {self_time * 1000:9.1f} ms  {name}")
+        lines.append("Stages:")
+        for name, seconds in self.stages:
+            lines.append(f"  {seconds * 1000:9.1f} ms  {name}")
+        for name, elapsed in self.marks:
+            lines.append(f"  {name} at {elapsed:.2f} s")
+        return '\n'.join(lines)
+
+
+# Process-wide profiler, installed by main.py when started with --profile-startup
+startup_profiler = StartupProfiler()
@@ -0,0 +1,175 @@
+# File: notifications/alert_engine.py
+
+import itertools
+import threading
+import time
+from collections import namedtuple
+
+from configs.config import alert_config
+from metrics.pipeline_metrics import metrics
+
+SEVERITIES = ('info', 'warning', 'critical')
+
+# An alert that passed deduplication and rate limiting; incident is the Incident it belongs to
+Alert = namedtuple('Alert', ['rule', 'camera', 'zone', 'track', 'severity', 'message', 'time', 'incident'])
+
+
+class Incident:
+    __slots__ = ('id', 'camera', 'zone', 'severity', 'rules', 'tracks', 'first', 'last',
+                 'count', 'suppressed', 'announced')
+
+    def __init__(self, incident_id, camera, zone, severity, now):
+        """Related alerts of one camera and zone, open while alerts keep arriving."""
+        self.id = incident_id
+        self.camera = camera
+        self.zone = zone
+        self.severity = severity
+        self.rules = set()
+        self.tracks = set()
+        self.first = now
+        self.last = now
+        self.count = 0       # Alerts folded into the incident, delivered or not
+        self.suppressed = 0  # Alerts dropped by the rate limit
+        self.announced = False  # Whether an alert of the incident was delivered
+
+    def to_dict(self):
+        return {'id': self.id, 'camera': self.camera, 'zone': self.zone, 'severity': self.severity,
+                'rules': sorted(self.rules), 'tracks': sorted(map(str, self.tracks)),
+                'first': self.first, 'last': self.last, 'count': self.count, 'suppressed': self.suppressed}
+
+
+class TokenBucket:
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, per_minute, burst, now):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+
+    def take(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class AlertEngine:
+    def __init__(self, dedup_ttl=None, incident_window=None, rate_limits=None, clock=time.time):
+        """
+        Single gate for the alerts of every detector and camera.
+        - Deduplication: an alert with the same (rule, camera, zone, track) as one seen less than
+          dedup_ttl seconds ago is dropped; every repeat extends the TTL, so an ongoing condition
+          alerts once.
+        - Correlation: alerts of the same camera and zone within incident_window seconds of each
+          other form an incident. An alert is announced when it brings a new rule or a new subject
+          (track) into the incident, or raises its severity; other alerts are folded in silently.
+          Deduplicated repeats do not keep an incident open.
+        - Rate limiting: announcements go through a token bucket per severity.
+        State is pruned as TTLs and incidents expire, so it stays proportional to what is active.
+        :param dedup_ttl: Seconds, defaults to alert_config["dedup_ttl"].
+        :param incident_window: Seconds, defaults to alert_config["incident_window"].
+        :param rate_limits: {severity: (alerts per minute, burst) or None}, defaults to alert_config["rate_limits"].
+        :param clock: Time source, in seconds.
+        """
+        self.dedup_ttl = alert_config["dedup_ttl"] if dedup_ttl is None else dedup_ttl
+        self.incident_window = alert_config["incident_window"] if incident_window is None else incident_window
+        self.rate_limits = alert_config["rate_limits"] if rate_limits is None else rate_limits
+        self.clock = clock
+        self._seen = {}       # (rule, camera, zone, track) -> expiry time
+        self._incidents = {}  # (camera, zone) -> open Incident
+        self._buckets = {}    # severity -> TokenBucket
+        self._ids = itertools.count(1)
+        self._next_sweep = 0.0
+        self._lock = threading.Lock()
+
+    def submit(self, rule, message, camera=None, zone=None, track=None, severity='warning', ttl=None, now=None):
+        """
+        Offer an alert.
+        :param rule: Name of the rule that fired, e.g. 'loitering'.
+        :param message: Text for the notification.
+        :param camera: Camera name.
+        :param zone: Restricted area, None for the whole view.
+        :param track: Track ID (or other subject) the alert is about, None if it is about the scene.
+        :param severity: One of SEVERITIES.
+        :param ttl: Deduplication TTL of this rule, defaults to the engine's.
+        :return: The Alert if it should be delivered, None if it was deduplicated, correlated or rate limited.
+        """
+        if severity not in SEVERITIES:
+            raise ValueError(f"Unknown alert severity: {severity}")
+        now = self.clock() if now is None else now
+        counters = metrics.camera(camera)
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+
+            key = (rule, camera, zone, track)
+            expiry = self._seen.get(key)
+            self._seen[key] = now + (self.dedup_ttl if ttl is None else ttl)
+            incident = self._incidents.get((camera, zone))
+            if incident is not None and now - incident.last > self.incident_window:
+                incident = None
+            if expiry is not None and expiry > now:
+                counters.increment_shared('alerts_deduplicated')
+                return None
+
+            if incident is None:
+                incident = Incident(next(self._ids), camera, zone, severity, now)
+                self._incidents[(camera, zone)] = incident
+            escalated = SEVERITIES.index(severity) > SEVERITIES.index(incident.severity)
+            if escalated:
+                incident.severity = severity
+            # Known rule and subject: a continuation of what was already announced
+            known = rule in incident.rules and (track is None or track in incident.tracks)
+            incident.rules.add(rule)
+            if track is not None:
+                incident.tracks.add(track)
+            incident.last = now
+            incident.count += 1
+
+            if incident.announced and known and not escalated:
+                counters.increment_shared('alerts_correlated')
+                return None
+            if not self._take_token(severity, now):
+                incident.suppressed += 1
+                counters.increment_shared('alerts_rate_limited')
+                return None
+            incident.announced = True
+        counters.increment_shared('alerts_delivered')
+        return Alert(rule, camera, zone, track, severity, message, now, incident)
+
+    def _take_token(self, severity, now):
+        limit = self.rate_limits.get(severity)
+        if limit is None:
+            return True
+        bucket = self._buckets.get(severity)
+        if bucket is None:
+            bucket = self._buckets[severity] = TokenBucket(limit[0], limit[1], now)
+        return bucket.take(now)
+
+    def _sweep(self, now):
+        """Drop expired TTLs and closed incidents; runs at most once per second."""
+        self._seen = {key: expiry for key, expiry in self._seen.items() if expiry > now}
+        self._incidents = {key: incident for key, incident in self._incidents.items()
+                           if now - incident.last <= self.incident_window}
+        self._next_sweep = now + 1.0
+
+    def active_incidents(self, now=None):
+        """:return: Open incidents as dictionaries, newest first."""
+        now = self.clock() if now is None else now
+        with self._lock:
+            incidents = [incident.to_dict() for incident in self._incidents.values()
+                         if now - incident.last <= self.incident_window]
+        return sorted(incidents, key=lambda incident: incident['last'], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._seen.clear()
+            self._incidents.clear()
+            self._buckets.clear()
+
+
+# Process-wide engine shared by every detector and camera
+alert_engine = AlertEngine()
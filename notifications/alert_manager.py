@@ -1,10 +1,19 @@
 # File: notifications/alert_manager.py
 
-import winsound  # For sound notifications (Windows only)
+import base64
 import logging
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime, timezone
 from .email_notifications import EmailNotification
+from .dispatcher import notification_dispatcher
 import yaml
 from pathlib import Path
+from configs.config import snapshot_config
+
+try:
+    import winsound  # For sound notifications (Windows only)
+except ImportError:
+    winsound = None
 
 
 class NotificationManager:
@@ -13,6 +22,9 @@ class NotificationManager:
         logging.basicConfig(filename='alerts.log', level=logging.INFO,
                             format='%(asctime)s:%(levelname)s:%(message)s')
         
+        # Sound alerts are only available on Windows
+        self.sound_enabled = winsound is not None
+
         # Load email configuration
         self.email_config = self._load_email_config()
         
@@ -41,22 +53,85 @@ class NotificationManager:
     def notify_sound(self, duration=500):
         """Play a sound alert for a given duration (in milliseconds)."""
         # Play a simple beep sound (Windows)
+        if not self.sound_enabled:
+            return
         winsound.Beep(1000, duration)  # Frequency (Hz), Duration (ms)
 
     def log_alert(self, message):
         """Log the alert message to a file."""
         logging.info(message)
 
-    def alert(self, anomaly_message):
-        """Send an alert for an anomaly detected."""
+    @staticmethod
+    def alert_payload(anomaly_message, alert=None):
+        """
+        Structured form of an alert for webhooks and MQTT.
+        :param alert: Alert from the alert engine, for the rule, camera, zone, track, severity and incident.
+        """
+        payload = {
+            'message': anomaly_message,
+            'time': datetime.now(timezone.utc).isoformat(timespec='milliseconds')
+        }
+        if alert is not None:
+            payload.update({
+                'rule': alert.rule,
+                'camera': alert.camera,
+                'zone': alert.zone,
+                'track': alert.track,
+                'severity': alert.severity,
+                'incident': alert.incident.id,
+                'time': datetime.fromtimestamp(alert.time, timezone.utc).isoformat(timespec='milliseconds')
+            })
+        return payload
+
+    def alert(self, anomaly_message, alert=None, snapshot=None):
+        """
+        Send an alert for an anomaly detected. Console and log output happen now; sound, email,
+        webhooks and MQTT each go to their own dispatcher thread, so the caller never waits for
+        them and one slow channel does not hold up the others.
+        :param alert: Alert from the alert engine, included in the structured notifications.
+        :param snapshot: Future from SnapshotStore.submit; its JPEGs are attached once encoded.
+        """
         self.notify_console(anomaly_message)
-        self.notify_sound()  # Default duration of 500ms
         self.log_alert(anomaly_message)
-        
-        # Send email notification if configured
+        if self.sound_enabled:
+            notification_dispatcher.submit('sound', self.notify_sound)  # Default duration of 500ms
+        notification_dispatcher.publish(self.alert_payload(anomaly_message, alert),
+                                        lambda payload: self._attach_snapshot(payload, snapshot))
         if self.email_notifier and self.email_config.get('recipient_email'):
-            self.email_notifier.send_email(
-                recipient_email=self.email_config['recipient_email'],
-                subject="CCTV Alert Notification",
-                message=anomaly_message
-            )
\ No newline at end of file
+            notification_dispatcher.submit('email', self._send_email, anomaly_message, snapshot)
+
+    @staticmethod
+    def _snapshot_images(snapshot):
+        """Wait for the JPEGs of a snapshot; run on a dispatcher thread. :return: {kind: image}."""
+        if snapshot is None:
+            return None
+        try:
+            return snapshot.result(timeout=5.0)
+        except FutureTimeoutError:
+            print("Alert snapshot not ready in time, sending without it")
+        except Exception as e:
+            print(f"Alert snapshot unavailable: {e}")
+        return {}
+
+    def _attach_snapshot(self, payload, snapshot):
+        """Add the snapshot's hashes and paths (and, if configured, the JPEGs) to a structured alert."""
+        images = self._snapshot_images(snapshot)
+        if images is None:
+            return
+        payload['snapshot'] = {}
+        for kind, image in images.items():
+            entry = {'sha256': image['sha256'], 'path': image['path'], 'bytes': image['bytes']}
+            if snapshot_config["inline"]:
+                entry['jpeg_base64'] = base64.b64encode(image['data']).decode('ascii')
+            payload['snapshot'][kind] = entry
+
+    def _send_email(self, anomaly_message, snapshot=None):
+        """Email part of alert, run on the dispatcher's email thread."""
+        images = self._snapshot_images(snapshot) or {}
+        attachments = [(f"{kind}_{image['sha256'][:12]}.jpg", image['data']) for kind, image in images.items()]
+        self.email_notifier.send_email(
+            recipient_email=self.email_config['recipient_email'],
+            subject="CCTV Alert Notification",
+            message=anomaly_message,
+            attachments=attachments
+        )
\ No newline at end of file
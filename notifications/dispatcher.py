@@ -0,0 +1,129 @@
+# File: notifications/dispatcher.py
+
+import queue
+import threading
+
+from configs.config import notification_config
+
+
+class NotificationDispatcher:
+    def __init__(self, queue_size=None):
+        """
+        Run notification work on background threads, one per channel (sound, email, each webhook
+        and MQTT channel), so a slow SMTP server or an unreachable broker never holds up detection
+        or any other channel.
+        The webhook and MQTT channels are created on first use and shared by every NotificationManager.
+        :param queue_size: Pending notifications of a channel before new ones are dropped,
+                           defaults to notification_config["queue_size"].
+        """
+        self.queue_size = notification_config["queue_size"] if queue_size is None else queue_size
+        self._channels = None
+        self._workers = {}  # Channel name -> (queue, thread), started on the channel's first notification
+        self._lock = threading.Lock()
+
+    @property
+    def channels(self):
+        """Configured machine-readable channels, created on first use."""
+        if self._channels is None:
+            with self._lock:
+                if self._channels is None:
+                    self._channels = self._create_channels()
+        return self._channels
+
+    @staticmethod
+    def _create_channels():
+        channels = []
+        webhook = notification_config["webhook"]
+        if webhook["enabled"] and webhook["urls"]:
+            try:
+                from notifications.webhook_notifications import WebhookNotification
+                channels.append(WebhookNotification(webhook["urls"], webhook["headers"], webhook["timeout"],
+                                                    webhook["retries"]))
+            except Exception as e:
+                print(f"Error initializing webhook notifications: {e}")
+        broker = notification_config["mqtt"]
+        if broker["enabled"]:
+            try:
+                from notifications.mqtt_notifications import MQTTNotification
+                channels.append(MQTTNotification(
+                    broker["host"], broker["port"], broker["topic"], broker["client_id"], broker["username"],
+                    broker["password"], broker["keepalive"], broker["spool_dir"], broker["max_spool"]))
+            except Exception as e:
+                print(f"Error initializing MQTT notifications: {e}")
+        return channels
+
+    def _queue(self, channel):
+        worker = self._workers.get(channel)
+        if worker is None:
+            with self._lock:
+                worker = self._workers.get(channel)
+                if worker is None:
+                    work = queue.Queue(self.queue_size)
+                    thread = threading.Thread(target=self._run, args=(channel, work), daemon=True,
+                                              name=f"notify-{channel}")
+                    thread.start()
+                    worker = self._workers[channel] = (work, thread)
+        return worker[0]
+
+    def submit(self, channel, function, *args):
+        """
+        Queue function(*args) for the thread of a channel; work of one channel runs in order.
+        :param channel: Name of the channel, e.g. 'sound' or 'email'.
+        :return: False if the channel's queue is full and the notification was dropped.
+        """
+        try:
+            self._queue(channel).put_nowait((function, args))
+            return True
+        except queue.Full:
+            print(f"Notification queue of {channel} full, dropping notification")
+            return False
+
+    def publish(self, payload, prepare=None):
+        """
+        Queue a structured alert for every machine-readable channel, each on its own thread.
+        :param prepare: Optional callable(payload) run on the channel's thread before sending,
+                        e.g. to wait for a snapshot and add it; each channel gets its own copy.
+        """
+        for channel in self.channels:
+            self.submit(type(channel).__name__, self._send, channel, payload, prepare)
+
+    @staticmethod
+    def _send(channel, payload, prepare):
+        payload = dict(payload)
+        if prepare is not None:
+            prepare(payload)
+        try:
+            channel.send(payload)
+        except Exception as e:
+            print(f"Error sending notification via {type(channel).__name__}: {e}")
+
+    @staticmethod
+    def _run(channel, work):
+        while True:
+            item = work.get()
+            if item is None:
+                break
+            function, args = item
+            try:
+                function(*args)
+            except Exception as e:
+                print(f"Error in {channel} notifications: {e}")
+
+    def stop(self, timeout=5.0):
+        """Send what is queued, then close the channels. The timeout applies to each channel's thread."""
+        with self._lock:
+            workers, self._workers = self._workers, {}
+        for work, _ in workers.values():
+            try:
+                work.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+        for _, thread in workers.values():
+            thread.join(timeout)
+        for channel in self._channels or []:
+            channel.close()
+        self._channels = None
+
+
+# Process-wide dispatcher shared by all NotificationManagers
+notification_dispatcher = NotificationDispatcher()
@@ -1,6 +1,7 @@
 # File: notifications/email_notifications.py
 
 import smtplib
+from email.mime.image import MIMEImage
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
@@ -12,14 +13,21 @@ class EmailNotification:
         self.sender_email = sender_email
         self.sender_password = sender_password
 
-    def send_email(self, recipient_email, subject, message):
-        """Send an email notification."""
+    def send_email(self, recipient_email, subject, message, attachments=None):
+        """
+        Send an email notification.
+        :param attachments: Optional [(filename, JPEG bytes)], e.g. alert snapshots.
+        """
         msg = MIMEMultipart()
         msg['From'] = self.sender_email
         msg['To'] = recipient_email
         msg['Subject'] = subject
 
         msg.attach(MIMEText(message, 'plain'))
+        for filename, data in attachments or []:
+            image = MIMEImage(data, 'jpeg')
+            image.add_header('Content-Disposition', 'attachment', filename=filename)
+            msg.attach(image)
 
         try:
             with smtplib.SMTP(self.smtp_server, self.port) as server:
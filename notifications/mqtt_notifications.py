@@ -0,0 +1,137 @@
+# File: notifications/mqtt_notifications.py
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+try:
+    import paho.mqtt.client as mqtt  # Optional, only needed for MQTT notifications
+except ImportError:
+    mqtt = None
+
+
+class MQTTNotification:
+    def __init__(self, host, port=1883, topic='cctv/alerts', client_id='cctv-monitor', username=None,
+                 password=None, keepalive=60, spool_dir='notification_spool', max_spool=10000):
+        """
+        Publish alerts as JSON with QoS 1 over one persistent broker connection.
+        Every alert is written to the spool directory first and deleted once the broker
+        acknowledges it, so alerts raised while the broker is unreachable (or before a
+        crash) are sent after the next connect.
+        :param host: Broker host.
+        :param port: Broker port.
+        :param topic: Topic alerts are published to.
+        :param client_id: Client ID; fixed so the broker keeps the session across reconnects.
+        :param spool_dir: Directory for unacknowledged alerts.
+        :param max_spool: Oldest spooled alerts are dropped beyond this many.
+        """
+        if mqtt is None:
+            raise ImportError("paho-mqtt is required for MQTT notifications")
+        self.topic = topic
+        self.spool_dir = Path(spool_dir)
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self.max_spool = max_spool
+        self.connected = False
+        self._in_flight = {}  # Message ID -> spool file
+        self._acked = set()   # Message IDs acknowledged before publish returned
+        self._sending = set()  # Spool files published and not yet acknowledged
+        self._sequence = 0
+        self._lock = threading.Lock()  # Never held while calling into the client, which calls back under its own locks
+
+        if hasattr(mqtt, 'CallbackAPIVersion'):
+            self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=client_id, clean_session=False)
+        else:
+            self.client = mqtt.Client(client_id=client_id, clean_session=False)
+        if username:
+            self.client.username_pw_set(username, password)
+        self.client.on_connect = self._on_connect
+        self.client.on_disconnect = self._on_disconnect
+        self.client.on_publish = self._on_publish
+        self.client.reconnect_delay_set(1, 60)
+        # Connects and reconnects in the client's network thread
+        self.client.connect_async(host, port, keepalive)
+        self.client.loop_start()
+
+    def send(self, payload):
+        """
+        Spool one alert and publish it if the broker is connected.
+        :return: True if it was handed to the broker now, False if it waits in the spool.
+        """
+        path = self._spool(payload)
+        if path is None or not self.connected:
+            return False
+        return self._publish(path)
+
+    def _spool(self, payload):
+        try:
+            spooled = sorted(self.spool_dir.glob('*.json'))
+            for old in spooled[:max(0, len(spooled) - self.max_spool + 1)]:
+                print(f"MQTT spool full, dropping {old.name}")
+                old.unlink(missing_ok=True)
+            with self._lock:
+                self._sequence += 1
+                name = f"{time.time_ns()}-{self._sequence:06d}.json"
+            path = self.spool_dir / name
+            temporary = path.with_suffix('.tmp')
+            temporary.write_text(json.dumps(payload))
+            os.replace(temporary, path)
+            return path
+        except OSError as e:
+            print(f"Failed to spool MQTT alert: {e}")
+            return None
+
+    def _publish(self, path):
+        with self._lock:
+            if path in self._sending:
+                return True
+            self._sending.add(path)
+        try:
+            info = self.client.publish(self.topic, path.read_bytes(), qos=1)
+        except (OSError, ValueError) as e:
+            print(f"Failed to publish MQTT alert: {e}")
+            info = None
+        with self._lock:
+            if info is None or info.rc != mqtt.MQTT_ERR_SUCCESS:
+                self._sending.discard(path)
+                return False
+            if info.mid in self._acked:
+                self._acked.discard(info.mid)
+                self._sending.discard(path)
+                path.unlink(missing_ok=True)
+            else:
+                self._in_flight[info.mid] = path
+        return True
+
+    def _on_connect(self, client, userdata, flags, reason_code, *args):
+        failed = getattr(reason_code, 'is_failure', reason_code != 0)
+        if failed:
+            print(f"MQTT connection refused: {reason_code}")
+            return
+        self.connected = True
+        # Spooled alerts go out in the order they were raised
+        for path in sorted(self.spool_dir.glob('*.json')):
+            if not self.connected or not self._publish(path):
+                break
+
+    def _on_disconnect(self, client, userdata, *args):
+        self.connected = False
+        with self._lock:
+            # Unacknowledged alerts are still spooled and are published again after reconnecting
+            self._in_flight.clear()
+            self._acked.clear()
+            self._sending.clear()
+
+    def _on_publish(self, client, userdata, mid, *args):
+        with self._lock:
+            path = self._in_flight.pop(mid, None)
+            if path is None:
+                self._acked.add(mid)
+                return
+            self._sending.discard(path)
+        path.unlink(missing_ok=True)
+
+    def close(self):
+        self.client.disconnect()
+        self.client.loop_stop()
@@ -0,0 +1,114 @@
+# File: notifications/snapshot_store.py
+
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from configs.config import snapshot_config
+from data_acquisition.overlay_renderer import OverlayRenderer
+
+
+class SnapshotStore:
+    def __init__(self, root=None, quality=None, crop_margin=None, context_width=None, workers=None, max_bytes=None):
+        """
+        JPEG snapshots for alerts: a crop around the boxes involved plus a downscaled whole frame
+        for context. Encoding runs in a thread pool (cv2 releases the GIL), never in the caller's thread.
+        Files are named by the SHA-256 of their content, so identical snapshots are stored once;
+        the least recently used ones are deleted when the store grows beyond max_bytes.
+        Defaults come from snapshot_config.
+        """
+        self.root = Path(root or snapshot_config["root"])
+        self.quality = snapshot_config["quality"] if quality is None else quality
+        self.crop_margin = snapshot_config["crop_margin"] if crop_margin is None else crop_margin
+        self.context_width = context_width or snapshot_config["context_width"]
+        self.max_bytes = max_bytes or snapshot_config["max_disk_mb"] * 2 ** 20
+        self.executor = ThreadPoolExecutor(max_workers=workers or snapshot_config["workers"],
+                                           thread_name_prefix='snapshot')
+        self._total = None  # Bytes on disk, counted on first store
+        self._lock = threading.Lock()
+
+    def submit(self, frame, boxes):
+        """
+        Queue a snapshot of a frame. The frame is not copied, so it must not be modified afterwards
+        (captured frames never are).
+        :param frame: BGR frame the alert was raised on.
+        :param boxes: [(xyxy box, class_id)] of the detections involved.
+        :return: Future of {'crop': entry, 'context': entry}, see store.
+        """
+        return self.executor.submit(self._snapshot, frame, [(list(box), class_id) for box, class_id in boxes])
+
+    def _snapshot(self, frame, boxes):
+        height, width = frame.shape[:2]
+        corners = np.array([box for box, _ in boxes], dtype=np.float32).reshape(-1, 4)
+        x1, y1 = corners[:, :2].min(axis=0)
+        x2, y2 = corners[:, 2:].max(axis=0)
+        margin_x, margin_y = (x2 - x1) * self.crop_margin, (y2 - y1) * self.crop_margin
+        x1, y1 = int(max(x1 - margin_x, 0)), int(max(y1 - margin_y, 0))
+        x2, y2 = int(min(x2 + margin_x, width)), int(min(y2 + margin_y, height))
+        crop = frame[y1:y2, x1:x2] if x2 > x1 and y2 > y1 else frame
+
+        scale = min(1.0, self.context_width / width)
+        context = cv2.resize(frame, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+        for (bx1, by1, bx2, by2), class_id in boxes:
+            cv2.rectangle(context, (int(bx1 * scale), int(by1 * scale)), (int(bx2 * scale), int(by2 * scale)),
+                          OverlayRenderer.color(class_id), 2)
+
+        return {'crop': self.store(self._encode(crop)), 'context': self.store(self._encode(context))}
+
+    def _encode(self, image):
+        ok, data = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, int(self.quality)])
+        if not ok:
+            raise ValueError("JPEG encoding failed")
+        return data.tobytes()
+
+    def store(self, data):
+        """
+        Store JPEG bytes under their content hash.
+        :return: {'sha256', 'path', 'bytes', 'data'}.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.root / digest[:2] / f"{digest}.jpg"
+        with self._lock:
+            if self._total is None:
+                self._total = sum(p.stat().st_size for p in self.root.rglob('*.jpg')) if self.root.exists() else 0
+            if path.exists():
+                os.utime(path)  # Recently used, evicted last
+            else:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                temporary = path.with_suffix('.tmp')
+                temporary.write_bytes(data)
+                os.replace(temporary, path)
+                self._total += len(data)
+                if self._total > self.max_bytes:
+                    self._evict(keep=path)
+        return {'sha256': digest, 'path': str(path), 'bytes': len(data), 'data': data}
+
+    def _evict(self, keep):
+        """Delete least recently used snapshots down to 90% of max_bytes, so eviction runs rarely."""
+        files = []
+        for path in self.root.rglob('*.jpg'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        self._total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files, key=lambda f: f[0]):
+            if self._total <= self.max_bytes * 0.9:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            self._total -= size
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+# Process-wide store; its encoding threads are started on first use
+snapshot_store = SnapshotStore()
@@ -0,0 +1,44 @@
+# File: notifications/webhook_notifications.py
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class WebhookNotification:
+    def __init__(self, urls, headers=None, timeout=5.0, retries=2):
+        """
+        POST alerts as JSON to HTTP endpoints over one keep-alive session, so repeated
+        alerts reuse pooled connections instead of opening a new one each time.
+        :param urls: Endpoints every alert is sent to.
+        :param headers: Extra request headers, e.g. for authentication.
+        :param timeout: Seconds per request.
+        :param retries: Retries on connection errors and 502/503/504 responses.
+        """
+        self.urls = list(urls)
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(headers or {})
+        retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(502, 503, 504),
+                      allowed_methods=frozenset({'POST'}))
+        adapter = HTTPAdapter(pool_connections=max(1, len(self.urls)), pool_maxsize=2, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def send(self, payload):
+        """
+        Send one alert to every endpoint.
+        :return: True if all endpoints accepted it.
+        """
+        delivered = True
+        for url in self.urls:
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout)
+                response.raise_for_status()
+            except requests.RequestException as e:
+                print(f"Failed to send webhook to {url}: {e}")
+                delivered = False
+        return delivered
+
+    def close(self):
+        self.session.close()
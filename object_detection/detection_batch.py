@@ -0,0 +1,182 @@
+# File: object_detection/detection_batch.py
+
+import numpy as np
+
+# Keys of the detection dictionaries the pipeline used to pass around, all served by Detection
+LEGACY_KEYS = ('id', 'label', 'class_id', 'class_name', 'confidence', 'bbox', 'track_id', 'zone')
+
+
+class Detection:
+    __slots__ = ('batch', 'index')
+
+    def __init__(self, batch, index):
+        """
+        View on one row of a DetectionBatch, readable like the old detection dictionaries
+        (detection['bbox'], detection.get('class_name'), ...). Holds no data of its own.
+        """
+        self.batch = batch
+        self.index = index
+
+    def __getitem__(self, key):
+        batch, index = self.batch, self.index
+        if key == 'bbox':
+            return [int(value) for value in batch.boxes[index]]
+        if key in ('label', 'class_name'):
+            return batch.class_name(batch.class_ids[index])
+        if key == 'class_id':
+            return int(batch.class_ids[index])
+        if key == 'confidence':
+            return float(batch.scores[index])
+        if key == 'id':
+            return index
+        if key == 'track_id':
+            return int(batch.track_ids[index]) if batch.track_ids is not None else None
+        if key == 'zone':
+            return batch.zones[index] if batch.zones is not None else None
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == 'track_id':
+            self.batch.set_track_ids()[self.index] = value
+        elif key == 'zone':
+            self.batch.set_zones()[self.index] = value
+        else:
+            raise KeyError(f"{key} is read-only")
+
+    def __contains__(self, key):
+        return key in LEGACY_KEYS
+
+    def get(self, key, default=None):
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+
+    def setdefault(self, key, default=None):
+        return self.get(key, default)
+
+    def keys(self):
+        return LEGACY_KEYS
+
+    def to_dict(self):
+        return {key: self[key] for key in LEGACY_KEYS}
+
+    def __repr__(self):
+        return f"Detection({self.to_dict()})"
+
+
+class DetectionBatch:
+    __slots__ = ('boxes', 'scores', 'class_ids', 'names', 'track_ids', 'zones')
+
+    def __init__(self, boxes, scores, class_ids, names=None, track_ids=None, zones=None):
+        """
+        Detections of one frame as contiguous arrays, so trackers and rules can work on whole frames.
+        Iterating or indexing with an int gives Detection row views for code written against dictionaries.
+        :param boxes: (N, 4) float32 xyxy boxes in frame pixels.
+        :param scores: (N,) float32 confidences.
+        :param class_ids: (N,) int32 class IDs.
+        :param names: Class names of the model, a list or a {class_id: name} dict.
+        :param track_ids: Optional (N,) int32 track IDs, -1 for untracked.
+        :param zones: Optional (N,) object array of restricted area names, None outside every area.
+        """
+        self.boxes = boxes
+        self.scores = scores
+        self.class_ids = class_ids
+        self.names = names if names is not None else {}
+        self.track_ids = track_ids
+        self.zones = zones
+
+    @classmethod
+    def from_result(cls, result, names):
+        """
+        Wrap an (N, 6) float32 [x1, y1, x2, y2, confidence, class_id] result without copying boxes and scores.
+        """
+        return cls(result[:, :4], result[:, 4], result[:, 5].astype(np.int32), names)
+
+    @classmethod
+    def from_dicts(cls, detections, names=None):
+        """Build a batch from detection dictionaries, e.g. ground truth or results of older code."""
+        detections = list(detections)
+        labels = [det.get('class_name', det.get('label')) for det in detections]
+        if names is None:
+            names = sorted(set(labels))
+        lookup = {name: index for index, name in (names.items() if isinstance(names, dict) else enumerate(names))}
+        boxes = np.array([det['bbox'] for det in detections], dtype=np.float32).reshape(-1, 4)
+        scores = np.array([det.get('confidence', 1.0) for det in detections], dtype=np.float32)
+        class_ids = np.array([det.get('class_id', lookup.get(label, -1)) for det, label in zip(detections, labels)],
+                             dtype=np.int32)
+        batch = cls(boxes, scores, class_ids, names)
+        if any(det.get('track_id') is not None for det in detections):
+            batch.track_ids = np.array([det.get('track_id', -1) for det in detections], dtype=np.int32)
+        if any(det.get('zone') is not None for det in detections):
+            batch.set_zones([det.get('zone') for det in detections])
+        return batch
+
+    @classmethod
+    def coerce(cls, detections, names=None):
+        """Return detections as a DetectionBatch, converting a list of dictionaries if needed."""
+        if isinstance(detections, cls):
+            return detections
+        return cls.from_dicts(detections, names)
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __iter__(self):
+        return (Detection(self, index) for index in range(len(self)))
+
+    def __getitem__(self, index):
+        """An int gives a Detection view, a slice or boolean/index array a new batch."""
+        if isinstance(index, (int, np.integer)):
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError(index)
+            return Detection(self, int(index))
+        return DetectionBatch(self.boxes[index], self.scores[index], self.class_ids[index], self.names,
+                              None if self.track_ids is None else self.track_ids[index],
+                              None if self.zones is None else self.zones[index])
+
+    def class_name(self, class_id):
+        class_id = int(class_id)
+        if isinstance(self.names, dict):
+            return self.names.get(class_id, str(class_id))
+        return self.names[class_id] if 0 <= class_id < len(self.names) else str(class_id)
+
+    def class_mask(self, *class_names):
+        """Boolean mask of the rows whose class is one of class_names."""
+        lookup = self.names.items() if isinstance(self.names, dict) else enumerate(self.names)
+        wanted = [class_id for class_id, name in lookup if name in class_names]
+        return np.isin(self.class_ids, wanted)
+
+    def centers(self):
+        """(N, 2) box centres."""
+        return (self.boxes[:, :2] + self.boxes[:, 2:]) / 2
+
+    def set_track_ids(self, track_ids=None):
+        """Set (or allocate, untracked) the track ID column and return it."""
+        if track_ids is not None:
+            self.track_ids = np.asarray(track_ids, dtype=np.int32)
+        elif self.track_ids is None:
+            self.track_ids = np.full(len(self), -1, dtype=np.int32)
+        return self.track_ids
+
+    def set_zones(self, zones=None):
+        """Set (or allocate, empty) the zone column and return it."""
+        if zones is not None:
+            self.zones = np.asarray(zones, dtype=object)
+        elif self.zones is None:
+            self.zones = np.full(len(self), None, dtype=object)
+        return self.zones
+
+    def copy(self):
+        return DetectionBatch(self.boxes.copy(), self.scores.copy(), self.class_ids.copy(), self.names,
+                              None if self.track_ids is None else self.track_ids.copy(),
+                              None if self.zones is None else self.zones.copy())
+
+    def to_dicts(self):
+        return [detection.to_dict() for detection in self]
+
+    def __repr__(self):
+        return f"DetectionBatch({len(self)} detections)"
@@ -0,0 +1,78 @@
+# File: object_detection/detection_cache.py
+
+import time
+
+import cv2
+import numpy as np
+
+from configs.config import detection_cache_config
+
+
+class DetectionCache:
+    def __init__(self, threshold=None, max_age=None, signature_size=None):
+        """
+        Reuse the previous detections while the scene has not changed.
+        Frames are compared by a block-mean signature against the last frame the model actually
+        ran on, so slow drift accumulates until it forces a new inference.
+        :param threshold: Largest per-block mean brightness difference considered unchanged.
+        :param max_age: Seconds a cached result may be reused.
+        :param signature_size: (columns, rows) of the block grid.
+        """
+        self.threshold = detection_cache_config["threshold"] if threshold is None else threshold
+        self.max_age = detection_cache_config["max_age"] if max_age is None else max_age
+        self.signature_size = tuple(signature_size or detection_cache_config["signature_size"])
+
+        self.last_signature = None
+        self.last_detections = None
+        self.last_key = None
+        self.last_time = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def signature(self, frame):
+        """Block means of the frame in greyscale, as a small int16 array."""
+        small = cv2.resize(frame, self.signature_size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small.astype(np.int16)
+
+    def lookup(self, signature, key=None, now=None):
+        """
+        :param signature: Signature of the current frame.
+        :param key: Anything else the result depends on (e.g. model input size); must match.
+        :return: The cached detections, or None if the model has to run.
+        """
+        now = time.monotonic() if now is None else now
+        if (self.last_signature is not None
+                and key == self.last_key
+                and now - self.last_time < self.max_age
+                and np.abs(signature - self.last_signature).max() <= self.threshold):
+            self.hits += 1
+            return self.last_detections.copy()
+        self.misses += 1
+        return None
+
+    def store(self, signature, detections, key=None, now=None):
+        self.last_signature = signature
+        self.last_detections = detections.copy()
+        self.last_key = key
+        self.last_time = time.monotonic() if now is None else now
+
+    def detect(self, frame, detect, key=None):
+        """
+        Return cached detections for the frame, or run detect(frame) and cache its result.
+        """
+        signature = self.signature(frame)
+        detections = self.lookup(signature, key)
+        if detections is None:
+            detections = detect(frame)
+            self.store(signature, detections, key)
+        return detections
+
+    def clear(self):
+        self.last_signature = None
+        self.last_detections = None
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / total if total else 0.0}
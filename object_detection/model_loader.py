@@ -0,0 +1,82 @@
+# File: object_detection/model_loader.py
+
+import threading
+import time
+
+from configs.config import model_config
+
+
+class ModelLoader:
+    def __init__(self):
+        """
+        Load ObjectDetectors once, in the background, on first request.
+        torch and the YOLOv5 code are only imported by the loading thread, so nothing
+        pays for them until detection is actually enabled. Cameras using the same
+        model file share one detector; each model file is loaded once.
+        """
+        self.detectors = {}  # model path -> ObjectDetector
+        self.errors = {}     # model path -> error message
+        self.load_times = {}
+        self._threads = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(model_path):
+        return model_path or model_config['model_path']
+
+    @property
+    def detector(self):
+        """Detector for the default model, None until it is loaded."""
+        return self.detectors.get(self._key(None))
+
+    @property
+    def error(self):
+        return self.errors.get(self._key(None))
+
+    @property
+    def load_time(self):
+        return self.load_times.get(self._key(None))
+
+    def request(self, model_path=None):
+        """
+        Start loading a model if that has not happened yet.
+        :param model_path: Model weights relative to the project root, defaults to model_config['model_path'].
+        :return: The detector once it is loaded and warmed up, None until then (or if loading failed).
+        """
+        key = self._key(model_path)
+        detector = self.detectors.get(key)
+        if detector is None and key not in self._threads:
+            with self._lock:
+                if key not in self._threads:
+                    thread = threading.Thread(target=self._load, args=(key,), daemon=True)
+                    self._threads[key] = thread
+                    thread.start()
+        return detector
+
+    @property
+    def failed(self):
+        """Whether loading the default model failed; see errors for other models."""
+        return self.error is not None
+
+    def wait(self, timeout=None, model_path=None):
+        """Block until loading has finished. :return: The detector, or None."""
+        self.request(model_path)
+        self._threads[self._key(model_path)].join(timeout)
+        return self.detectors.get(self._key(model_path))
+
+    def _load(self, model_path):
+        start = time.perf_counter()
+        try:
+            from object_detection.object_detector import ObjectDetector
+            detector = ObjectDetector(model_path=model_path)
+            detector.warm_up()
+            self.load_times[model_path] = time.perf_counter() - start
+            print(f"Detection model {model_path} ready in {self.load_times[model_path]:.1f} s")
+            self.detectors[model_path] = detector
+        except Exception as e:
+            self.errors[model_path] = str(e)
+            print(f"Error loading detection model {model_path}: {self.errors[model_path]}")
+
+
+# Process-wide loader shared by all stream handlers
+model_loader = ModelLoader()
@@ -1,21 +1,30 @@
 # File: object_detection/object_detector.py
 
 import torch
-import cv2
+import torchvision
 import numpy as np
 import os
 
 from configs.config import model_config
+from preprocessing.frame_preprocessor import FramePreprocessor, scale_boxes
+from object_detection.detection_batch import DetectionBatch
+from data_acquisition.overlay_renderer import overlay_renderer
 
 
 class ObjectDetector:
-    def __init__(self):
+    def __init__(self, preprocessor=None, model_path=None):
         """
         Initialize the Object Detector using configurations from config.py.
+        :param preprocessor: FramePreprocessor whose buffers are used for the model input.
+        :param model_path: Model weights relative to the project root, defaults to model_config['model_path'].
         """
         try:
-            self.model_path = model_config['model_path']
+            self.model_path = model_path or model_config['model_path']
             self.confidence_threshold = model_config['confidence_threshold']
+            self.iou_threshold = model_config.get('iou_threshold', 0.45)
+            self.max_detections = model_config.get('max_detections', 300)
+            self._class_filters = {}  # Cache of class_filter results
+            self.preprocessor = preprocessor or FramePreprocessor()
 
             # Get the absolute path to the yolov5 directory
             current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -32,60 +41,226 @@ class ObjectDetector:
             # Load the model using the specified local path
             self.model = torch.hub.load(yolov5_repo_path, 'custom', path=model_full_path, source='local')
             self.model.eval()  # Set to evaluation mode
-            
+            self.names = self.model.names
+
             print("Model loaded successfully")
         except Exception as e:
             print(f"Error initializing ObjectDetector: {str(e)}")
             raise
 
-    def detect_objects(self, frame):
+    def warm_up(self, size=None):
+        """
+        Run one inference on a blank input, so the first real frame does not pay for
+        lazy initialisation inside torch.
+        """
+        size = size or self.preprocessor.input_size
+        self.infer(np.zeros((1, 3, size, size), dtype=np.float32))
+
+    def infer(self, tensor):
+        """
+        Run the model on a preprocessed batch.
+        :param tensor: (N, 3, H, W) float32 RGB array in [0, 1], as produced by FramePreprocessor.
+        :return: Raw predictions, a (N, rows, 5 + classes) tensor.
+        """
+        with torch.no_grad():
+            # A tensor input skips YOLOv5's own letterboxing and NMS
+            pred = self.model(torch.from_numpy(tensor))
+        if isinstance(pred, (list, tuple)):
+            pred = pred[0]
+        return pred
+
+    def class_filter(self, classes=None, class_thresholds=None, conf_threshold=None):
+        """
+        Prepare a class allowlist and per-class confidence thresholds for the post-processing.
+        Results are cached, so this is cheap to call for every frame.
+        :param classes: Class names to keep, None for all.
+        :param class_thresholds: {class name: confidence threshold}, overriding conf_threshold for those classes.
+        :param conf_threshold: Threshold of the other classes, defaults to the detector's.
+        :return: (thresholds, floor) as used by _candidates: one threshold for all classes, or a tensor
+                 with the threshold of each class (infinite for classes outside the allowlist),
+                 and the lowest threshold.
+        """
+        conf_threshold = self.confidence_threshold if conf_threshold is None else conf_threshold
+        class_thresholds = class_thresholds or {}
+        key = (None if classes is None else tuple(classes), tuple(sorted(class_thresholds.items())), conf_threshold)
+        cached = self._class_filters.get(key)
+        if cached is not None:
+            return cached
+
+        names = dict(self.names.items() if isinstance(self.names, dict) else enumerate(self.names))
+        ids = {name: class_id for class_id, name in names.items()}
+        unknown = sorted(set(classes or ()).union(class_thresholds) - set(ids))
+        if unknown:
+            print(f"Unknown classes ignored: {', '.join(unknown)}")
+
+        if classes is None and not class_thresholds:
+            result = (conf_threshold, conf_threshold)
+        else:
+            allowed = set(names) if classes is None else {ids[name] for name in classes if name in ids}
+            thresholds = [class_thresholds.get(names[class_id], conf_threshold) if class_id in allowed
+                          else float('inf') for class_id in range(len(names))]
+            # Nothing to detect if no class is allowed; no row passes an infinite threshold
+            result = (torch.tensor(thresholds), min(thresholds))
+        self._class_filters[key] = result
+        return result
+
+    def _candidates(self, pred, conf_threshold=None, class_filter=None):
+        """
+        Confidence and class filtering of a whole batch of raw predictions at once, before NMS.
+        :param conf_threshold: Confidence threshold, defaults to the detector's; ignored with class_filter.
+        :param class_filter: Result of class_filter.
+        :return: (image_index, xyxy boxes, confidence, class_id) tensors of the remaining rows.
+        """
+        thresholds, floor = class_filter or self.class_filter(conf_threshold=conf_threshold)
+        # Objectness bounds the confidence of every class, so it rejects most rows cheaply
+        image_index, row = (pred[..., 4] > floor).nonzero(as_tuple=True)
+        rows = pred[image_index, row]
+        # Confidence is objectness times the probability of the best class, over all classes:
+        # a row whose best class is not allowed is dropped, never relabelled as its runner-up
+        class_conf, class_id = (rows[:, 5:] * rows[:, 4:5]).max(1)
+        if torch.is_tensor(thresholds):
+            thresholds = thresholds.to(rows.device)[class_id]
+        keep = class_conf > thresholds
+        rows, class_conf, class_id, image_index = rows[keep], class_conf[keep], class_id[keep], image_index[keep]
+
+        xywh = rows[:, :4]
+        boxes = torch.cat((xywh[:, :2] - xywh[:, 2:] / 2, xywh[:, :2] + xywh[:, 2:] / 2), 1)
+        return image_index, boxes, class_conf, class_id
+
+    def _suppress(self, boxes, class_conf, class_id, iou_threshold=None):
+        """
+        Class-aware non-maximum suppression.
+        :param iou_threshold: IoU threshold, defaults to the detector's.
+        :return: (n, 6) float32 array [x1, y1, x2, y2, confidence, class_id].
+        """
+        iou_threshold = self.iou_threshold if iou_threshold is None else iou_threshold
+        keep = torchvision.ops.batched_nms(boxes, class_conf, class_id, iou_threshold)
+        keep = keep[:self.max_detections]
+        return torch.cat((boxes[keep], class_conf[keep, None], class_id[keep, None].float()), 1).float().cpu().numpy()
+
+    def non_max_suppression(self, pred, conf_threshold=None, iou_threshold=None, class_filter=None):
+        """
+        Confidence filtering and class-aware non-maximum suppression.
+        :param pred: Raw predictions from infer.
+        :param conf_threshold: Confidence threshold, defaults to the detector's.
+        :param iou_threshold: IoU threshold, defaults to the detector's.
+        :param class_filter: Class allowlist and per-class thresholds from class_filter.
+        :return: List with one (n, 6) float32 array [x1, y1, x2, y2, confidence, class_id] per image.
+        """
+        image_index, boxes, class_conf, class_id = self._candidates(pred, conf_threshold, class_filter)
+        results = []
+        for index in range(len(pred)):
+            mask = image_index == index
+            results.append(self._suppress(boxes[mask], class_conf[mask], class_id[mask], iou_threshold))
+        return results
+
+    def detect_objects(self, frame, size=None, preprocessor=None, conf_threshold=None, iou_threshold=None,
+                       class_filter=None):
         """
         Perform object detection on the input frame.
-        :param frame: The input frame.
-        :return: List of detected objects, each represented as a dictionary containing 'id', 'label', 'confidence', and 'bbox'.
+        The frame is letterboxed straight into the model input tensor, and boxes are mapped back afterwards.
+        :param frame: The input BGR frame.
+        :param size: Model input size, defaults to the preprocessor's input size.
+        :param preprocessor: FramePreprocessor to use instead of the detector's own, so threads
+                             sharing one detector do not share input buffers.
+        :param conf_threshold: Confidence threshold for this call, e.g. from a camera profile; defaults to the detector's.
+        :param iou_threshold: IoU threshold for this call; defaults to the detector's.
+        :param class_filter: Class allowlist and per-class thresholds from class_filter; detections whose
+                             best class is not allowed are dropped before NMS.
+        :return: DetectionBatch of the detected objects; its rows read like dictionaries with 'id', 'label', 'class_id', 'class_name', 'confidence', and 'bbox'.
         """
         # Convert frame to uint8 if needed
         if frame.dtype != np.uint8:
             frame = (frame * 255).astype(np.uint8)
 
-        # Convert the frame to RGB
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        tensor, scale, pad = (preprocessor or self.preprocessor).prepare(frame, size)
+        return self.detect_prepared(tensor, scale, pad, frame.shape, conf_threshold, iou_threshold, class_filter)
+
+    def detect_prepared(self, tensor, scale, pad, frame_shape, conf_threshold=None, iou_threshold=None,
+                        class_filter=None):
+        """
+        Perform object detection on a frame already prepared by FramePreprocessor.prepare.
+        :param tensor: (1, 3, H, W) model input.
+        :param scale: Letterbox scale.
+        :param pad: Letterbox (pad_x, pad_y).
+        :param frame_shape: Shape of the original frame.
+        :return: DetectionBatch, as returned by detect_objects.
+        """
+        result = self.non_max_suppression(self.infer(tensor), conf_threshold, iou_threshold, class_filter)[0]
+        scale_boxes(result[:, :4], scale, pad, frame_shape)
+        return self._to_detections(result)
 
-        # Perform inference
-        results = self.model(rgb_frame)
+    def detect_batch(self, frames, size=None, preprocessor=None, conf_threshold=None, iou_threshold=None,
+                     class_filter=None):
+        """
+        Perform object detection on several frames with one model call.
+        :param frames: List of BGR uint8 frames.
+        :param size: Model input size, defaults to the preprocessor's input size.
+        :param preprocessor: FramePreprocessor to use instead of the detector's own.
+        :return: One DetectionBatch per frame, as returned by detect_objects.
+        """
+        preprocessor = preprocessor or self.preprocessor
+        canvases, geometry = [], []
+        for slot, frame in enumerate(frames):
+            canvas, scale, pad = preprocessor.letterbox(frame, size, slot=slot)
+            canvases.append(canvas)
+            geometry.append((scale, pad, frame.shape))
+        results = self.non_max_suppression(self.infer(preprocessor.to_tensor(canvases)),
+                                           conf_threshold, iou_threshold, class_filter)
 
-        # Filter results based on confidence threshold
         detections = []
-        for index, (*xyxy, confidence, class_id) in enumerate(results.xyxy[0]):
-            if confidence > self.confidence_threshold:
-                label = self.model.names[int(class_id)]
-                bbox = [int(x.item()) for x in xyxy]  # Bounding box coordinates
-                detections.append({
-                    'id': index,  # Unique ID for each detection
-                    'label': label,
-                    'confidence': float(confidence),
-                    'bbox': bbox
-                })
-
+        for result, (scale, pad, frame_shape) in zip(results, geometry):
+            scale_boxes(result[:, :4], scale, pad, frame_shape)
+            detections.append(self._to_detections(result))
         return detections
 
+    def detect_tiled(self, frame, windows, size=None, include_full_frame=True, preprocessor=None,
+                     conf_threshold=None, iou_threshold=None, class_filter=None):
+        """
+        Perform object detection on overlapping tiles of a high-resolution frame, so small
+        objects keep enough pixels. All tiles go through the model as one batch, and their
+        results are merged with a single non-maximum suppression over the whole frame.
+        :param frame: The input BGR frame.
+        :param windows: Tile windows (x1, y1, x2, y2), see object_detection.tiling.tile_windows.
+        :param size: Model input size per tile, defaults to the preprocessor's input size.
+        :param include_full_frame: Also detect on the whole frame, for objects larger than a tile.
+        :param preprocessor: FramePreprocessor to use instead of the detector's own.
+        :return: DetectionBatch, as returned by detect_objects.
+        """
+        crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in windows]
+        offsets = [(x1, y1) for x1, y1, _, _ in windows]
+        if include_full_frame:
+            crops.append(frame)
+            offsets.append((0, 0))
+
+        preprocessor = preprocessor or self.preprocessor
+        canvases, scales, pads = [], [], []
+        for slot, crop in enumerate(crops):
+            canvas, scale, pad = preprocessor.letterbox(crop, size, slot=slot)
+            canvases.append(canvas)
+            scales.append(scale)
+            pads.append(pad)
+        pred = self.infer(preprocessor.to_tensor(canvases))
+
+        # Map every candidate from its tile's input coordinates into the frame in one step
+        image_index, boxes, class_conf, class_id = self._candidates(pred, conf_threshold, class_filter)
+        scales = torch.tensor(scales, dtype=boxes.dtype, device=boxes.device)[image_index, None]
+        shifts = torch.tensor(offsets, dtype=boxes.dtype, device=boxes.device)[image_index].repeat(1, 2)
+        pads = torch.tensor(pads, dtype=boxes.dtype, device=boxes.device)[image_index].repeat(1, 2)
+        boxes = (boxes - pads) / scales + shifts
+        boxes[:, 0::2] = boxes[:, 0::2].clamp(0, frame.shape[1])
+        boxes[:, 1::2] = boxes[:, 1::2].clamp(0, frame.shape[0])
+        return self._to_detections(self._suppress(boxes, class_conf, class_id, iou_threshold))
+
+    def _to_detections(self, result):
+        """Wrap an (n, 6) result array in a DetectionBatch, without copying it."""
+        return DetectionBatch.from_result(result, self.names)
+
     def draw_bboxes(self, frame, detections):
         """
         Draw bounding boxes on the frame.
         :param frame: The input frame.
-        :param detections: List of detected objects.
+        :param detections: DetectionBatch, or list of detected objects.
         :return: Frame with bounding boxes drawn.
         """
-        for detection in detections:
-            label = detection['label']
-            confidence = detection['confidence']
-            bbox = detection['bbox']
-
-            # Draw bounding box
-            cv2.rectangle(frame, (bbox[0], bbox[1]), (bbox[2], bbox[3]), (0, 255, 0), 2)
-
-            # Display label and confidence
-            text = f"{label}: {confidence:.2f}"
-            cv2.putText(frame, text, (bbox[0], bbox[1] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-
-        return frame
+        return overlay_renderer.draw(frame, detections, names=self.names)
@@ -0,0 +1,40 @@
+# File: object_detection/tiling.py
+
+import math
+
+
+def tile_windows(frame_shape, grid, overlap=0.2, zones=None):
+    """
+    Split a frame into a grid of equally sized, overlapping tiles.
+    :param frame_shape: Shape of the frame (height, width, ...).
+    :param grid: (columns, rows) of the tile grid.
+    :param overlap: Fraction of a tile shared with its neighbour; objects smaller than the
+                    overlap appear whole in at least one tile.
+    :param zones: Optional list of (x1, y1, x2, y2) regions of interest, normalised to [0, 1].
+                  Only tiles intersecting a zone are returned.
+    :return: List of (x1, y1, x2, y2) tile windows in pixels.
+    """
+    height, width = frame_shape[:2]
+    columns, rows = grid
+    tile_w = min(width, math.ceil(width / (columns - (columns - 1) * overlap)))
+    tile_h = min(height, math.ceil(height / (rows - (rows - 1) * overlap)))
+
+    def starts(length, tile, count):
+        if count == 1:
+            return [(length - tile) // 2]
+        step = (length - tile) / (count - 1)
+        return [round(i * step) for i in range(count)]
+
+    windows = [
+        (x, y, x + tile_w, y + tile_h)
+        for y in starts(height, tile_h, rows)
+        for x in starts(width, tile_w, columns)
+    ]
+    if zones:
+        pixel_zones = [(zx1 * width, zy1 * height, zx2 * width, zy2 * height) for zx1, zy1, zx2, zy2 in zones]
+        windows = [
+            window for window in windows
+            if any(window[0] < zx2 and zx1 < window[2] and window[1] < zy2 and zy1 < window[3]
+                   for zx1, zy1, zx2, zy2 in pixel_zones)
+        ]
+    return windows
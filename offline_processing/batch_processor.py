@@ -0,0 +1,230 @@
+# File: offline_processing/batch_processor.py
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+from anomaly_detection.anomaly_detector import area_for_bbox
+from configs.camera_profiles import camera_profiles
+from configs.config import offline_config, restricted_areas
+from data_analytics.analytics_manager import AnalyticsManager
+from data_analytics.anomaly_report import AnomalyReport
+from offline_processing.chunking import video_info, keyframe_times, plan_chunks, read_chunk
+from offline_processing.stitching import stitch_tracks
+from preprocessing.frame_preprocessor import FramePreprocessor
+from tracking.tracker import Tracker
+
+INTERACTION_FRAMES = 3      # Consecutive detections of a phone next to a person, as ObjectInteractionDetector
+INTERACTION_DISTANCE = 100  # Pixels between box centres
+INTERACTION_COOLDOWN = 30   # Seconds of video between interaction anomalies for the same track
+
+# Per worker process, set by _init_worker
+_detector = None
+_preprocessor = None
+
+
+def _init_worker(threads):
+    """Load the model once per worker process; each worker gets a share of the cores."""
+    global _detector, _preprocessor
+    import torch
+    torch.set_num_threads(threads)
+    from object_detection.object_detector import ObjectDetector
+    _preprocessor = FramePreprocessor()
+    _detector = ObjectDetector(_preprocessor)
+
+
+def process_chunk(task):
+    """
+    Run batched detection and tracking over one chunk of a video, in a worker process.
+    :param task: (video index, chunk index, path, start, end, stride, batch size, input size, classes).
+    :return: Chunk result with 'video', 'index', 'start', 'end', 'frames', 'times' (of the frames detected on),
+             'observations' and 'elapsed'.
+    """
+    video, index, path, start, end, stride, batch_size, size, classes = task
+    started = time.perf_counter()
+    class_filter = _detector.class_filter(classes) if classes else None
+    tracker = Tracker()
+    observations = []
+    times = []
+    frames = 0
+
+    def flush(batch):
+        results = _detector.detect_batch([f for _, f in batch], size, class_filter=class_filter)
+        for (timestamp, _), detections in zip(batch, results):
+            times.append(round(timestamp, 3))
+            rows = zip(tracker.assign_ids(detections), detections.class_ids.tolist(),
+                       detections.scores.tolist(), detections.boxes.astype(int).tolist())
+            for track_id, class_id, confidence, bbox in rows:
+                observations.append({
+                    'time': round(timestamp, 3),
+                    'track_id': track_id,
+                    'class_name': detections.class_name(class_id),
+                    'confidence': round(confidence, 3),
+                    'bbox': bbox
+                })
+
+    batch = []
+    try:
+        for timestamp, frame in read_chunk(path, start, end, stride):
+            batch.append((timestamp, frame))
+            frames += 1
+            if len(batch) == batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+    except Exception as e:
+        print(f"Error processing {path} [{start:.1f}s, {end:.1f}s): {e}")
+        raise
+
+    return {'video': video, 'index': index, 'start': start, 'end': end, 'frames': frames, 'times': times,
+            'observations': observations, 'elapsed': time.perf_counter() - started}
+
+
+def find_loitering(observations, frame_size, max_gap, areas=None):
+    """
+    Intervals in which a person track stays in a restricted area for longer than the area's time threshold.
+    :param areas: Restricted areas like restricted_areas, e.g. a camera profile's zones; defaults to restricted_areas.
+    :return: List of (track id, entry time, duration, area name).
+    """
+    areas = restricted_areas if areas is None else areas
+    found = []
+    current = {}  # track id -> [area, entry time, last seen]
+
+    def close(track_id):
+        area, entry, last = current.pop(track_id)
+        if area is not None and last - entry > areas[area]['time_threshold']:
+            found.append((track_id, entry, last - entry, area))
+
+    for observation in observations:
+        if observation['class_name'] != 'person':
+            continue
+        track_id, now = observation['track_id'], observation['time']
+        area = area_for_bbox(observation['bbox'], frame_size, areas)
+        state = current.get(track_id)
+        if state is not None and (state[0] != area or now - state[2] > max_gap):
+            close(track_id)
+            state = None
+        if state is None:
+            current[track_id] = [area, now, now]
+        else:
+            state[2] = now
+    for track_id in list(current):
+        close(track_id)
+    return found
+
+
+def find_interactions(observations, times=()):
+    """
+    Person tracks seen with a cell phone next to them on consecutive detected frames.
+    :param times: Times of every frame detected on, including those without detections, which end a streak.
+    :return: List of (person track id, time).
+    """
+    frames = {now: [] for now in times}
+    for observation in observations:
+        frames.setdefault(observation['time'], []).append(observation)
+
+    found = []
+    streaks, last_alert = {}, {}
+    for now in sorted(frames):
+        persons = [o for o in frames[now] if o['class_name'] == 'person']
+        phones = [o for o in frames[now] if o['class_name'] == 'cell phone']
+        near = set()
+        for person in persons:
+            px, py = (person['bbox'][0] + person['bbox'][2]) / 2, (person['bbox'][1] + person['bbox'][3]) / 2
+            for phone in phones:
+                qx, qy = (phone['bbox'][0] + phone['bbox'][2]) / 2, (phone['bbox'][1] + phone['bbox'][3]) / 2
+                if ((px - qx) ** 2 + (py - qy) ** 2) ** 0.5 < INTERACTION_DISTANCE:
+                    near.add(person['track_id'])
+                    break
+        streaks = {track_id: streaks.get(track_id, 0) + 1 for track_id in near}
+        for track_id, count in streaks.items():
+            if count >= INTERACTION_FRAMES and now - last_alert.get(track_id, float('-inf')) > INTERACTION_COOLDOWN:
+                found.append((track_id, now))
+                last_alert[track_id] = now
+    return found
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser(description='Run detection, tracking and anomaly rules over recorded video files')
+    parser.add_argument('videos', nargs='+', help='video files to process')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes, defaults to cores / threads')
+    parser.add_argument('--threads', type=int, default=1, help='torch threads per worker process')
+    parser.add_argument('--chunk', type=float, default=offline_config['chunk_seconds'], help='seconds per chunk')
+    parser.add_argument('--batch', type=int, default=offline_config['batch_size'], help='frames per model call')
+    parser.add_argument('--stride', type=int, default=offline_config['stride'], help='detect on every Nth frame')
+    parser.add_argument('--size', type=int, default=None, help='model input size')
+    parser.add_argument('--classes', nargs='+', default=offline_config['classes'],
+                        help='class names to detect, others are dropped before NMS (default: all)')
+    parser.add_argument('--camera', type=str, default=None,
+                        help='camera whose restricted areas (zones in the camera settings) apply to the footage')
+    parser.add_argument('--start-time', type=str, default=None,
+                        help='wall-clock time of the start of the footage (ISO 8601), for anomaly timestamps')
+    parser.add_argument('--output', type=str, default='offline_results', help='directory for tracks and anomalies')
+    return parser.parse_args()
+
+
+def main(opt):
+    workers = opt.workers or max(1, (os.cpu_count() or 1) // opt.threads)
+    base_time = datetime.fromisoformat(opt.start_time).timestamp() if opt.start_time else 0.0
+    output_dir = Path(opt.output)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    areas = camera_profiles.get(opt.camera).zones if opt.camera else restricted_areas
+    unset = [name for name, area in areas.items() if area['is_restricted'] and not area.get('region')]
+    if unset:
+        print(f"No region set for restricted area {', '.join(unset)} of {opt.camera or 'the default settings'}; "
+              f"loitering there is not detected")
+
+    tasks, infos = [], []
+    for video, path in enumerate(opt.videos):
+        fps, duration, frame_size = video_info(path)
+        chunks = plan_chunks(duration, opt.chunk, keyframe_times(path))
+        infos.append((path, duration, frame_size))
+        print(f"{path}: {duration:.0f} s at {fps:.1f} fps, {len(chunks)} chunks")
+        for index, (start, end) in enumerate(chunks):
+            tasks.append((video, index, str(path), start, end, opt.stride, opt.batch, opt.size, opt.classes))
+
+    started = time.perf_counter()
+    results = [[] for _ in opt.videos]
+    context = multiprocessing.get_context('spawn')  # Workers must not inherit torch state
+    with context.Pool(workers, initializer=_init_worker, initargs=(opt.threads,)) as pool:
+        for done, result in enumerate(pool.imap_unordered(process_chunk, tasks), 1):
+            results[result['video']].append(result)
+            print(f"  [{done}/{len(tasks)}] {opt.videos[result['video']]} chunk {result['index']}: "
+                  f"{result['frames']} frames in {result['elapsed']:.1f} s")
+    elapsed = time.perf_counter() - started
+
+    analytics_manager = AnalyticsManager()
+    for (path, duration, frame_size), chunks in zip(infos, results):
+        chunks.sort(key=lambda chunk: chunk['index'])
+        observations = stitch_tracks(chunks, offline_config['link_window'], offline_config['link_iou'])
+        tag = Path(path).stem
+
+        with open(output_dir / f"{tag}_tracks.jsonl", 'w') as f:
+            for observation in observations:
+                f.write(json.dumps(observation) + '\n')
+
+        for track_id, entry, length, area in find_loitering(observations, frame_size, offline_config['max_gap'],
+                                                            areas):
+            analytics_manager.record_anomaly(f"{tag}:track_{track_id}", base_time + entry, length, "loitering", area)
+        times = [now for chunk in chunks for now in chunk['times']]
+        for track_id, now in find_interactions(observations, times):
+            analytics_manager.record_anomaly(f"{tag}:track_{track_id}", base_time + now,
+                                             anomaly_type="person_with_phone", location=tag)
+
+    report_path = output_dir / 'anomalies.csv'
+    AnomalyReport(analytics_manager).export_csv(report_path)
+
+    footage = sum(duration for _, duration, _ in infos)
+    print(f"Processed {footage:.0f} s of video in {elapsed:.0f} s with {workers} workers "
+          f"({footage / max(elapsed, 1e-9):.1f}x real time)")
+    print(f"{len(analytics_manager.anomalies)} anomalies saved to {report_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main(parse_opt()))
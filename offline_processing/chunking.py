@@ -0,0 +1,116 @@
+# File: offline_processing/chunking.py
+
+import cv2
+
+try:
+    import av  # Optional: exact keyframe positions and keyframe seeking
+except ImportError:
+    av = None
+
+
+def video_info(path):
+    """
+    :return: (fps, duration in seconds, (height, width)) of a video file.
+    """
+    capture = cv2.VideoCapture(str(path))
+    if not capture.isOpened():
+        raise ValueError(f"Cannot open video file: {path}")
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        frames = capture.get(cv2.CAP_PROP_FRAME_COUNT)
+        size = (int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)))
+    finally:
+        capture.release()
+    return fps, frames / fps, size
+
+
+def keyframe_times(path):
+    """
+    Timestamps of the video keyframes, read by demuxing only (no decoding).
+    :return: Sorted list of seconds, or None without PyAV.
+    """
+    if av is None:
+        return None
+    with av.open(str(path)) as container:
+        stream = container.streams.video[0]
+        times = [float(packet.pts * packet.time_base) for packet in container.demux(stream)
+                 if packet.is_keyframe and packet.pts is not None]
+    return sorted(times)
+
+
+def plan_chunks(duration, chunk_seconds, keyframes=None):
+    """
+    Split a video into consecutive [start, end) time ranges.
+    With keyframe times, every boundary is moved back onto a keyframe, so a worker seeking to
+    its start does not decode frames that belong to the previous chunk.
+    :return: List of (start, end) seconds covering the whole video.
+    """
+    bounds = [0.0]
+    position = chunk_seconds
+    while position < duration:
+        bound = position
+        if keyframes:
+            earlier = [t for t in keyframes if bounds[-1] < t <= position]
+            if earlier:
+                bound = earlier[-1]
+        bounds.append(bound)
+        position = bound + chunk_seconds
+    bounds.append(float('inf'))  # The last chunk runs to the end, whatever the container claims
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def read_chunk(path, start, end, stride=1):
+    """
+    Decode the frames whose timestamp falls in [start, end).
+    Seeks to the keyframe at or before start, so each chunk decodes independently of the others.
+    Frames skipped by the stride are decoded but never converted to BGR arrays.
+    :return: Generator of (timestamp in seconds, BGR frame).
+    """
+    if av is not None:
+        yield from _read_chunk_av(path, start, end, stride)
+    else:
+        yield from _read_chunk_opencv(path, start, end, stride)
+
+
+def _read_chunk_av(path, start, end, stride):
+    with av.open(str(path)) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = 'AUTO'
+        if start > 0:
+            container.seek(int(start / stream.time_base), stream=stream, backward=True, any_frame=False)
+        index = 0
+        for frame in container.decode(stream):
+            if frame.pts is None:
+                continue
+            timestamp = float(frame.pts * stream.time_base)
+            if timestamp < start:
+                continue
+            if timestamp >= end:
+                break
+            if index % stride == 0:
+                yield timestamp, frame.to_ndarray(format='bgr24')
+            index += 1
+
+
+def _read_chunk_opencv(path, start, end, stride):
+    capture = cv2.VideoCapture(str(path))
+    if not capture.isOpened():
+        raise ValueError(f"Cannot open video file: {path}")
+    try:
+        if start > 0:
+            # The FFmpeg backend seeks to the previous keyframe and decodes forward to the position
+            capture.set(cv2.CAP_PROP_POS_MSEC, start * 1000)
+        index = 0
+        while capture.grab():
+            timestamp = capture.get(cv2.CAP_PROP_POS_MSEC) / 1000
+            if timestamp < start:
+                continue
+            if timestamp >= end:
+                break
+            if index % stride == 0:
+                ret, frame = capture.retrieve()
+                if ret:
+                    yield timestamp, frame
+            index += 1
+    finally:
+        capture.release()
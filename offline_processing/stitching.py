@@ -0,0 +1,80 @@
+# File: offline_processing/stitching.py
+
+import numpy as np
+
+
+def box_iou(a, b):
+    """
+    :param a: (N, 4) xyxy boxes.
+    :param b: (M, 4) xyxy boxes.
+    :return: (N, M) intersection over union.
+    """
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    intersection = np.clip(bottom_right - top_left, 0, None).prod(2)
+    area_a = (a[:, 2:] - a[:, :2]).prod(1)
+    area_b = (b[:, 2:] - b[:, :2]).prod(1)
+    return intersection / np.maximum(area_a[:, None] + area_b[None, :] - intersection, 1e-9)
+
+
+def _track_ends(observations):
+    """:return: {local id: (first observation, last observation)} of a chunk, observations sorted by time."""
+    ends = {}
+    for observation in observations:
+        track_id = observation['track_id']
+        if track_id in ends:
+            ends[track_id] = (ends[track_id][0], observation)
+        else:
+            ends[track_id] = (observation, observation)
+    return ends
+
+
+def stitch_tracks(chunks, link_window=1.0, link_iou=0.3):
+    """
+    Give tracks of independently processed chunks video-wide IDs.
+    Each chunk's tracker numbers its tracks from zero; a track still visible at the end of a chunk is
+    re-linked to the overlapping track of the same class that appears at the start of the next one.
+    :param chunks: Chunk results ordered by start time, each with 'start', 'end' and 'observations'
+                   (dicts with 'time', 'track_id', 'class_name' and 'bbox').
+    :param link_window: Seconds before and after a boundary in which track ends are considered.
+    :param link_iou: Minimum box overlap for a link.
+    :return: All observations in time order, 'track_id' replaced by the video-wide ID.
+    """
+    next_id = 0
+    stitched = []
+    previous_ends, previous_ids, previous_end = {}, {}, None
+    for chunk in chunks:
+        observations = sorted(chunk['observations'], key=lambda o: o['time'])
+        ends = _track_ends(observations)
+        ids = {}
+
+        if previous_end is not None:
+            # Tracks last seen shortly before the boundary, and first seen shortly after it
+            leaving = [(local_id, last) for local_id, (_, last) in previous_ends.items()
+                       if last['time'] >= previous_end - link_window]
+            entering = [(local_id, first) for local_id, (first, _) in ends.items()
+                        if first['time'] <= chunk['start'] + link_window]
+            if leaving and entering:
+                iou = box_iou([o['bbox'] for _, o in leaving], [o['bbox'] for _, o in entering])
+                same_class = np.array([[a['class_name'] == b['class_name'] for _, b in entering] for _, a in leaving])
+                iou[~same_class] = 0
+                # Greedy assignment, best overlap first
+                for flat in np.argsort(-iou, axis=None):
+                    row, column = np.unravel_index(flat, iou.shape)
+                    if iou[row, column] < link_iou:
+                        break
+                    local_id = entering[column][0]
+                    if local_id in ids or previous_ids[leaving[row][0]] in ids.values():
+                        continue
+                    ids[local_id] = previous_ids[leaving[row][0]]
+
+        for local_id in ends:
+            if local_id not in ids:
+                ids[local_id] = next_id
+                next_id += 1
+        for observation in observations:
+            stitched.append(dict(observation, track_id=ids[observation['track_id']]))
+        previous_ends, previous_ids, previous_end = ends, ids, chunk['end']
+    return stitched
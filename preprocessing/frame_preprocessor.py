@@ -1,16 +1,25 @@
 # File: preprocessing/frame_preprocessor.py
 import cv2
+import numpy as np
+
+PAD_VALUE = 114  # Same grey YOLOv5 letterboxes with
 
 
 class FramePreprocessor:
-    def __init__(self, target_width=640, target_height=480):
+    def __init__(self, target_width=640, target_height=480, input_size=640):
         """
         Initialize the Frame Preprocessor.
         :param target_width: Width to resize the frame.
         :param target_height: Height to resize the frame.
+        :param input_size: Default square model input size for letterboxing.
         """
         self.target_width = target_width
         self.target_height = target_height
+        self.input_size = input_size
+
+        # Buffers reused across frames, keyed by their geometry
+        self._canvases = {}
+        self._tensors = {}
 
     def resize_frame(self, frame):
         """
@@ -24,16 +33,89 @@ class FramePreprocessor:
         """
         Normalize the frame pixel values to the range [0, 1].
         :param frame: The input frame.
-        :return: Normalized frame.
+        :return: Normalized float32 frame.
+        """
+        return np.multiply(frame, np.float32(1 / 255.0), dtype=np.float32)
+
+    def letterbox(self, frame, size=None, slot=0):
+        """
+        Resize keeping the aspect ratio into a reused size x size uint8 canvas padded with grey.
+        The padding is only written when the frame geometry changes.
+        :param frame: BGR uint8 frame.
+        :param size: Square output size, defaults to input_size.
+        :param slot: Canvas index, for letterboxing several images (e.g. tiles of a batch) at once.
+        :return: (canvas, scale, (pad_x, pad_y)); the canvas is overwritten by the next call with the same slot.
+        """
+        size = size or self.input_size
+        h0, w0 = frame.shape[:2]
+        key = (h0, w0, size, slot)
+        entry = self._canvases.get(key)
+        if entry is None:
+            scale = min(size / h0, size / w0)
+            w, h = round(w0 * scale), round(h0 * scale)
+            pad_x, pad_y = (size - w) // 2, (size - h) // 2
+            canvas = np.full((size, size, 3), PAD_VALUE, dtype=np.uint8)
+            region = canvas[pad_y:pad_y + h, pad_x:pad_x + w]
+            entry = self._canvases[key] = (canvas, region, scale, (pad_x, pad_y))
+        canvas, region, scale, pad = entry
+
+        if scale == 1:
+            np.copyto(region, frame)
+        else:
+            interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+            cv2.resize(frame, (region.shape[1], region.shape[0]), dst=region, interpolation=interpolation)
+        return canvas, scale, pad
+
+    def to_tensor(self, images, out=None):
+        """
+        Convert letterboxed BGR uint8 images to a float32 NCHW RGB tensor in [0, 1].
+        Channel reversal, layout change and scaling are done in a single pass per image.
+        :param images: List of equally sized HxWx3 uint8 images.
+        :param out: Optional preallocated (N, 3, H, W) float32 array to fill.
+        :return: The filled array.
         """
-        return frame / 255.0
+        height, width = images[0].shape[:2]
+        if out is None:
+            key = (len(images), height, width)
+            out = self._tensors.get(key)
+            if out is None:
+                out = self._tensors[key] = np.empty((len(images), 3, height, width), dtype=np.float32)
+        for index, image in enumerate(images):
+            np.multiply(image[..., ::-1].transpose(2, 0, 1), np.float32(1 / 255.0), out=out[index])
+        return out
+
+    def prepare(self, frame, size=None):
+        """
+        Letterbox a frame straight into the model input tensor.
+        :param frame: BGR uint8 frame.
+        :param size: Square model input size, defaults to input_size.
+        :return: (tensor of shape (1, 3, size, size), scale, (pad_x, pad_y)); the tensor is reused by the next call.
+        """
+        canvas, scale, pad = self.letterbox(frame, size)
+        return self.to_tensor([canvas]), scale, pad
 
     def preprocess(self, frame):
         """
-        Resize and normalize the frame.
+        Prepare the frame as model input.
         :param frame: The input frame.
-        :return: Preprocessed frame.
+        :return: (tensor, scale, (pad_x, pad_y)) as returned by prepare.
         """
-        resized_frame = self.resize_frame(frame)
-        normalized_frame = self.normalize_frame(resized_frame)
-        return normalized_frame
+        return self.prepare(frame)
+
+
+def scale_boxes(boxes, scale, pad, frame_shape):
+    """
+    Map xyxy boxes from letterboxed model input coordinates back onto the original frame, in place.
+    :param boxes: (N, 4) float array.
+    :param scale: Scale returned by letterbox.
+    :param pad: (pad_x, pad_y) returned by letterbox.
+    :param frame_shape: Shape of the original frame.
+    :return: The boxes array.
+    """
+    xs, ys = boxes[:, 0::2], boxes[:, 1::2]  # Views on (x1, x2) and (y1, y2)
+    xs -= pad[0]
+    ys -= pad[1]
+    boxes /= scale
+    np.clip(xs, 0, frame_shape[1], out=xs)
+    np.clip(ys, 0, frame_shape[0], out=ys)
+    return boxes
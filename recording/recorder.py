@@ -0,0 +1,246 @@
+# File: recording/recorder.py
+
+import queue
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from configs.config import recording_config, camera_config
+from recording.writers import EncodedPacket, PacketClipWriter, FrameClipWriter
+from recording.storage import disk_quota
+
+# Capture backends that hand the recorder encoded packets, so clips need no re-encoding
+PACKET_BACKENDS = ('pyav',)
+
+
+def event_clips_enabled(backend):
+    """
+    Whether cameras on a capture backend keep a pre-roll buffer for event clips.
+    With recording_config["event_clips"] set to 'packets' (the default) only backends that deliver
+    encoded packets do; buffering decoded frames costs far more memory and re-encoding.
+    """
+    setting = recording_config["event_clips"]
+    if setting == 'packets':
+        return backend in PACKET_BACKENDS
+    return bool(setting)
+
+
+class CameraRecorder:
+    def __init__(self, camera_name, root=None, fps=None):
+        """
+        Event clips and continuous segmented recording for one camera.
+        The capture thread only appends to an in-memory pre-roll buffer and a queue; files are
+        written by a background thread. With the PyAV backend the buffer holds the camera's
+        encoded packets, which are remuxed without re-encoding; other backends fall back to
+        encoding decoded frames. Decoded frames are large, so the buffer and the queue are also
+        bounded by bytes (max_buffer_mb, max_queue_mb), which shortens the pre-roll of
+        high-resolution cameras on such backends.
+        :param camera_name: Camera the recordings belong to.
+        :param root: Recording directory, defaults to recording_config["root"].
+        :param fps: Nominal frame rate, e.g. the camera profile's fps, defaults to camera_config["fps"].
+                    Frame-based recordings use the rate frames actually arrive at when it can be measured.
+        """
+        self.camera_name = camera_name
+        self.camera_tag = str(camera_name or 'camera').replace(' ', '_')
+        self.root = Path(root or recording_config["root"])
+        self.fps = fps or camera_config.get("fps", 30)
+        self.pre_roll = recording_config["pre_roll"]
+        self.post_roll = recording_config["post_roll"]
+        self.segment_length = recording_config["segment_length"]
+        self.quota = disk_quota(self.root, recording_config["max_disk_gb"] * 2 ** 30)
+        self.max_buffer_bytes = recording_config["max_buffer_mb"] * 2 ** 20
+        self.max_queue_bytes = recording_config["max_queue_mb"] * 2 ** 20
+
+        self.buffer = deque()  # (arrival time, item, keyframe)
+        self.buffer_bytes = 0
+        self.queued_bytes = 0  # Bytes of the items waiting for the writer
+        self.pre_roll_limited = False  # Whether the byte bound was reported
+        self.stream = None     # PyAV input stream while packets are being received
+        self.last_packet = float('-inf')
+        self.clip_until = None
+        self.segment_start = None
+        self.continuous = False
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+        self.queue = queue.Queue(maxsize=recording_config["queue_size"])
+        self.thread = None
+
+    # Called from the capture thread
+
+    def add_packet(self, packet, stream):
+        """Buffer a demuxed PyAV packet."""
+        now = time.monotonic()
+        self.stream = stream
+        self.last_packet = now
+        item = EncodedPacket(bytes(packet), packet.pts, packet.dts, packet.is_keyframe, packet.time_base)
+        self._add(now, item, item.keyframe)
+
+    def add_frame(self, frame):
+        """Buffer a decoded frame; ignored while the backend delivers packets."""
+        now = time.monotonic()
+        if now - self.last_packet < 1.0:
+            return
+        self._add(now, frame, True)
+
+    def _add(self, now, item, keyframe):
+        with self.lock:
+            self.buffer.append((now, item, keyframe))
+            self.buffer_bytes += _size(item)
+            while len(self.buffer) > 1 and (now - self.buffer[0][0] > self.pre_roll
+                                            or self.buffer_bytes > self.max_buffer_bytes):
+                if now - self.buffer[0][0] <= self.pre_roll and not self.pre_roll_limited:
+                    self.pre_roll_limited = True
+                    print(f"Pre-roll of {self.camera_name} limited to {now - self.buffer[0][0]:.1f} s "
+                          f"by max_buffer_mb")
+                self.buffer_bytes -= _size(self.buffer.popleft()[1])
+
+            if self.clip_until is not None:
+                if now > self.clip_until:
+                    self.clip_until = None
+                    self._send(('close', 'clip'))
+                else:
+                    self._send(('write', 'clip', item))
+
+            if self.continuous:
+                # Segments are cut at keyframes, so every file starts decodable
+                if self.segment_start is None or (keyframe and now - self.segment_start >= self.segment_length):
+                    if self.segment_start is not None:
+                        self._send(('close', 'segment'))
+                    self.segment_start = now
+                    self._send(('open', 'segment', self._path('segments'), [], self._frame_rate()))
+                self._send(('write', 'segment', item))
+
+    # Called from any thread
+
+    def trigger(self, reason=None):
+        """
+        Record a clip from pre_roll seconds before now until post_roll seconds after the last trigger.
+        :return: Path of the new clip, or None if an ongoing clip was extended.
+        """
+        with self.lock:
+            until = time.monotonic() + self.post_roll
+            if self.clip_until is not None:
+                self.clip_until = max(self.clip_until, until)
+                return None
+            self.clip_until = until
+            # Start at the first buffered keyframe
+            items = list(self.buffer)
+            start = next((i for i, (_, _, keyframe) in enumerate(items) if keyframe), len(items))
+            path = self._path('clips', reason)
+            self._send(('open', 'clip', path, [item for _, item, _ in items[start:]], self._frame_rate()))
+            return path
+
+    def start_continuous(self):
+        with self.lock:
+            self.continuous = True
+            self.segment_start = None
+
+    def stop_continuous(self):
+        with self.lock:
+            if self.continuous and self.segment_start is not None:
+                self._send(('close', 'segment'))
+            self.continuous = False
+            self.segment_start = None
+
+    def close(self, timeout=0):
+        """
+        Finish open files. The writer closes them in the background, so this does not block by default.
+        :param timeout: Seconds to wait for the writer to drain its queue, None to wait until it has.
+        :return: True if the writer has drained its queue (or never started), False if still writing.
+        """
+        with self.lock:
+            if self.clip_until is not None:
+                self.clip_until = None
+                self._send(('close', 'clip'))
+        self.stop_continuous()
+        if self.thread is None:
+            return True
+        drained = threading.Event()
+        with self.lock:
+            self._send(('flush', None, drained))
+        return drained.wait(timeout) if timeout != 0 else drained.is_set()
+
+    # Writer
+
+    def _frame_rate(self):
+        """
+        Rate decoded frames arrive at, measured over the pre-roll buffer; called with the lock held.
+        A clip encoded at a different rate would play too fast or too slow.
+        """
+        if len(self.buffer) >= 2:
+            span = self.buffer[-1][0] - self.buffer[0][0]
+            if span > 0:
+                return (len(self.buffer) - 1) / span
+        return self.fps
+
+    def _path(self, kind, reason=None):
+        suffix = '.mp4' if self.stream is not None and time.monotonic() - self.last_packet < 1.0 else '.avi'
+        now = time.time()
+        name = f"{self.camera_tag}_{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}-{int(now * 1000) % 1000:03d}"
+        if reason:
+            name += '_' + str(reason).replace(' ', '-')
+        return self.root / kind / self.camera_tag / (name + suffix)
+
+    def _send(self, message):
+        """Queue a message for the writer; called with the lock held."""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._write_loop, daemon=True)
+            self.thread.start()
+        size = _message_size(message)
+        if size and self.queued_bytes + size > self.max_queue_bytes:
+            self.dropped += 1
+            return
+        try:
+            self.queue.put_nowait(message)
+            self.queued_bytes += size
+        except queue.Full:
+            self.dropped += 1
+
+    def _open_writer(self, path, fps):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix == '.mp4':
+            return PacketClipWriter(path, self.stream)
+        return FrameClipWriter(path, fps, recording_config["frame_codec"])
+
+    def _write_loop(self):
+        writers = {}
+        while True:
+            message = self.queue.get()
+            try:
+                action, kind = message[0], message[1]
+                if action == 'open':
+                    if kind in writers:
+                        writers.pop(kind).close()
+                    writers[kind] = self._open_writer(message[2], message[4])
+                    for item in message[3]:
+                        writers[kind].write(item)
+                elif action == 'write' and kind in writers:
+                    writers[kind].write(message[2])
+                elif action == 'close' and kind in writers:
+                    writer = writers.pop(kind)
+                    writer.close()
+                    print(f"Saved recording {writer.path}")
+                    self.quota.add(writer.path)
+                elif action == 'flush':
+                    message[2].set()
+            except Exception as e:
+                print(f"Error writing recording for {self.camera_name}: {e}")
+                writers.pop(message[1], None)
+            finally:
+                size = _message_size(message)
+                if size:
+                    with self.lock:
+                        self.queued_bytes -= size
+                self.queue.task_done()
+
+
+def _size(item):
+    """Bytes held by a buffered packet or frame."""
+    return len(item.data) if isinstance(item, EncodedPacket) else item.nbytes
+
+
+def _message_size(message):
+    """Bytes a message adds to the queue; the pre-roll of an 'open' is shared with the buffer."""
+    return _size(message[2]) if message[0] == 'write' else 0
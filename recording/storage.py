@@ -0,0 +1,77 @@
+# File: recording/storage.py
+
+import threading
+from collections import deque
+from pathlib import Path
+
+# Deleted first when over quota: continuous segments, then event clips
+KINDS = ('segments', 'clips')
+
+
+class DiskQuota:
+    def __init__(self, root, max_bytes):
+        """
+        Keep the recordings under root within max_bytes, deleting the oldest files first.
+        The directory is scanned once; after that a running total is kept of the files
+        reported by add, so closing a file costs no directory walk.
+        :param root: Recording directory, with segments/ and clips/ below it.
+        :param max_bytes: Disk space the recordings may use.
+        """
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.files = None  # Kind -> deque of (size, path), oldest first; scanned on first use
+        self.total = 0
+        self.lock = threading.Lock()
+
+    def _scan(self):
+        self.files = {}
+        for kind in KINDS:
+            found = []
+            for path in (self.root / kind).rglob('*'):
+                if path.is_file():
+                    stat = path.stat()
+                    found.append((stat.st_mtime, stat.st_size, path))
+            self.files[kind] = deque((size, path) for _, size, path in sorted(found, key=lambda f: f[0]))
+            self.total += sum(size for _, size, _ in found)
+
+    def add(self, path):
+        """
+        Account for a newly closed recording and delete the oldest ones if over quota.
+        :return: Number of files deleted.
+        """
+        path = Path(path)
+        with self.lock:
+            if self.files is None:
+                self._scan()  # Includes the new file
+            else:
+                kind = path.parent.parent.name  # <root>/<kind>/<camera>/<file>
+                size = path.stat().st_size if path.exists() else 0
+                self.files.setdefault(kind, deque()).append((size, path))
+                self.total += size
+            return self._evict()
+
+    def _evict(self):
+        deleted = 0
+        for kind in KINDS:
+            files = self.files.get(kind, ())
+            while self.total > self.max_bytes and files:
+                size, path = files.popleft()
+                path.unlink(missing_ok=True)
+                self.total -= size
+                deleted += 1
+        return deleted
+
+
+_quotas = {}
+_quotas_lock = threading.Lock()
+
+
+def disk_quota(root, max_bytes):
+    """:return: The DiskQuota shared by all recorders writing below root."""
+    key = Path(root).resolve()
+    with _quotas_lock:
+        quota = _quotas.get(key)
+        if quota is None:
+            quota = _quotas[key] = DiskQuota(root, max_bytes)
+        quota.max_bytes = max_bytes
+        return quota
@@ -0,0 +1,70 @@
+# File: recording/writers.py
+
+from collections import namedtuple
+from pathlib import Path
+
+import cv2
+
+# Compressed packet as demuxed from the camera. Data is copied out of the demuxer's packet,
+# so it can be kept in the pre-roll buffer and written to several files
+EncodedPacket = namedtuple('EncodedPacket', ['data', 'pts', 'dts', 'keyframe', 'time_base'])
+
+
+class PacketClipWriter:
+    def __init__(self, path, stream):
+        """
+        Write demuxed packets to a file without re-encoding (PyAV remux).
+        Timestamps are rebased so each file starts at zero.
+        :param path: Output file path; the container format follows the suffix.
+        :param stream: Input PyAV video stream used as the codec template.
+        """
+        import av  # Only available with the pyav capture backend
+
+        self.path = Path(path)
+        self.container = av.open(str(self.path), 'w')
+        if hasattr(self.container, 'add_stream_from_template'):
+            self.stream = self.container.add_stream_from_template(stream)
+        else:
+            self.stream = self.container.add_stream(template=stream)
+        self._packet = av.Packet
+        self.base = None
+
+    def write(self, item):
+        if item.dts is None and item.pts is None:
+            return
+        if self.base is None:
+            self.base = item.dts if item.dts is not None else item.pts
+        packet = self._packet(item.data)
+        packet.pts = None if item.pts is None else item.pts - self.base
+        packet.dts = None if item.dts is None else item.dts - self.base
+        packet.time_base = item.time_base
+        if item.keyframe:
+            packet.is_keyframe = True
+        packet.stream = self.stream
+        self.container.mux(packet)
+
+    def close(self):
+        self.container.close()
+
+
+class FrameClipWriter:
+    def __init__(self, path, fps, codec='mp4v'):
+        """
+        Encode decoded frames with cv2.VideoWriter, for backends that do not expose packets.
+        The writer is opened on the first frame, once the frame size is known.
+        """
+        self.path = Path(path)
+        self.fps = fps
+        self.codec = codec
+        self.writer = None
+
+    def write(self, frame):
+        if self.writer is None:
+            height, width = frame.shape[:2]
+            self.writer = cv2.VideoWriter(str(self.path), cv2.VideoWriter_fourcc(*self.codec),
+                                          self.fps, (width, height))
+        self.writer.write(frame)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.release()
@@ -0,0 +1,100 @@
+# File: test_alert_engine.py
+
+import pytest
+
+from notifications.alert_engine import AlertEngine
+
+
+def make_engine(**kwargs):
+    kwargs.setdefault('dedup_ttl', 60)
+    kwargs.setdefault('incident_window', 300)
+    kwargs.setdefault('rate_limits', {})
+    return AlertEngine(**kwargs)
+
+
+def test_repeats_within_ttl_are_deduplicated():
+    engine = make_engine()
+    assert engine.submit('loitering', 'msg', camera='Camera 1', zone='lobby', track=1, now=0) is not None
+    assert engine.submit('loitering', 'msg', camera='Camera 1', zone='lobby', track=1, now=30) is None
+    # Every repeat extends the TTL, so an ongoing condition stays quiet
+    assert engine.submit('loitering', 'msg', camera='Camera 1', zone='lobby', track=1, now=80) is None
+
+
+def test_alert_repeats_after_ttl_expires():
+    engine = make_engine(incident_window=10)
+    assert engine.submit('loitering', 'msg', camera='Camera 1', track=1, now=0) is not None
+    assert engine.submit('loitering', 'msg', camera='Camera 1', track=1, now=100) is not None
+
+
+def test_rule_ttl_overrides_engine_ttl():
+    engine = make_engine(incident_window=1)
+    assert engine.submit('person_with_phone', 'msg', camera='Camera 1', track=1, ttl=5, now=0) is not None
+    assert engine.submit('person_with_phone', 'msg', camera='Camera 1', track=1, ttl=5, now=6) is not None
+
+
+def test_cameras_are_deduplicated_separately():
+    engine = make_engine()
+    assert engine.submit('loitering', 'msg', camera='Camera 1', track=1, now=0) is not None
+    assert engine.submit('loitering', 'msg', camera='Camera 2', track=1, now=0) is not None
+
+
+def test_new_subject_or_rule_in_incident_is_announced():
+    engine = make_engine()
+    first = engine.submit('loitering', 'msg', camera='Camera 1', zone='lobby', track=1, now=0)
+    second = engine.submit('loitering', 'msg', camera='Camera 1', zone='lobby', track=2, now=1)
+    third = engine.submit('person_with_phone', 'msg', camera='Camera 1', zone='lobby', track=2, now=2)
+    assert first is not None and second is not None and third is not None
+    assert first.incident is second.incident is third.incident
+    assert first.incident.rules == {'loitering', 'person_with_phone'}
+    assert first.incident.tracks == {1, 2}
+
+
+def test_known_rule_and_subject_after_ttl_is_correlated():
+    engine = make_engine(dedup_ttl=5)
+    assert engine.submit('person_count', 'msg', camera='Camera 1', now=0) is not None
+    # Past the TTL but inside the incident: folded into the incident without a new notification
+    assert engine.submit('person_count', 'msg', camera='Camera 1', now=10) is None
+    assert engine.active_incidents(now=10)[0]['count'] == 2
+
+
+def test_deduplicated_repeats_do_not_keep_incident_open():
+    engine = make_engine(dedup_ttl=10000, incident_window=60)
+    first = engine.submit('person_count', 'msg', camera='Camera 1', now=0)
+    for now in range(30, 600, 30):
+        assert engine.submit('person_count', 'msg', camera='Camera 1', now=now) is None
+    phone = engine.submit('person_with_phone', 'msg', camera='Camera 1', track=7, now=600)
+    assert phone is not None
+    assert phone.incident is not first.incident
+
+
+def test_escalation_is_announced():
+    engine = make_engine(dedup_ttl=1)
+    assert engine.submit('crowd', 'msg', camera='Camera 1', severity='info', now=0) is not None
+    alert = engine.submit('crowd', 'msg', camera='Camera 1', severity='critical', now=5)
+    assert alert is not None
+    assert alert.incident.severity == 'critical'
+
+
+def test_rate_limit_per_severity():
+    engine = make_engine(rate_limits={'warning': (60, 2)})
+    delivered = [engine.submit('loitering', 'msg', camera=f'Camera {i}', track=1, now=0) for i in range(4)]
+    assert [alert is not None for alert in delivered] == [True, True, False, False]
+    # Other severities have their own bucket
+    assert engine.submit('intrusion', 'msg', camera='Camera 9', severity='critical', now=0) is not None
+    # One token per second refills
+    assert engine.submit('loitering', 'msg', camera='Camera 5', track=1, now=1) is not None
+
+
+def test_expired_state_is_swept():
+    engine = make_engine(dedup_ttl=5, incident_window=5)
+    for track in range(10):
+        engine.submit('loitering', 'msg', camera='Camera 1', zone=f'zone{track}', track=track, now=0)
+    engine.submit('loitering', 'msg', camera='Camera 2', track=0, now=100)
+    assert len(engine._seen) == 1
+    assert len(engine._incidents) == 1
+    assert [incident['camera'] for incident in engine.active_incidents(now=100)] == ['Camera 2']
+
+
+def test_unknown_severity_is_rejected():
+    with pytest.raises(ValueError):
+        make_engine().submit('loitering', 'msg', severity='fatal', now=0)
@@ -0,0 +1,142 @@
+# File: test_anomaly_detector.py
+
+import time
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+
+import anomaly_detection.anomaly_detector as anomaly_detector
+from anomaly_detection.anomaly_detector import LoiteringDetector, ObjectInteractionDetector
+from notifications.alert_engine import AlertEngine
+
+AREAS = {'vault': {'is_restricted': True, 'time_threshold': 10}, 'hall': {'is_restricted': False}}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(anomaly_detector, 'time', SimpleNamespace(time=clock.time, strftime=time.strftime))
+    monkeypatch.setattr(anomaly_detector, 'alert_engine', AlertEngine(rate_limits={}))
+    return clock
+
+
+def person_and_phone(track_id, x=0):
+    return [
+        {'class_name': 'person', 'confidence': 0.9, 'bbox': [x, 0, x + 50, 100], 'track_id': track_id},
+        {'class_name': 'cell phone', 'confidence': 0.8, 'bbox': [x + 10, 40, x + 30, 60]},
+    ]
+
+
+def interaction_detector():
+    detector = ObjectInteractionDetector()
+    detector.notification_manager = Mock()
+    detector.analytics_manager = Mock()
+    return detector
+
+
+def loitering_detector():
+    detector = LoiteringDetector(areas=AREAS)
+    detector.notification_manager = Mock()
+    detector.analytics_manager = Mock()
+    return detector
+
+
+def test_interaction_alerts_after_consecutive_frames(clock):
+    detector = interaction_detector()
+    results = [detector.update(person_and_phone(1), 'Camera 1') for _ in range(4)]
+    assert results == [False, False, True, False]
+    assert detector.notification_manager.alert.call_count == 1
+
+
+def test_interaction_streaks_are_kept_per_camera(clock):
+    detector = interaction_detector()
+    results = []
+    for _ in range(3):
+        results.append(detector.update(person_and_phone(1), 'Camera 1'))
+        results.append(detector.update(person_and_phone(1), 'Camera 2'))
+    # Interleaved frames of two cameras do not reset each other's streak, and track 1 of
+    # one camera is not the same person as track 1 of the other
+    assert results == [False, False, False, False, True, True]
+
+
+def test_interaction_streak_resets_when_phone_leaves(clock):
+    detector = interaction_detector()
+    detector.update(person_and_phone(1), 'Camera 1')
+    detector.update(person_and_phone(1), 'Camera 1')
+    detector.update(person_and_phone(1)[:1], 'Camera 1')
+    assert not detector.update(person_and_phone(1), 'Camera 1')
+    assert detector.active_detections == {('Camera 1', 1): 1}
+
+
+def test_distant_phone_is_ignored(clock):
+    detector = interaction_detector()
+    person, phone = person_and_phone(1)
+    phone['bbox'] = [500, 500, 520, 520]
+    assert not any(detector.update([person, phone], 'Camera 1') for _ in range(5))
+
+
+def test_loitering_alerts_once_threshold_passed(clock):
+    detector = loitering_detector()
+    assert not detector.update(1, 'vault', camera='Camera 1')
+    clock.now += 5
+    assert not detector.update(1, 'vault', camera='Camera 1')
+    clock.now += 6
+    assert detector.update(1, 'vault', camera='Camera 1')
+    # The alert engine deduplicates while the person stays
+    clock.now += 1
+    assert not detector.update(1, 'vault', camera='Camera 1')
+
+
+def test_loitering_state_is_kept_per_camera(clock):
+    detector = loitering_detector()
+    detector.update(1, 'vault', camera='Camera 1')
+    clock.now += 8
+    detector.update(1, 'vault', camera='Camera 2')
+    clock.now += 3
+    # Track 1 of Camera 2 entered later, so only Camera 1's person has loitered long enough
+    assert not detector.update(1, 'vault', camera='Camera 2')
+    assert detector.update(1, 'vault', camera='Camera 1')
+
+
+def test_loitering_resets_on_leaving_or_changing_area(clock):
+    detector = loitering_detector()
+    detector.update(1, 'vault', camera='Camera 1')
+    clock.now += 20
+    detector.update(1, 'hall', camera='Camera 1')
+    assert ('Camera 1', 1) not in detector.active_loiters
+    detector.update(1, 'vault', camera='Camera 1')
+    assert detector.active_loiters[('Camera 1', 1)]['entry_time'] == clock.now
+
+
+def test_missed_detection_keeps_the_entry_time(clock):
+    detector = loitering_detector()
+    detector.update(1, 'vault', camera='Camera 1')
+    clock.now += 6
+    detector.update(1, 'vault', camera='Camera 1')
+    # One frame without the person, e.g. a missed detection
+    clock.now += 1
+    detector.end_frame('Camera 1', [])
+    clock.now += 4
+    assert detector.update(1, 'vault', camera='Camera 1')
+
+
+def test_end_frame_forgets_people_unseen_for_max_gap_on_that_camera_only(clock):
+    detector = loitering_detector()
+    for person_id in (1, 2):
+        detector.update(person_id, 'vault', camera='Camera 1')
+        detector.update(person_id, 'vault', camera='Camera 2')
+    detector.end_frame('Camera 1', [2])
+    assert len(detector.active_loiters) == 4
+    clock.now += detector.max_gap + 1
+    detector.update(2, 'vault', camera='Camera 1')
+    detector.end_frame('Camera 1', [2])
+    assert set(detector.active_loiters) == {('Camera 1', 2), ('Camera 2', 1), ('Camera 2', 2)}
@@ -0,0 +1,42 @@
+# File: test_batch_processor.py
+
+from offline_processing.batch_processor import find_interactions, find_loitering
+
+ZONES = {'door': {'is_restricted': True, 'time_threshold': 1.5, 'region': (0.0, 0.0, 0.5, 0.5)}}
+
+
+def person(time, track_id=1, bbox=(0, 0, 10, 10)):
+    return {'time': time, 'track_id': track_id, 'class_name': 'person', 'bbox': list(bbox)}
+
+
+def phone(time, bbox=(5, 5, 10, 10)):
+    return {'time': time, 'track_id': 9, 'class_name': 'cell phone', 'bbox': list(bbox)}
+
+
+def test_loitering_uses_the_given_zones():
+    observations = [person(t) for t in (0, 1, 2)]
+    assert find_loitering(observations, (100, 100), max_gap=2, areas=ZONES) == [(1, 0, 2, 'door')]
+    # Outside the region, and the default area has no region
+    assert find_loitering([person(t, bbox=(80, 80, 90, 90)) for t in (0, 1, 2)], (100, 100), 2, ZONES) == []
+    assert find_loitering(observations, (100, 100), max_gap=2) == []
+
+
+def test_loitering_interval_ends_after_max_gap():
+    observations = [person(0), person(1), person(5), person(6)]
+    assert find_loitering(observations, (100, 100), max_gap=2, areas=ZONES) == []
+
+
+def test_interaction_needs_consecutive_frames():
+    observations = [o for t in (0, 1, 2) for o in (person(t), phone(t))]
+    assert find_interactions(observations, [0, 1, 2]) == [(1, 2)]
+
+
+def test_frame_without_detections_ends_the_streak():
+    observations = [o for t in (0, 1, 3) for o in (person(t), phone(t))]
+    assert find_interactions(observations) == [(1, 3)]  # Without the frame times the gap goes unnoticed
+    assert find_interactions(observations, [0, 1, 2, 3]) == []
+
+
+def test_phone_far_away_does_not_count():
+    observations = [o for t in (0, 1, 2) for o in (person(t), phone(t, bbox=(300, 300, 310, 310)))]
+    assert find_interactions(observations, [0, 1, 2]) == []
@@ -0,0 +1,97 @@
+# File: test_capture_backends.py
+
+import io
+
+import cv2
+import numpy as np
+import pytest
+
+import data_acquisition.capture_backends as backends
+from data_acquisition.capture_backends import FFmpegPipeCapture, open_capture
+
+
+def test_network_sources_get_transport_and_timeout():
+    options = {"rtsp_transport": "udp", "low_latency": False, "timeout": 2.5}
+    assert backends._ffmpeg_input_options('rtsp://camera/stream', options) == {
+        'rtsp_transport': 'udp', 'timeout': '2500000'}
+    assert backends._ffmpeg_input_options('http://camera/video.mjpg', options) == {'rw_timeout': '2500000'}
+    assert backends._ffmpeg_input_options('clip.mp4', options) == {}
+    assert backends._ffmpeg_input_options(0, options) == {}
+
+
+def write_video(path, count=5, size=(64, 48)):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), 10, size)
+    for i in range(count):
+        writer.write(np.full((size[1], size[0], 3), i * 40, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def test_opencv_scales_to_decode_size(tmp_path):
+    path = write_video(tmp_path / 'clip.avi')
+    capture = open_capture(str(path), {"backend": "opencv", "decode_size": (32, 24)})
+    ret, frame = capture.read()
+    assert ret and frame.shape == (24, 32, 3)
+    assert not capture.set_keyframes_only(True)
+    capture.release()
+    assert not capture.isOpened()
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match="Unsupported capture backend"):
+        open_capture('clip.mp4', {"backend": "gstreamer"})
+
+
+class FakeProcess:
+    def __init__(self, data):
+        self.stdout = io.BytesIO(data)
+        self.killed = False
+
+    def poll(self):
+        return 0 if self.killed else None
+
+    def kill(self):
+        self.killed = True
+
+    def wait(self):
+        return 0
+
+
+@pytest.fixture
+def ffmpeg(monkeypatch):
+    """Replace the ffmpeg subprocess by one that writes the raw frames in ffmpeg.output."""
+    ffmpeg = FakeProcess(b'')
+    ffmpeg.commands = []
+
+    def popen(command, **kwargs):
+        ffmpeg.commands.append(command)
+        ffmpeg.stdout = io.BytesIO(ffmpeg.output)
+        return ffmpeg
+
+    monkeypatch.setattr(backends.subprocess, 'Popen', popen)
+    return ffmpeg
+
+
+def test_ffmpeg_open_fails_without_a_frame(ffmpeg):
+    ffmpeg.output = b''
+    with pytest.raises(ConnectionError):
+        open_capture('rtsp://camera/stream', {"backend": "ffmpeg", "decode_size": (4, 2), "timeout": 1})
+    command = ffmpeg.commands[0]
+    assert command[command.index('-timeout') + 1] == '1000000'
+
+
+def test_ffmpeg_returns_the_frame_read_by_open(ffmpeg):
+    frames = [np.full((2, 4, 3), value, dtype=np.uint8) for value in (1, 2)]
+    ffmpeg.output = b''.join(frame.tobytes() for frame in frames)
+    capture = open_capture('rtsp://camera/stream', {"backend": "ffmpeg", "decode_size": (4, 2)})
+    assert [capture.read()[1][0, 0, 0] for _ in range(2)] == [1, 2]
+    assert capture.read() == (False, None)
+
+
+def test_ffmpeg_idle_switch_keeps_the_process(ffmpeg):
+    ffmpeg.output = np.zeros((2, 4, 3), dtype=np.uint8).tobytes()
+    capture = FFmpegPipeCapture('rtsp://camera/stream', {"decode_size": (4, 2)})
+    assert capture.open()
+    assert not capture.set_keyframes_only(True)
+    assert len(ffmpeg.commands) == 1 and capture.isOpened()
+    assert '-skip_frame' not in ffmpeg.commands[0]
@@ -0,0 +1,104 @@
+# File: test_connection_supervisor.py
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import data_acquisition.connection_supervisor as supervisor_module
+from data_acquisition.connection_supervisor import ConnectionSupervisor
+from metrics.pipeline_metrics import CameraMetrics
+
+
+def make_supervisor(connect, metrics=None, **settings):
+    supervisor = ConnectionSupervisor(connect, metrics)
+    supervisor.initial_delay = 0.001
+    supervisor.max_delay = 0.004
+    supervisor.jitter = 0.0
+    for name, value in settings.items():
+        setattr(supervisor, name, value)
+    return supervisor
+
+
+def failing(times):
+    """Connect function failing the given number of times, then returning a capture."""
+    attempts = []
+
+    def connect():
+        attempts.append(time.monotonic())
+        if len(attempts) <= times:
+            raise ConnectionError(f"attempt {len(attempts)} failed")
+        return 'capture'
+    connect.attempts = attempts
+    return connect
+
+
+def test_delay_grows_exponentially_up_to_the_cap():
+    supervisor = make_supervisor(failing(0), initial_delay=1.0, max_delay=5.0)
+    delays = []
+    for attempt in range(1, 6):
+        supervisor.attempt = attempt
+        delays.append(supervisor.next_delay())
+    assert delays == [1.0, 2.0, 4.0, 5.0, 5.0]
+
+
+def test_jitter_only_shortens_the_delay(monkeypatch):
+    supervisor = make_supervisor(failing(0), initial_delay=1.0, max_delay=5.0, jitter=0.5)
+    monkeypatch.setattr(supervisor_module.random, 'random', lambda: 1.0)
+    assert supervisor.next_delay() == 0.5
+
+
+def test_retries_until_connected_and_counts_failures():
+    metrics = CameraMetrics('Camera 1')
+    connect = failing(3)
+    supervisor = make_supervisor(connect, metrics)
+    assert supervisor.establish() == 'capture'
+    assert len(connect.attempts) == 4
+    assert supervisor.state == 'connected' and supervisor.last_error == "attempt 3 failed"
+    assert metrics.counters['connect_failures'] == 3
+    assert metrics.counters['reconnects'] == 0
+    assert metrics.gauges['connected'] == 1
+
+    supervisor.connection_lost("read failed")
+    assert supervisor.state == 'reconnecting' and metrics.gauges['connected'] == 0
+    assert supervisor.establish() == 'capture'
+    assert metrics.counters['reconnects'] == 1
+
+
+def test_stop_interrupts_the_backoff():
+    supervisor = make_supervisor(failing(1000), initial_delay=30.0, max_delay=30.0)
+    result = []
+    thread = threading.Thread(target=lambda: result.append(supervisor.establish()))
+    thread.start()
+    time.sleep(0.05)
+    supervisor.stop()
+    thread.join(2.0)
+    assert not thread.is_alive()
+    assert result == [None] and supervisor.state == 'stopped'
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def test_backoff_resets_only_after_a_stable_connection(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(supervisor_module, 'time', SimpleNamespace(monotonic=clock.monotonic))
+    supervisor = make_supervisor(failing(2), stable_after=30.0)
+    supervisor.establish()
+    assert supervisor.attempt == 3
+
+    clock.now += 5  # A flapping camera keeps backing off
+    supervisor.connection_lost()
+    assert supervisor.attempt == 3
+    supervisor.establish()
+
+    clock.now += 60
+    supervisor.connection_lost()
+    assert supervisor.attempt == 0
+    assert supervisor.uptime() == pytest.approx(65)
@@ -0,0 +1,140 @@
+# File: test_dataset_cache.py
+
+import json
+
+import cv2
+import numpy as np
+import pytest
+import yaml
+
+from training.dataset_cache import DatasetCache
+
+
+def write_sample(folder, name, value, labels='', shape=(32, 64)):
+    """Write a flat-coloured PNG (lossless, so its hash is stable) and its YOLO label file."""
+    (folder / 'images').mkdir(parents=True, exist_ok=True)
+    (folder / 'labels').mkdir(parents=True, exist_ok=True)
+    image_path = folder / 'images' / f'{name}.png'
+    cv2.imwrite(str(image_path), np.full((*shape, 3), value, dtype=np.uint8))
+    (folder / 'labels' / f'{name}.txt').write_text(labels)
+    return image_path
+
+
+def make_cache(root):
+    return DatasetCache(root / 'training_data', img_size=32, val_fraction=0.0)
+
+
+def test_add_source_stores_relative_paths_once(tmp_path):
+    cache = make_cache(tmp_path)
+    source = tmp_path / 'training_data' / 'reviewed'
+    source.mkdir(parents=True)
+    cache.add_source(source)
+    cache.add_source(tmp_path / 'training_data' / '.' / 'reviewed')
+    assert json.loads(cache.sources_path.read_text()) == ['reviewed']
+    assert [str(path) for path in cache.sources()] == [str(source)]
+
+
+def test_update_is_incremental_and_deduplicated(tmp_path):
+    cache = make_cache(tmp_path)
+    first, second = tmp_path / 'first', tmp_path / 'second'
+    write_sample(first, 'a', 10)
+    write_sample(first, 'b', 20)
+    write_sample(second, 'copy_of_a', 10)
+    cache.add_source(first)
+    cache.add_source(second)
+
+    assert cache.update() == {'added': 2, 'unchanged': 0, 'duplicates': 1, 'removed': 0}
+    assert cache.update() == {'added': 0, 'unchanged': 3, 'duplicates': 0, 'removed': 0}
+
+    (first / 'images' / 'b.png').unlink()
+    (first / 'labels' / 'b.txt').unlink()
+    assert cache.update()['removed'] == 1
+    assert len(cache.manifest['entries']) == 1
+    assert len(list(cache.prepared_dir.rglob('*.jpg'))) == 1
+
+    # A new cache object reads the same state back from disk
+    reopened = make_cache(tmp_path)
+    assert reopened.update()['unchanged'] == 2
+
+
+def test_labels_are_mapped_into_letterbox(tmp_path):
+    cache = make_cache(tmp_path)
+    source = tmp_path / 'source'
+    # 64x32 image letterboxed to 32x32: scaled by 0.5 and padded by 8 pixels top and bottom
+    write_sample(source, 'a', 50, labels='0 0.5 0.5 1.0 1.0\n')
+    cache.add_source(source)
+    cache.update()
+    (content_hash, entry), = cache.manifest['entries'].items()
+    assert list(entry['sources'].values()) == [[[0, 0.5, 0.5, 1.0, 0.5]]]
+    image = cache.image(content_hash)
+    assert image.shape == (32, 32, 3)
+    # JPEG, so only roughly the source colours
+    assert abs(int(image[0, 0, 0]) - 114) < 4 and abs(int(image[16, 16, 0]) - 50) < 4
+
+
+def test_labels_of_duplicate_images_are_merged(tmp_path, capsys):
+    cache = make_cache(tmp_path)
+    first, second = tmp_path / 'first', tmp_path / 'second'
+    write_sample(first, 'a', 10, labels='0 0.25 0.5 0.1 0.1\n')
+    write_sample(second, 'a', 10, labels='0 0.25 0.5 0.1 0.1\n1 0.75 0.5 0.1 0.1\n')
+    cache.add_source(first)
+    cache.add_source(second)
+    cache.prepare()
+    assert 'differ' in capsys.readouterr().out
+    (label_path,) = (cache.prepared_dir / 'labels').rglob('*.txt')
+    assert [line.split()[0] for line in label_path.read_text().splitlines()] == ['0', '1']
+
+    # Once the copy with the extra box is gone, so is the box
+    (second / 'images' / 'a.png').unlink()
+    cache.prepare()
+    assert [line.split()[0] for line in label_path.read_text().splitlines()] == ['0']
+
+
+def test_export_writes_yolo_dataset_and_removes_stale_files(tmp_path):
+    cache = make_cache(tmp_path)
+    source = tmp_path / 'source'
+    write_sample(source, 'a', 10, labels='1 0.5 0.5 0.2 0.2\n')
+    write_sample(source, 'b', 20)
+    (source / 'classes.txt').write_text('person\ncell phone\n')
+    cache.add_source(source)
+
+    data_path, stats = cache.prepare()
+    data = yaml.safe_load(data_path.read_text())
+    assert stats['added'] == 2
+    assert data['nc'] == 2
+    assert data['names'] == ['person', 'cell phone']
+    assert data['val'] == 'images/train'  # No validation split with val_fraction=0
+    assert len(list((cache.prepared_dir / 'images' / 'train').glob('*.jpg'))) == 2
+    label_texts = sorted(path.read_text() for path in (cache.prepared_dir / 'labels' / 'train').glob('*.txt'))
+    assert label_texts[0] == ''
+    assert label_texts[1].startswith('1 ')
+
+    (source / 'images' / 'b.png').unlink()
+    cache.prepare()
+    assert len(list((cache.prepared_dir / 'images' / 'train').glob('*.jpg'))) == 1
+    assert len(list((cache.prepared_dir / 'labels' / 'train').glob('*.txt'))) == 1
+
+
+def test_conflicting_class_names_are_rejected(tmp_path):
+    cache = make_cache(tmp_path)
+    first, second = tmp_path / 'first', tmp_path / 'second'
+    write_sample(first, 'a', 10)
+    write_sample(second, 'b', 20)
+    (first / 'classes.txt').write_text('person\ncell phone\n')
+    (second / 'data.yaml').write_text(yaml.dump({'names': ['person', 'remote']}))
+    cache.add_source(first)
+    cache.add_source(second)
+    with pytest.raises(ValueError, match="Class 1"):
+        cache.update()
+
+
+def test_names_follow_the_current_sources(tmp_path):
+    cache = make_cache(tmp_path)
+    source = tmp_path / 'source'
+    write_sample(source, 'a', 10)
+    (source / 'classes.txt').write_text('person\n')
+    cache.add_source(source)
+    cache.update()
+    (source / 'classes.txt').write_text('pedestrian\n')
+    cache.update()
+    assert cache.manifest['names'] == {'0': 'pedestrian'}
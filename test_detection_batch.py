@@ -0,0 +1,97 @@
+# File: test_detection_batch.py
+
+import numpy as np
+import pytest
+
+from object_detection.detection_batch import DetectionBatch
+
+NAMES = {0: 'person', 2: 'car', 67: 'cell phone'}
+
+
+def make_batch():
+    result = np.array([
+        [0, 0, 10, 20, 0.9, 0],
+        [100, 100, 140, 120, 0.6, 67],
+        [50, 50, 90, 70, 0.7, 2],
+    ], dtype=np.float32)
+    return DetectionBatch.from_result(result, NAMES)
+
+
+def test_from_result_shares_boxes_and_scores():
+    result = np.zeros((2, 6), dtype=np.float32)
+    batch = DetectionBatch.from_result(result, NAMES)
+    result[0, :5] = [1, 2, 3, 4, 0.5]
+    assert batch.boxes[0].tolist() == [1, 2, 3, 4]
+    assert batch.scores[0] == 0.5
+    assert batch.class_ids.dtype == np.int32
+
+
+def test_detection_view_reads_like_a_dictionary():
+    detection = make_batch()[1]
+    assert detection['bbox'] == [100, 100, 140, 120]
+    assert detection['class_name'] == detection['label'] == 'cell phone'
+    assert detection['class_id'] == 67
+    assert detection['confidence'] == pytest.approx(0.6)
+    assert detection['track_id'] is None
+    assert detection.get('track_id', 'untracked') == 'untracked'
+    with pytest.raises(KeyError):
+        detection['missing']
+
+
+def test_setting_track_and_zone_allocates_columns():
+    batch = make_batch()
+    batch[2]['track_id'] = 5
+    batch[0]['zone'] = 'vault'
+    assert batch.track_ids.tolist() == [-1, -1, 5]
+    assert batch.zones.tolist() == ['vault', None, None]
+    with pytest.raises(KeyError):
+        batch[0]['bbox'] = [0, 0, 1, 1]
+
+
+def test_class_mask_and_slicing():
+    batch = make_batch()
+    batch.set_track_ids([1, 2, 3])
+    people_and_phones = batch[batch.class_mask('person', 'cell phone')]
+    assert len(people_and_phones) == 2
+    assert people_and_phones.track_ids.tolist() == [1, 2]
+    assert [detection['class_name'] for detection in people_and_phones] == ['person', 'cell phone']
+    assert not batch.class_mask('dog').any()
+
+
+def test_centers():
+    assert make_batch().centers().tolist() == [[5, 10], [120, 110], [70, 60]]
+
+
+def test_negative_and_out_of_range_index():
+    batch = make_batch()
+    assert batch[-1]['class_name'] == 'car'
+    with pytest.raises(IndexError):
+        batch[3]
+
+
+def test_coerce_round_trips_dictionaries():
+    batch = make_batch()
+    batch.set_track_ids([7, -1, 9])
+    dicts = batch.to_dicts()
+    coerced = DetectionBatch.coerce(dicts, NAMES)
+    assert coerced.boxes.tolist() == batch.boxes.tolist()
+    assert coerced.class_ids.tolist() == [0, 67, 2]
+    assert coerced.track_ids.tolist() == [7, -1, 9]
+    assert DetectionBatch.coerce(batch) is batch
+
+
+def test_from_dicts_without_names_and_empty():
+    batch = DetectionBatch.from_dicts([{'label': 'person', 'bbox': [0, 0, 1, 1]}])
+    assert batch[0]['class_name'] == 'person'
+    assert batch.scores.tolist() == [1.0]
+    empty = DetectionBatch.from_dicts([])
+    assert len(empty) == 0
+    assert empty.boxes.shape == (0, 4)
+    assert empty.centers().shape == (0, 2)
+
+
+def test_copy_is_independent():
+    batch = make_batch()
+    copy = batch.copy()
+    copy.boxes[0] = 0
+    assert batch.boxes[0].tolist() == [0, 0, 10, 20]
@@ -0,0 +1,62 @@
+# File: test_detection_cache.py
+
+import numpy as np
+
+from object_detection.detection_batch import DetectionBatch
+from object_detection.detection_cache import DetectionCache
+
+
+def frame(value=100, shape=(180, 320, 3)):
+    return np.full(shape, value, dtype=np.uint8)
+
+
+def detections():
+    return DetectionBatch(np.array([[10, 10, 50, 50]], dtype=np.float32), np.array([0.9], dtype=np.float32),
+                          np.array([0], dtype=np.int32), ['person'])
+
+
+def make_cache():
+    return DetectionCache(threshold=6.0, max_age=2.0, signature_size=(32, 18))
+
+
+def test_unchanged_scene_reuses_a_copy_of_the_detections():
+    cache = make_cache()
+    stored = detections()
+    cache.store(cache.signature(frame()), stored, key=640, now=0.0)
+    cached = cache.lookup(cache.signature(frame(104)), key=640, now=1.0)
+    assert cached is not None and cached is not stored
+    cached.boxes[0, 0] = 0  # The caller may change its copy
+    assert cache.lookup(cache.signature(frame()), key=640, now=1.0).boxes[0, 0] == 10
+    assert cache.stats() == {'hits': 2, 'misses': 0, 'hit_rate': 1.0}
+
+
+def test_change_in_one_block_forces_inference():
+    cache = make_cache()
+    cache.store(cache.signature(frame()), detections(), now=0.0)
+    changed = frame()
+    changed[:20, :20] = 255  # A person walks in at the corner
+    assert cache.lookup(cache.signature(changed), now=0.5) is None
+
+
+def test_drift_is_measured_against_the_last_inference():
+    cache = make_cache()
+    calls = []
+
+    def detect(image):
+        calls.append(image)
+        return detections()
+
+    for value in range(100, 120, 2):  # Slowly brightening scene
+        cache.detect(frame(value), detect)
+    # Each 2-level step is within the threshold, but the change since the last inference is not
+    assert 1 < len(calls) < 10
+
+
+def test_results_expire_and_depend_on_the_key():
+    cache = make_cache()
+    signature = cache.signature(frame())
+    cache.store(signature, detections(), key=640, now=0.0)
+    assert cache.lookup(signature, key=320, now=0.5) is None
+    assert cache.lookup(signature, key=640, now=2.5) is None
+    cache.clear()
+    assert cache.lookup(signature, key=640, now=0.5) is None
@@ -0,0 +1,76 @@
+# File: test_detection_log.py
+
+import pytest
+
+pytest.importorskip('PySide6')
+
+from PySide6.QtCore import QCoreApplication, Qt  # noqa: E402
+
+from gui.detection_log import LogModel, RingBuffer  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+def test_ring_buffer_overwrites_oldest():
+    buffer = RingBuffer(3)
+    for item in range(5):
+        buffer.append(item)
+    assert len(buffer) == 3
+    assert [buffer[i] for i in range(len(buffer))] == [2, 3, 4]
+    with pytest.raises(IndexError):
+        buffer[3]
+
+
+def test_ring_buffer_drop_oldest():
+    buffer = RingBuffer(4)
+    for item in range(6):
+        buffer.append(item)
+    buffer.drop_oldest(3)
+    assert [buffer[i] for i in range(len(buffer))] == [5]
+    buffer.append(6)
+    buffer.append(7)
+    assert [buffer[i] for i in range(len(buffer))] == [5, 6, 7]
+    buffer.drop_oldest(10)
+    assert len(buffer) == 0
+
+
+def test_log_model_shows_entries_only_after_flush(app):
+    model = LogModel(capacity=10, flush_interval=60000)
+    model.append('person at door', camera='Camera 1', classes=['person'])
+    assert model.rowCount() == 0
+    model.flush()
+    assert model.rowCount() == 1
+    index = model.index(0)
+    assert model.data(index) == 'person at door'
+    assert model.data(index, LogModel.CameraRole) == 'Camera 1'
+    assert model.data(index, LogModel.ClassesRole) == frozenset({'person'})
+    assert model.data(index, Qt.ToolTipRole) is None
+
+
+def test_log_model_drops_oldest_rows_when_full(app):
+    model = LogModel(capacity=5, flush_interval=60000)
+    removed, inserted = [], []
+    model.rowsRemoved.connect(lambda parent, first, last: removed.append((first, last)))
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+    for i in range(4):
+        model.append(f'entry {i}')
+    model.flush()
+    for i in range(4, 7):
+        model.append(f'entry {i}')
+    model.flush()
+    assert model.rowCount() == 5
+    assert [model.data(model.index(row)) for row in range(5)] == [f'entry {i}' for i in range(2, 7)]
+    assert removed == [(0, 1)]
+    assert inserted == [(0, 3), (2, 4)]
+
+
+def test_log_model_bounds_pending_entries(app):
+    model = LogModel(capacity=3, flush_interval=60000)
+    for i in range(10):
+        model.append(f'entry {i}')
+    assert len(model.pending) == 3
+    model.flush()
+    assert [model.data(model.index(row)) for row in range(3)] == ['entry 7', 'entry 8', 'entry 9']
@@ -0,0 +1,98 @@
+# File: test_display_buffer.py
+
+import numpy as np
+
+from data_acquisition.display_buffer import DisplayBuffer
+
+
+def frame(value, shape=(96, 128, 3)):
+    return np.full(shape, value, dtype=np.uint8)
+
+
+def test_nothing_is_shown_before_the_first_render():
+    buffer = DisplayBuffer(64, 48)
+    with buffer.latest() as (seq, image):
+        assert seq == -1 and image is None
+
+
+def test_render_publishes_a_scaled_copy():
+    buffer = DisplayBuffer(64, 48)
+    source = frame(7)
+    back = buffer.render(source, seq=1)
+    with buffer.latest() as (seq, image):
+        assert seq == 1
+        assert image is back and image.shape == (48, 64, 3)
+        assert (image == 7).all()
+    assert (source == 7).all() and source.shape == (96, 128, 3)
+
+
+def test_frames_already_shown_are_skipped():
+    buffer = DisplayBuffer(64, 48)
+    buffer.render(frame(1), seq=1)
+    with buffer.latest(last_seq=1) as (seq, image):
+        assert seq == 1 and image is None
+    buffer.render(frame(2), seq=2)
+    with buffer.latest(last_seq=1) as (seq, image):
+        assert seq == 2 and (image == 2).all()
+
+
+def test_double_buffering_keeps_the_front_image_while_rendering():
+    buffer = DisplayBuffer(64, 48)
+    buffer.render(frame(1), seq=1)
+    with buffer.latest() as (_, front):
+        pass
+    assert buffer.back_buffer() is not front
+    buffer.render(frame(2), seq=2)
+    assert (front == 1).all()  # Rendered into the other buffer
+
+
+def test_resize_is_deferred_to_render():
+    buffer = DisplayBuffer(64, 48)
+    buffer.render(frame(1), seq=1)
+    with buffer.latest() as (_, front):
+        pass
+    buffer.resize(32, 24)
+    # The worker may still be rendering into the old buffers
+    assert (buffer.width, buffer.height) == (64, 48)
+    assert buffer.back_buffer().shape == (48, 64, 3)
+    with buffer.latest() as (seq, image):
+        assert seq == 1 and image is front
+
+    buffer.render(frame(3), seq=2)
+    assert (buffer.width, buffer.height) == (32, 24)
+    with buffer.latest() as (seq, image):
+        assert seq == 2 and image.shape == (24, 32, 3) and (image == 3).all()
+
+
+def test_resize_to_the_current_size_cancels_a_pending_one():
+    buffer = DisplayBuffer(64, 48)
+    buffer.resize(32, 24)
+    buffer.resize(64, 48)
+    buffer.resize(0, 10)  # Ignored
+    buffer.render(frame(1), seq=1)
+    assert (buffer.width, buffer.height) == (64, 48)
+
+
+class RecordingRenderer:
+    def __init__(self):
+        self.calls = []
+
+    def draw(self, image, detections, scale=(1.0, 1.0)):
+        self.calls.append((image.shape, scale))
+        image[0, 0] = 255
+
+
+def test_overlay_layer_is_cleared_when_detections_disappear():
+    buffer = DisplayBuffer(64, 48, overlay_layer=True)
+    renderer = RecordingRenderer()
+    buffer.render(frame(1), seq=1, renderer=renderer, detections=[object()])
+    assert renderer.calls == [((48, 64, 4), (0.5, 0.5))]
+    with buffer.latest():
+        assert buffer.front_overlay()[0, 0, 0] == 255
+    buffer.render(frame(1), seq=2, renderer=renderer, detections=[])
+    with buffer.latest():
+        assert buffer.front_overlay() is None
+    buffer.render(frame(1), seq=3, renderer=renderer, detections=None)
+    with buffer.latest():
+        # The layer drawn for seq 1 was cleared before reuse
+        assert buffer.front_overlay() is None and not buffer._overlays[buffer._front].any()
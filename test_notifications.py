@@ -0,0 +1,190 @@
+# File: test_notifications.py
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+import notifications.mqtt_notifications as mqtt_module
+from notifications.dispatcher import NotificationDispatcher
+from notifications.mqtt_notifications import MQTTNotification
+from notifications.webhook_notifications import WebhookNotification
+
+
+class Channel:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sent = []
+        self.closed = False
+
+    def send(self, payload):
+        time.sleep(self.delay)
+        self.sent.append((time.monotonic(), payload))
+
+    def close(self):
+        self.closed = True
+
+
+class SlowChannel(Channel):
+    pass  # Channels are named by type, so this one gets a thread of its own
+
+
+def test_each_channel_has_its_own_thread():
+    dispatcher = NotificationDispatcher(queue_size=8)
+    slow, fast = SlowChannel(delay=0.3), Channel()
+    dispatcher._channels = [slow, fast]
+    emailed = []
+    started = time.monotonic()
+    dispatcher.publish({'message': 'loitering'}, lambda payload: payload.update(snapshot={'crop': 'abc'}))
+    dispatcher.submit('email', emailed.append, 'loitering')
+    time.sleep(0.1)
+    # The fast channel and email did not wait for the slow channel
+    assert [payload for _, payload in fast.sent] == [{'message': 'loitering', 'snapshot': {'crop': 'abc'}}]
+    assert emailed == ['loitering']
+    dispatcher.stop()
+    assert slow.sent[0][0] - started >= 0.3
+    assert slow.closed and fast.closed
+
+
+def test_full_channel_queue_drops_only_that_channel():
+    dispatcher = NotificationDispatcher(queue_size=1)
+    release = threading.Event()
+    assert dispatcher.submit('email', release.wait)
+    time.sleep(0.05)  # The worker took the first item
+    assert dispatcher.submit('email', print, 'queued')
+    assert not dispatcher.submit('email', print, 'dropped')
+    assert dispatcher.submit('sound', print, 'other channel')
+    release.set()
+    dispatcher.stop()
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the endpoints the session pools connections to
+    received = []
+    failures = 0
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        if WebhookHandler.failures:
+            WebhookHandler.failures -= 1
+            self.send_response(503)
+        else:
+            WebhookHandler.received.append((self.headers.get('Authorization'), json.loads(body)))
+            self.send_response(204)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def webhook_server():
+    WebhookHandler.received = []
+    WebhookHandler.failures = 0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), WebhookHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/alerts"
+    server.shutdown()
+    server.server_close()
+
+
+def test_webhook_posts_json_with_headers_and_retries(webhook_server):
+    webhook = WebhookNotification([webhook_server], {'Authorization': 'Bearer token'}, timeout=2.0, retries=2)
+    webhook.session.adapters['http://'].max_retries.backoff_factor = 0
+    WebhookHandler.failures = 1
+    assert webhook.send({'rule': 'loitering', 'camera': 'Camera 1'})
+    assert webhook.send({'rule': 'person_with_phone'})
+    assert WebhookHandler.received == [('Bearer token', {'rule': 'loitering', 'camera': 'Camera 1'}),
+                                       ('Bearer token', {'rule': 'person_with_phone'})]
+    webhook.close()
+
+
+def test_webhook_reports_unreachable_endpoints(webhook_server):
+    webhook = WebhookNotification(['http://127.0.0.1:9/alerts', webhook_server], timeout=0.5, retries=0)
+    assert not webhook.send({'rule': 'loitering'})
+    assert len(WebhookHandler.received) == 1  # The other endpoint still got it
+    webhook.close()
+
+
+class FakeBroker:
+    def __init__(self):
+        """Stands in for the broker behind a paho client: records publishes and acknowledges on request."""
+        self.published = []  # (mid, payload)
+        self.auto_ack = False
+        self.client = None
+
+
+class FakeClient:
+    broker = None
+
+    def __init__(self, *args, **kwargs):
+        self.broker.client = self
+        self.next_mid = 0
+
+    def username_pw_set(self, username, password):
+        pass
+
+    def reconnect_delay_set(self, minimum, maximum):
+        pass
+
+    def connect_async(self, host, port, keepalive):
+        pass
+
+    def loop_start(self):
+        pass
+
+    def loop_stop(self):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def publish(self, topic, payload, qos=0):
+        self.next_mid += 1
+        self.broker.published.append((self.next_mid, json.loads(payload)))
+        if self.broker.auto_ack:
+            self.on_publish(self, None, self.next_mid)  # Acknowledged before publish returns
+        return SimpleNamespace(rc=0, mid=self.next_mid)
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    broker = FakeBroker()
+    FakeClient.broker = broker
+    monkeypatch.setattr(mqtt_module, 'mqtt', SimpleNamespace(Client=FakeClient, MQTT_ERR_SUCCESS=0))
+    return broker
+
+
+def test_mqtt_spools_until_the_broker_acknowledges(tmp_path, broker):
+    channel = MQTTNotification('broker', spool_dir=tmp_path)
+    assert not channel.send({'n': 1})  # Not connected yet
+    assert not channel.send({'n': 2})
+    assert len(list(tmp_path.glob('*.json'))) == 2
+
+    client = broker.client
+    client.on_connect(client, None, {}, 0)
+    assert [payload for _, payload in broker.published] == [{'n': 1}, {'n': 2}]
+    client.on_publish(client, None, 1)
+    assert [json.loads(p.read_text()) for p in tmp_path.glob('*.json')] == [{'n': 2}]
+
+    # Unacknowledged alerts are sent again after a reconnect
+    client.on_disconnect(client, None)
+    client.on_connect(client, None, {}, 0)
+    assert [payload for _, payload in broker.published][-1] == {'n': 2}
+    broker.auto_ack = True
+    assert channel.send({'n': 3})
+    client.on_publish(client, None, 3)
+    assert list(tmp_path.glob('*.json')) == []
+    channel.close()
+
+
+def test_mqtt_spool_is_bounded(tmp_path, broker):
+    channel = MQTTNotification('broker', spool_dir=tmp_path, max_spool=2)
+    for n in range(4):
+        channel.send({'n': n})
+    assert sorted(json.loads(p.read_text())['n'] for p in tmp_path.glob('*.json')) == [2, 3]
@@ -0,0 +1,51 @@
+# File: test_pipeline_metrics.py
+
+import threading
+
+import pytest
+
+from metrics.pipeline_metrics import LatencyHistogram, MetricsRegistry
+
+
+def test_histogram_quantile_interpolates_inside_the_bucket():
+    histogram = LatencyHistogram(buckets=(0.01, 0.02))
+    for seconds in (0.005, 0.015, 0.015, 0.5):
+        histogram.observe(seconds)
+    assert histogram.snapshot() == ([1, 2, 1], pytest.approx(0.535), 4)
+    assert histogram.quantile(0.5) == pytest.approx(0.015)
+    assert LatencyHistogram().quantile(0.5) is None
+
+
+def test_shared_counters_do_not_lose_increments():
+    camera = MetricsRegistry().camera('Camera 1')
+
+    def raise_alerts():
+        for _ in range(10000):
+            camera.increment_shared('alerts_delivered')
+
+    threads = [threading.Thread(target=raise_alerts) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert camera.counters['alerts_delivered'] == 40000
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.camera('Gate "A"\\2\nnorth').increment('frames_captured')
+    text = registry.render_prometheus()
+    assert 'cctv_frames_captured_total{camera="Gate \\"A\\"\\\\2\\nnorth"} 1' in text
+    # Every sample stays on one line
+    assert all(line.startswith(('#', 'cctv_')) for line in text.splitlines())
+
+
+def test_prometheus_histogram_is_cumulative():
+    registry = MetricsRegistry()
+    camera = registry.camera(None)
+    camera.observe('detect', 0.003)
+    camera.observe('detect', 0.2)
+    lines = registry.render_prometheus().splitlines()
+    assert 'cctv_stage_latency_seconds_bucket{camera="default",stage="detect",le="0.005"} 1' in lines
+    assert 'cctv_stage_latency_seconds_bucket{camera="default",stage="detect",le="+Inf"} 2' in lines
+    assert 'cctv_stage_latency_seconds_count{camera="default",stage="detect"} 2' in lines
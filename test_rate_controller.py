@@ -0,0 +1,68 @@
+# File: test_rate_controller.py
+
+import pytest
+
+from data_acquisition.rate_controller import AdaptiveRateController
+
+
+@pytest.fixture
+def controller():
+    controller = AdaptiveRateController(max_fps=20, latency_budget=0.2)
+    controller.min_fps = 2
+    controller.input_sizes = [640, 480, 320]
+    controller.alpha = 1.0  # No smoothing, so each observation takes effect at once
+    controller.size_cooldown = 5.0
+    return controller
+
+
+def test_detection_is_spaced_by_the_detection_rate(controller):
+    assert controller.should_detect(0.0)
+    assert not controller.should_detect(0.04)
+    assert controller.should_detect(0.05)
+
+
+def test_overload_lowers_the_rate_before_the_input_size(controller):
+    # 60 ms per pass at 20 fps does not fit the frame interval, but is well inside the latency budget
+    controller.observe_detect(0.06, now=0.0)
+    assert controller.detect_fps == pytest.approx(16)
+    assert controller.input_size == 640
+
+
+def test_slow_detection_shrinks_the_input_with_a_cooldown(controller):
+    controller.observe_detect(0.3, now=0.0)
+    assert controller.input_size == 480
+    controller.observe_detect(0.3, now=1.0)
+    assert controller.input_size == 480  # Within the cooldown
+    controller.observe_detect(0.3, now=6.0)
+    assert controller.input_size == 320
+    for step in range(30):
+        controller.observe_detect(0.3, now=20.0 + step)
+    assert controller.input_size == 320
+    assert controller.detect_fps == controller.min_fps
+
+
+def test_queue_latency_counts_against_the_budget(controller):
+    controller.observe_queue(0.19)
+    controller.observe_detect(0.02, now=0.0)
+    assert controller.detect_fps < 20
+
+
+def test_recovers_rate_first_then_input_size(controller):
+    controller.observe_detect(0.3, now=0.0)
+    controller.observe_detect(0.3, now=1.0)
+    assert controller.input_size == 480 and controller.detect_fps < 20
+    now = 2.0
+    while controller.detect_fps < 20:
+        assert controller.input_size == 480
+        controller.observe_detect(0.01, now=now)
+        now += 1.0
+    assert controller.detect_fps == 20
+    controller.observe_detect(0.01, now=now + 10)
+    assert controller.input_size == 640
+
+
+def test_max_fps_caps_the_current_rate(controller):
+    controller.set_max_fps(10)
+    assert controller.detect_fps == 10
+    controller.observe_detect(0.001, now=0.0)
+    assert controller.detect_fps == 10
@@ -0,0 +1,107 @@
+# File: test_recorder.py
+
+import os
+import time
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+
+import recording.recorder as recorder_module
+from recording.recorder import CameraRecorder, event_clips_enabled
+from recording.storage import DiskQuota
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(recorder_module, 'time', SimpleNamespace(
+        monotonic=clock.monotonic, time=time.time, strftime=time.strftime, localtime=time.localtime))
+    return clock
+
+
+def feed(recorder, clock, count, fps, shape=(48, 64, 3)):
+    for i in range(count):
+        recorder.add_frame(np.full(shape, i % 255, dtype=np.uint8))
+        clock.now += 1.0 / fps
+
+
+def test_event_clips_follow_the_backend(monkeypatch):
+    monkeypatch.setitem(recorder_module.recording_config, 'event_clips', 'packets')
+    assert event_clips_enabled('pyav')
+    assert not event_clips_enabled('opencv')
+    monkeypatch.setitem(recorder_module.recording_config, 'event_clips', True)
+    assert event_clips_enabled('opencv')
+
+
+def test_pre_roll_is_bounded_by_time_and_bytes(tmp_path, clock):
+    recorder = CameraRecorder('Camera 1', root=tmp_path, fps=10)
+    feed(recorder, clock, 100, fps=10)
+    assert len(recorder.buffer) == int(recorder.pre_roll * 10) + 1
+    recorder.max_buffer_bytes = 5 * 48 * 64 * 3
+    feed(recorder, clock, 1, fps=10)
+    assert len(recorder.buffer) == 5
+    assert recorder.buffer_bytes == 5 * 48 * 64 * 3
+
+
+def test_clip_is_encoded_at_the_measured_frame_rate(tmp_path, clock):
+    # The profile says 30 fps, but the camera delivers 8
+    recorder = CameraRecorder('Camera 1', root=tmp_path, fps=30)
+    feed(recorder, clock, 40, fps=8)
+    path = recorder.trigger('loitering')
+    assert recorder._frame_rate() == pytest.approx(8)
+    assert recorder.trigger('loitering') is None  # Extends the open clip
+    feed(recorder, clock, 8, fps=8)
+    assert recorder.close(timeout=10)
+    capture = cv2.VideoCapture(str(path))
+    assert capture.get(cv2.CAP_PROP_FPS) == pytest.approx(8, abs=0.1)
+    assert int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) == 40 + 8  # All of the 5 s pre-roll, then the clip
+    capture.release()
+
+
+def test_close_does_not_wait_by_default(tmp_path, clock):
+    recorder = CameraRecorder('Camera 1', root=tmp_path, fps=10)
+    assert recorder.close()  # Nothing was ever written
+    recorder.start_continuous()
+    feed(recorder, clock, 5, fps=10)
+    recorder.close()
+    assert recorder.close(timeout=10)
+    assert len(list((tmp_path / 'segments').rglob('*.avi'))) == 1
+
+
+def make_recording(root, kind, name, size, age):
+    path = root / kind / 'Camera_1' / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b'\0' * size)
+    os.utime(path, (time.time() - age, time.time() - age))
+    return path
+
+
+def test_quota_deletes_oldest_segments_before_clips(tmp_path):
+    clip = make_recording(tmp_path, 'clips', 'clip.avi', 100, age=300)
+    old_segment = make_recording(tmp_path, 'segments', 'old.avi', 100, age=200)
+    new_segment = make_recording(tmp_path, 'segments', 'new.avi', 100, age=100)
+    quota = DiskQuota(tmp_path, max_bytes=250)
+    assert quota.add(new_segment) == 1
+    assert not old_segment.exists() and new_segment.exists() and clip.exists()
+    assert quota.total == 200
+
+
+def test_quota_keeps_a_running_total(tmp_path, monkeypatch):
+    quota = DiskQuota(tmp_path, max_bytes=250)
+    quota.add(make_recording(tmp_path, 'clips', 'first.avi', 100, age=30))
+    # No directory walks after the first one
+    monkeypatch.setattr(DiskQuota, '_scan', lambda self: pytest.fail("rescanned"))
+    quota.add(make_recording(tmp_path, 'segments', 'second.avi', 100, age=20))
+    assert quota.add(make_recording(tmp_path, 'clips', 'third.avi', 100, age=10)) == 1
+    assert quota.total == 200
+    assert sorted(path.name for path in tmp_path.rglob('*.avi')) == ['first.avi', 'third.avi']
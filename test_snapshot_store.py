@@ -0,0 +1,61 @@
+# File: test_snapshot_store.py
+
+import hashlib
+import os
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from notifications.snapshot_store import SnapshotStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SnapshotStore(tmp_path, quality=90, crop_margin=0.5, context_width=160, workers=1, max_bytes=10 ** 6)
+    yield store
+    store.close()
+
+
+def test_snapshot_has_a_crop_and_a_downscaled_context(store):
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    frame[100:140, 100:120] = 255
+    images = store.submit(frame, [([100, 100, 120, 140], 0)]).result(timeout=10)
+    crop = cv2.imdecode(np.frombuffer(images['crop']['data'], np.uint8), cv2.IMREAD_COLOR)
+    context = cv2.imread(images['context']['path'])
+    assert crop.shape == (80, 40, 3)  # The boxes plus half their size on each side
+    assert context.shape == (120, 160, 3)
+    assert images['crop']['sha256'] == hashlib.sha256(images['crop']['data']).hexdigest()
+    assert os.path.basename(images['crop']['path']) == images['crop']['sha256'] + '.jpg'
+
+
+def test_crop_is_clamped_to_the_frame(store):
+    frame = np.full((100, 100, 3), 80, dtype=np.uint8)
+    images = store.submit(frame, [([0, 0, 40, 40], 0), ([60, 60, 100, 100], 67)]).result(timeout=10)
+    crop = cv2.imdecode(np.frombuffer(images['crop']['data'], np.uint8), cv2.IMREAD_COLOR)
+    assert crop.shape == (100, 100, 3)
+
+
+def test_identical_snapshots_are_stored_once(store, tmp_path):
+    first = store.store(b'jpeg bytes')
+    second = store.store(b'jpeg bytes')
+    assert first['path'] == second['path']
+    assert len(list(tmp_path.rglob('*.jpg'))) == 1
+
+
+def test_least_recently_used_snapshots_are_evicted(tmp_path):
+    store = SnapshotStore(tmp_path, workers=1, max_bytes=350)
+    old = store.store(b'a' * 100)
+    used = store.store(b'b' * 100)
+    past = time.time() - 60
+    for entry in (old, used):
+        os.utime(entry['path'], (past, past))
+    store.store(b'b' * 100)  # Used again, so it is kept
+    newest = store.store(b'c' * 100)
+    store.store(b'd' * 100)
+    remaining = {os.path.basename(path) for path in map(str, tmp_path.rglob('*.jpg'))}
+    assert os.path.basename(old['path']) not in remaining
+    assert {os.path.basename(used['path']), os.path.basename(newest['path'])} <= remaining
+    assert store._total == 300
+    store.close()
@@ -0,0 +1,75 @@
+# File: test_stitching.py
+
+import numpy as np
+import pytest
+
+from offline_processing.stitching import box_iou, stitch_tracks
+
+
+def observation(time, track_id, bbox, class_name='person'):
+    return {'time': time, 'track_id': track_id, 'class_name': class_name, 'bbox': bbox}
+
+
+def test_box_iou():
+    iou = box_iou([[0, 0, 10, 10]], [[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]])
+    assert iou.shape == (1, 3)
+    assert iou[0] == pytest.approx([1.0, 1 / 3, 0.0])
+    assert box_iou(np.zeros((0, 4)), [[0, 0, 1, 1]]).shape == (0, 1)
+
+
+def test_track_crossing_boundary_keeps_its_id():
+    chunks = [
+        {'start': 0, 'end': 10, 'observations': [
+            observation(1, 0, [0, 0, 10, 10]),
+            observation(9.8, 0, [50, 0, 60, 10]),
+            observation(2, 1, [100, 100, 110, 110]),  # Gone long before the boundary
+        ]},
+        {'start': 10, 'end': 20, 'observations': [
+            observation(10.1, 0, [200, 200, 210, 210]),  # A new person
+            observation(10.2, 1, [51, 0, 61, 10]),       # The person of track 0, renumbered by the new tracker
+        ]},
+    ]
+    stitched = stitch_tracks(chunks, link_window=1.0, link_iou=0.3)
+    assert [o['time'] for o in stitched] == [1, 2, 9.8, 10.1, 10.2]
+    ids = {o['time']: o['track_id'] for o in stitched}
+    assert ids[1] == ids[9.8] == ids[10.2] == 0
+    assert ids[2] == 1
+    assert ids[10.1] == 2
+
+
+def test_tracks_of_other_classes_are_not_linked():
+    chunks = [
+        {'start': 0, 'end': 10, 'observations': [observation(9.9, 0, [0, 0, 10, 10], 'person')]},
+        {'start': 10, 'end': 20, 'observations': [observation(10.0, 0, [0, 0, 10, 10], 'car')]},
+    ]
+    assert [o['track_id'] for o in stitch_tracks(chunks)] == [0, 1]
+
+
+def test_tracks_outside_link_window_are_not_linked():
+    chunks = [
+        {'start': 0, 'end': 10, 'observations': [observation(8.0, 0, [0, 0, 10, 10])]},
+        {'start': 10, 'end': 20, 'observations': [observation(10.0, 0, [0, 0, 10, 10])]},
+    ]
+    assert [o['track_id'] for o in stitch_tracks(chunks, link_window=1.0)] == [0, 1]
+
+
+def test_each_track_is_linked_at_most_once():
+    # Two new tracks overlap the same old one; the better overlap wins
+    chunks = [
+        {'start': 0, 'end': 10, 'observations': [observation(9.9, 0, [0, 0, 10, 10])]},
+        {'start': 10, 'end': 20, 'observations': [
+            observation(10.0, 0, [4, 0, 14, 10]),
+            observation(10.1, 1, [1, 0, 11, 10]),
+        ]},
+    ]
+    ids = {o['time']: o['track_id'] for o in stitch_tracks(chunks)}
+    assert ids[10.1] == 0
+    assert ids[10.0] == 1
+
+
+def test_ids_carry_across_several_chunks():
+    chunks = [{'start': start, 'end': start + 10,
+               'observations': [observation(start + 0.5, 0, [0, 0, 10, 10]),
+                                observation(start + 9.5, 0, [0, 0, 10, 10])]}
+              for start in (0, 10, 20)]
+    assert {o['track_id'] for o in stitch_tracks(chunks)} == {0}
@@ -0,0 +1,129 @@
+# File: test_tiling.py
+
+import numpy as np
+import pytest
+
+from object_detection.tiling import tile_windows
+
+torch = pytest.importorskip('torch')
+pytest.importorskip('torchvision')
+
+from object_detection.object_detector import ObjectDetector  # noqa: E402
+from preprocessing.frame_preprocessor import FramePreprocessor  # noqa: E402
+
+NAMES = {0: 'person', 1: 'car', 2: 'cell phone'}
+
+
+def test_windows_cover_frame_with_overlap():
+    windows = tile_windows((720, 1280, 3), (3, 2), overlap=0.2)
+    assert len(windows) == 6
+    sizes = {(x2 - x1, y2 - y1) for x1, y1, x2, y2 in windows}
+    assert len(sizes) == 1
+    assert min(x1 for x1, _, _, _ in windows) == 0 and max(x2 for _, _, x2, _ in windows) == 1280
+    assert min(y1 for _, y1, _, _ in windows) == 0 and max(y2 for _, _, _, y2 in windows) == 720
+    # Neighbouring tiles share about a fifth of a tile
+    (tile_w, _), = sizes
+    first, second = windows[0], windows[1]
+    assert first[2] - second[0] == pytest.approx(0.2 * tile_w, abs=2)
+
+
+def test_single_tile_is_centred():
+    assert tile_windows((100, 200), (1, 1)) == [(0, 0, 200, 100)]
+
+
+def test_zones_select_intersecting_tiles():
+    windows = tile_windows((100, 200), (2, 2), overlap=0.0)
+    assert tile_windows((100, 200), (2, 2), overlap=0.0, zones=[(0.6, 0.6, 0.9, 0.9)]) == [windows[3]]
+    assert len(tile_windows((100, 200), (2, 2), overlap=0.0, zones=[(0.4, 0.0, 0.6, 0.1)])) == 2
+
+
+class FakeDetector(ObjectDetector):
+    def __init__(self, objects, input_size=64):
+        """
+        Detector whose model sees the given objects wherever they fall inside its input.
+        :param objects: (frame xyxy box, objectness, class probabilities) of each object.
+        """
+        self.confidence_threshold = 0.25
+        self.iou_threshold = 0.45
+        self.max_detections = 300
+        self._class_filters = {}
+        self.names = NAMES
+        self.preprocessor = FramePreprocessor(input_size=input_size)
+        self.objects = objects
+        self.views = []  # (offset, scale, pad) of every model input
+
+    def detect_tiled(self, frame, windows, **kwargs):
+        self.views = [((x1, y1), *self._view(x2 - x1, y2 - y1)) for x1, y1, x2, y2 in windows]
+        if kwargs.get('include_full_frame', True):
+            self.views.append(((0, 0), *self._view(frame.shape[1], frame.shape[0])))
+        return super().detect_tiled(frame, windows, **kwargs)
+
+    def _view(self, width, height):
+        size = self.preprocessor.input_size
+        scale = min(size / height, size / width)
+        return scale, ((size - round(width * scale)) // 2, (size - round(height * scale)) // 2)
+
+    def infer(self, tensor):
+        pred = torch.zeros((len(tensor), len(self.objects), 5 + len(NAMES)))
+        for image, ((offset_x, offset_y), scale, (pad_x, pad_y)) in enumerate(self.views):
+            for row, (box, objectness, probabilities) in enumerate(self.objects):
+                x1, y1, x2, y2 = box
+                pred[image, row] = torch.tensor([
+                    ((x1 + x2) / 2 - offset_x) * scale + pad_x, ((y1 + y2) / 2 - offset_y) * scale + pad_y,
+                    (x2 - x1) * scale, (y2 - y1) * scale, objectness, *probabilities])
+        return pred
+
+
+def test_tiled_detections_are_merged_across_tiles():
+    # The person sits in the overlap, so both tiles and the full frame see it
+    detector = FakeDetector([
+        ([90, 10, 130, 50], 0.9, [0.9, 0.1, 0.0]),
+        ([95, 20, 105, 30], 0.8, [0.0, 0.0, 1.0]),   # Phone in the person's hand: other class, kept
+        ([10, 60, 30, 90], 0.1, [0.0, 1.0, 0.0]),    # Below the confidence threshold
+    ])
+    frame = np.zeros((100, 200, 3), dtype=np.uint8)
+    windows = tile_windows(frame.shape, (2, 1), overlap=0.5)
+    batch = detector.detect_tiled(frame, windows)
+    assert len(detector.views) == 3
+    assert sorted(batch[i]['class_name'] for i in range(len(batch))) == ['cell phone', 'person']
+    person = batch[batch.class_mask('person')]
+    assert person.boxes[0] == pytest.approx([90, 10, 130, 50], abs=1.0)
+    assert person.scores[0] == pytest.approx(0.81, abs=1e-4)
+
+
+def test_suppression_is_per_class_and_bounded():
+    detector = FakeDetector([])
+    boxes = torch.tensor([[0, 0, 10, 10], [1, 1, 11, 11], [0, 0, 10, 10], [50, 50, 60, 60]], dtype=torch.float32)
+    scores = torch.tensor([0.9, 0.8, 0.7, 0.6])
+    class_ids = torch.tensor([0, 0, 1, 0])
+    result = detector._suppress(boxes, scores, class_ids)
+    assert result.dtype == np.float32
+    assert result[:, 4].tolist() == pytest.approx([0.9, 0.7, 0.6])
+    assert result[:, 5].tolist() == [0, 1, 0]
+    detector.max_detections = 1
+    assert len(detector._suppress(boxes, scores, class_ids)) == 1
+
+
+def test_allowlist_drops_rows_whose_best_class_is_excluded():
+    detector = FakeDetector([
+        ([10, 10, 30, 30], 0.9, [0.3, 0.7, 0.0]),   # A car, never relabelled as a person
+        ([40, 10, 60, 30], 0.9, [0.8, 0.2, 0.0]),
+    ])
+    frame = np.zeros((64, 64, 3), dtype=np.uint8)
+    class_filter = detector.class_filter(classes=['person'])
+    batch = detector.detect_tiled(frame, [], class_filter=class_filter)
+    assert len(batch) == 1
+    assert batch[0]['class_name'] == 'person'
+    assert batch.boxes[0] == pytest.approx([40, 10, 60, 30], abs=1.0)
+
+
+def test_per_class_thresholds():
+    detector = FakeDetector([
+        ([10, 10, 30, 30], 0.5, [1.0, 0.0, 0.0]),
+        ([40, 40, 60, 60], 0.5, [0.0, 0.0, 1.0]),
+    ])
+    frame = np.zeros((64, 64, 3), dtype=np.uint8)
+    class_filter = detector.class_filter(class_thresholds={'person': 0.6})
+    assert detector.class_filter(class_thresholds={'person': 0.6}) is class_filter
+    batch = detector.detect_tiled(frame, [], class_filter=class_filter)
+    assert [detection['class_name'] for detection in batch] == ['cell phone']
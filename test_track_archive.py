@@ -0,0 +1,72 @@
+# File: test_track_archive.py
+
+import numpy as np
+import pytest
+
+from data_analytics.track_archive import TrackArchive, _hour_key
+from object_detection.detection_batch import DetectionBatch
+
+NAMES = ['person', 'cell phone']
+START = 1_700_000_000.0  # Not on an hour boundary
+
+
+def batch(track_ids, class_ids, zones=None):
+    count = len(track_ids)
+    detections = DetectionBatch(np.tile(np.array([[10, 20, 30, 40]], dtype=np.float32), (count, 1)),
+                                np.full(count, 0.9, dtype=np.float32), np.array(class_ids, dtype=np.int32),
+                                NAMES, np.array(track_ids, dtype=np.int32))
+    if zones is not None:
+        detections.set_zones(zones)
+    return detections
+
+
+def make_archive(root):
+    archive = TrackArchive(root)
+    archive.flush_interval = 3600  # Flushed by query or explicitly
+    return archive
+
+
+def test_query_returns_ranges_split_by_gaps(tmp_path):
+    archive = make_archive(tmp_path)
+    for second in (0, 0.5, 1.0, 10.0, 10.5):
+        archive.append('Camera 1', START + second, batch([3, 4], [0, 1]))
+    ranges = archive.query(START - 1, START + 60, class_name='person', max_gap=1.0)
+    assert [(r['start'] - START, r['end'] - START) for r in ranges] == [(0, 1.0), (10.0, 10.5)]
+    assert ranges[0]['camera'] == 'Camera_1' and ranges[0]['track_ids'] == [3]
+
+
+def test_zone_and_class_filters(tmp_path):
+    archive = make_archive(tmp_path)
+    archive.append('Camera 1', START, batch([1, 2], [0, 0], zones=['flag_room', None]))
+    archive.append('Camera 2', START + 1, batch([7], [1]))
+    assert [r['track_ids'] for r in archive.query(START - 1, START + 5, zone='flag_room')] == [[1]]
+    assert [r['camera'] for r in archive.query(START - 1, START + 5, class_name='cell phone')] == ['Camera_2']
+    assert archive.query(START - 1, START + 5, class_name='car') == []
+    assert archive.query(START - 1, START + 5, camera_name='Camera 3') == []
+
+
+def test_rows_survive_a_new_archive_and_span_hours(tmp_path):
+    archive = make_archive(tmp_path)
+    hour_end = (int(START) // 3600 + 1) * 3600
+    archive.append('Camera 1', hour_end - 0.5, batch([5], [0]))
+    archive.append('Camera 1', hour_end + 0.2, batch([5], [0]))
+    archive.flush()
+    reopened = make_archive(tmp_path)
+    (found,) = reopened.query(hour_end - 10, hour_end + 10, camera_name=['Camera 1'])
+    assert found['end'] - found['start'] == pytest.approx(0.7) and found['track_ids'] == [5]
+    assert len(list((tmp_path / 'Camera_1').iterdir())) == 4  # Two hours, dictionary and index
+
+
+def test_interrupted_append_is_cut_back(tmp_path):
+    archive = make_archive(tmp_path)
+    archive.append('Camera 1', START, batch([1], [0]))
+    archive.flush()
+    hour_dir = tmp_path / 'Camera_1' / _hour_key(int(START) // 3600)
+    with open(hour_dir / 'time.bin', 'ab') as f:
+        f.write(b'\0' * 8)  # A row whose other columns were never written
+    assert len(archive.query(START - 1, START + 1)) == 1
+    archive.append('Camera 1', START + 0.5, batch([1], [0]))
+    archive.flush()
+    (found,) = archive.query(START - 1, START + 1)
+    assert found['end'] - found['start'] == pytest.approx(0.5)
+    assert (hour_dir / 'time.bin').stat().st_size == 2 * 8
@@ -5,42 +5,67 @@ from collections import deque
 
 
 class DeepSortTracker:
-    def __init__(self, max_age=30, min_hits=3):
+    def __init__(self, max_age=30, min_hits=3, max_distance=50):
         self.tracks = []
         self.max_age = max_age
         self.min_hits = min_hits
+        self.max_distance = max_distance  # Largest centre movement between updates, in pixels
         self.track_id = 0
 
     def update(self, detections):
-        # Update tracks with new detections
-        for det in detections:
-            box, class_id = det
-            x, y, w, h = box
-            center = (x + w / 2, y + h / 2)
-
-            # Create a new track if no existing track matches
-            if not self.tracks:
-                self.tracks.append({'id': self.track_id, 'center': center, 'age': 0})
-                self.track_id += 1
-            else:
-                # Check if the detected object matches an existing track
-                matched = False
-                for track in self.tracks:
-                    if np.linalg.norm(np.array(track['center']) - np.array(center)) < 50:  # Distance threshold
-                        track['center'] = center
-                        track['age'] = 0  # Reset age if matched
-                        matched = True
-                        break
-
-                if not matched:
-                    self.tracks.append({'id': self.track_id, 'center': center, 'age': 0})
-                    self.track_id += 1
-
-        # Increment age of all tracks and remove old tracks
+        """
+        Match detections to tracks by nearest centre, one detection per track and only within the same class.
+        :param detections: List of (box, class_id) with box as [x1, y1, x2, y2].
+        :return: Track ID assigned to each detection, in order.
+        """
+        boxes = [box for box, _ in detections]
+        class_ids = [class_id for _, class_id in detections]
+        return self.update_boxes(boxes, class_ids)
+
+    def update_boxes(self, boxes, class_ids):
+        """
+        Same as update, for a whole frame given as arrays.
+        :param boxes: (N, 4) xyxy boxes.
+        :param class_ids: N class IDs (or labels).
+        :return: Track ID assigned to each detection, in order.
+        """
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+
+        # Increment age of all tracks; matched tracks are reset below
         for track in self.tracks:
             track['age'] += 1
 
+        # Distance from every detection to every existing track, infinite across classes
+        distance = np.full((len(boxes), len(self.tracks)), np.inf, dtype=np.float32)
+        if self.tracks:
+            track_centers = np.array([track['center'] for track in self.tracks], dtype=np.float32)
+            track_classes = np.array([track['class_id'] for track in self.tracks], dtype=object)
+            same_class = np.array(list(class_ids), dtype=object)[:, None] == track_classes[None, :]
+            distance[same_class] = np.linalg.norm(centers[:, None] - track_centers[None], axis=2)[same_class]
+
+        assigned = []
+        free = np.ones(len(self.tracks), dtype=bool)
+        existing = list(self.tracks)
+        for row, class_id in enumerate(class_ids):
+            candidates = np.where(free, distance[row], np.inf)
+            column = int(np.argmin(candidates)) if len(candidates) else -1
+            if column >= 0 and candidates[column] < self.max_distance:
+                track = existing[column]
+                free[column] = False
+            else:
+                # Create a new track if no existing track matches
+                track = {'id': self.track_id, 'age': 0, 'hits': 0, 'class_id': class_id}
+                self.tracks.append(track)
+                self.track_id += 1
+            track['center'] = tuple(centers[row].tolist())
+            track['bbox'] = boxes[row]
+            track['age'] = 0  # Reset age if matched
+            track['hits'] += 1
+            assigned.append(track['id'])
+
         self.tracks = [track for track in self.tracks if track['age'] < self.max_age]
+        return assigned
 
     def get_tracks(self):
-        return [(track['id'], track['center']) for track in self.tracks]
\ No newline at end of file
+        return [(track['id'], track['center']) for track in self.tracks]
@@ -1,6 +1,7 @@
 # File: tracking/tracker.py
 
 from tracking.deep_sort import DeepSortTracker
+from object_detection.detection_batch import DetectionBatch
 
 
 class Tracker:
@@ -13,6 +14,16 @@ class Tracker:
         :param detections: List of detections, each with 'bbox' and 'label'.
         :return: Tracked objects with IDs and centers.
         """
-        formatted_detections = [(det['bbox'], det['label']) for det in detections]
-        self.deepsort.update(formatted_detections)
+        self.assign_ids(detections)
         return self.deepsort.get_tracks()
+
+    def assign_ids(self, detections):
+        """
+        Update tracks based on detections.
+        :param detections: DetectionBatch, or list of detections each with 'bbox' and 'label' (or 'class_name').
+        :return: Track ID of each detection, in order.
+        """
+        if isinstance(detections, DetectionBatch):
+            return self.deepsort.update_boxes(detections.boxes, detections.class_ids)
+        formatted_detections = [(det['bbox'], det.get('label', det.get('class_name'))) for det in detections]
+        return self.deepsort.update(formatted_detections)
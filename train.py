@@ -5,6 +5,8 @@ from pathlib import Path
 import yaml
 import torch
 from lib.yolov5 import train
+from training.dataset_cache import DatasetCache
+from training.hard_negative_miner import accept_reviewed
 
 def parse_opt():
     parser = argparse.ArgumentParser()
@@ -15,9 +17,23 @@ def parse_opt():
     parser.add_argument('--img-size', type=int, default=640, help='train, val image size (pixels)')
     parser.add_argument('--device', default='cpu', help='cuda device, i.e. 0 or 0,1,2,3 or cpu')
     parser.add_argument('--workers', type=int, default=8, help='maximum number of dataloader workers')
+    parser.add_argument('--sources', nargs='*', default=[], help='image folders to add to the dataset cache')
+    parser.add_argument('--prepare', action='store_true', help='train on the cached dataset in --cache-root instead of --data')
+    parser.add_argument('--cache-root', type=str, default='training_data', help='dataset cache directory')
     return parser.parse_args()
 
 def main(opt):
+    if opt.prepare or opt.sources:
+        # Only new or changed images are decoded and letterboxed; the rest comes from the cache
+        cache = DatasetCache(opt.cache_root, opt.img_size)
+        for source in opt.sources:
+            cache.add_source(source)
+        # Mined frames are only used once a reviewer has labelled them
+        accept_reviewed(cache=cache)
+        data_path, stats = cache.prepare()
+        print(f"Dataset cache: {stats}")
+        opt.data = str(data_path)
+
     # Load configuration
     with open(opt.data) as f:
         data_dict = yaml.safe_load(f)
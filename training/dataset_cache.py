@@ -0,0 +1,327 @@
+# File: training/dataset_cache.py
+
+import os
+import json
+import hashlib
+from pathlib import Path
+
+import cv2
+import numpy as np
+import yaml
+
+IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png', '.bmp', '.webp'}
+PAD_VALUE = 114  # Same grey YOLOv5 letterboxes with
+
+
+def letterbox_geometry(shape, size):
+    """
+    :param shape: (height, width) of the image.
+    :return: (scale, (pad_x, pad_y), (resized width, resized height)) of letterboxing it to size x size.
+    """
+    h0, w0 = shape[:2]
+    scale = min(size / h0, size / w0)
+    w, h = round(w0 * scale), round(h0 * scale)
+    return scale, ((size - w) // 2, (size - h) // 2), (w, h)
+
+
+def letterbox(image, size):
+    """
+    Resize keeping the aspect ratio and pad to a size x size square.
+    :return: (letterboxed image, scale, (pad_x, pad_y))
+    """
+    scale, (pad_x, pad_y), (w, h) = letterbox_geometry(image.shape, size)
+    out = np.full((size, size, 3), PAD_VALUE, dtype=np.uint8)
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+    out[pad_y:pad_y + h, pad_x:pad_x + w] = cv2.resize(image, (w, h), interpolation=interpolation)
+    return out, scale, (pad_x, pad_y)
+
+
+def label_path_for(image_path):
+    """YOLO convention: .../images/x.jpg -> .../labels/x.txt, falling back to a .txt next to the image."""
+    parts = list(image_path.parts)
+    if 'images' in parts:
+        index = len(parts) - 1 - parts[::-1].index('images')
+        parts[index] = 'labels'
+        candidate = Path(*parts).with_suffix('.txt')
+        if candidate.exists():
+            return candidate
+    return image_path.with_suffix('.txt')
+
+
+class DatasetCache:
+    def __init__(self, root='training_data', img_size=640, val_fraction=0.1):
+        """
+        Incremental, deduplicated cache of letterboxed training images.
+        Each unique image is decoded and letterboxed once, straight into the YOLOv5 dataset
+        that training reads, and its labels are kept in a JSON index; later runs only look
+        at new or changed source files.
+        :param root: Directory holding the source list, index and dataset.
+        :param img_size: Square size images are letterboxed to.
+        :param val_fraction: Fraction of images assigned to the validation split.
+        """
+        self.root = Path(root)
+        self.img_size = img_size
+        self.val_fraction = val_fraction
+        self.cache_dir = self.root / 'cache'
+        self.prepared_dir = self.root / 'prepared' / str(img_size)
+        self.sources_path = self.root / 'sources.json'
+        self.manifest_path = self.cache_dir / f'index_{img_size}.json'
+        self._manifest = None  # Loaded on first use
+
+    # Sources
+
+    def _stored_sources(self):
+        if self.sources_path.exists():
+            with open(self.sources_path) as f:
+                return json.load(f)
+        return []
+
+    def sources(self):
+        """Registered source folders; relative entries are relative to the cache root."""
+        return [os.path.normpath(self.root / source) for source in self._stored_sources()]
+
+    def add_source(self, source_dir):
+        """
+        Register a folder of images (and YOLO labels) to be included in the dataset.
+        The path is stored relative to the cache root, so sources.json does not depend on the machine.
+        """
+        source_dir = Path(source_dir).resolve()
+        try:
+            stored = Path(os.path.relpath(source_dir, self.root.resolve())).as_posix()
+        except ValueError:  # On another drive
+            stored = str(source_dir)
+        sources = self._stored_sources()
+        if all((self.root / source).resolve() != source_dir for source in sources):
+            sources.append(stored)
+            self.root.mkdir(parents=True, exist_ok=True)
+            self._write_json(self.sources_path, sources)
+
+    # Manifest and image storage
+
+    @property
+    def manifest(self):
+        if self._manifest is None:
+            self._manifest = self._load_manifest()
+        return self._manifest
+
+    def _load_manifest(self):
+        if self.manifest_path.exists():
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        return {'files': {}, 'entries': {}, 'names': {}}
+
+    def _write_json(self, path, data):
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _paths(self, content_hash):
+        """(image path, label path) of a cache entry in the exported dataset."""
+        split = self.manifest['entries'][content_hash]['split']
+        return (self.prepared_dir / 'images' / split / f'{content_hash}.jpg',
+                self.prepared_dir / 'labels' / split / f'{content_hash}.txt')
+
+    def image(self, content_hash):
+        """Letterboxed image of a cache entry, decoded from the dataset."""
+        return cv2.imread(str(self._paths(content_hash)[0]), cv2.IMREAD_COLOR)
+
+    def _store(self, content_hash, image):
+        """Letterbox a decoded source image into the dataset."""
+        image_path = self._paths(content_hash)[0]
+        image_path.parent.mkdir(parents=True, exist_ok=True)
+        cv2.imwrite(str(image_path), letterbox(image, self.img_size)[0], [cv2.IMWRITE_JPEG_QUALITY, 95])
+
+    # Incremental update
+
+    def _split_for(self, content_hash):
+        return 'val' if int(content_hash[:8], 16) % 1000 < self.val_fraction * 1000 else 'train'
+
+    def _read_labels(self, label_path, shape):
+        """Read YOLO labels and map them from the source image into the letterboxed image."""
+        if not label_path.exists():
+            return []
+        h0, w0 = shape
+        scale, pad, _ = letterbox_geometry(shape, self.img_size)
+        labels = []
+        with open(label_path) as f:
+            for line in f:
+                values = line.split()
+                if len(values) != 5:
+                    continue
+                cls, x, y, w, h = int(values[0]), *map(float, values[1:])
+                labels.append([
+                    cls,
+                    round((x * w0 * scale + pad[0]) / self.img_size, 6),
+                    round((y * h0 * scale + pad[1]) / self.img_size, 6),
+                    round(w * w0 * scale / self.img_size, 6),
+                    round(h * h0 * scale / self.img_size, 6)
+                ])
+        return labels
+
+    @staticmethod
+    def _merged_labels(entry):
+        """Labels of all copies of an image, each distinct box once."""
+        merged = {}
+        for labels in entry['sources'].values():
+            for label in labels:
+                merged.setdefault(tuple(label), label)
+        return list(merged.values())
+
+    def _read_names(self, source_dir):
+        """Class names from a classes.txt or data.yaml in the source folder, if there is one."""
+        classes_txt = source_dir / 'classes.txt'
+        if classes_txt.exists():
+            with open(classes_txt) as f:
+                return {str(i): name.strip() for i, name in enumerate(f) if name.strip()}
+        data_yaml = source_dir / 'data.yaml'
+        if data_yaml.exists():
+            with open(data_yaml) as f:
+                names = (yaml.safe_load(f) or {}).get('names', [])
+            if isinstance(names, dict):
+                return {str(k): v for k, v in names.items()}
+            return {str(i): name for i, name in enumerate(names)}
+        return {}
+
+    def update(self):
+        """
+        Bring the cache in line with the registered sources.
+        Only files whose size or modification time changed are read, and identical
+        images found in several places are decoded and stored once.
+        :return: Dictionary with counts of added, unchanged and removed files.
+        :raises ValueError: If two sources give the same class ID different names.
+        """
+        source_dirs = [Path(source) for source in self.sources() if Path(source).is_dir()]
+        # Labels are stored by class ID, so all sources must agree on what each ID means
+        names, named_by = {}, {}
+        for source_dir in source_dirs:
+            for class_id, name in self._read_names(source_dir).items():
+                if names.get(class_id, name) != name:
+                    message = (f"Class {class_id} is '{names[class_id]}' in {named_by[class_id]} "
+                               f"but '{name}' in {source_dir}")
+                    print(f"Error updating dataset cache: {message}")
+                    raise ValueError(message)
+                names[class_id] = name
+                named_by.setdefault(class_id, source_dir)
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest['names'] = names
+        files = self.manifest['files']
+        entries = self.manifest['entries']
+        stats = {'added': 0, 'unchanged': 0, 'duplicates': 0, 'removed': 0}
+        seen = set()
+
+        for source_dir in source_dirs:
+            for image_path in sorted(source_dir.rglob('*')):
+                if image_path.suffix.lower() not in IMAGE_SUFFIXES:
+                    continue
+                key = str(image_path)
+                seen.add(key)
+                label_path = label_path_for(image_path)
+                stat = image_path.stat()
+                label_mtime = label_path.stat().st_mtime_ns if label_path.exists() else 0
+                signature = [stat.st_size, stat.st_mtime_ns, label_mtime]
+
+                record = files.get(key)
+                if record is not None and record['signature'] == signature:
+                    stats['unchanged'] += 1
+                    continue
+                if record is not None:
+                    self._release(key, record['hash'])
+
+                data = image_path.read_bytes()
+                content_hash = hashlib.sha1(data).hexdigest()
+                entry = entries.get(content_hash)
+                if entry is None:
+                    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+                    if image is None:
+                        files.pop(key, None)
+                        continue
+                    entry = entries[content_hash] = {'split': self._split_for(content_hash),
+                                                     'shape': image.shape[:2], 'sources': {}}
+                    self._store(content_hash, image)
+                    stats['added'] += 1
+                else:
+                    stats['duplicates'] += 1
+                files[key] = {'signature': signature, 'hash': content_hash}
+
+                # Copies of an image may be labelled differently; the exported labels are their union
+                labels = self._read_labels(label_path, entry['shape'])
+                if entry['sources'] and sorted(labels) != sorted(self._merged_labels(entry)):
+                    others = ', '.join(entry['sources'])
+                    print(f"Labels of {key} differ from those of its copies ({others}); using all of them")
+                entry['sources'][key] = labels
+
+        for key in [key for key in files if key not in seen]:
+            self._release(key, files.pop(key)['hash'])
+            stats['removed'] += 1
+
+        self._write_json(self.manifest_path, self.manifest)
+        return stats
+
+    def _release(self, key, content_hash):
+        """Drop a source file from its entry, freeing the entry once no source refers to it."""
+        entry = self.manifest['entries'].get(content_hash)
+        if entry is None:
+            return
+        entry['sources'].pop(key, None)
+        if not entry['sources']:
+            for path in self._paths(content_hash):
+                path.unlink(missing_ok=True)
+            del self.manifest['entries'][content_hash]
+
+    # Export
+
+    def export(self):
+        """
+        Complete the YOLOv5 dataset of letterboxed images: label files and data.yaml.
+        Images are written by update, so this only touches labels that changed. YOLOv5's
+        dataloader decodes the small letterboxed JPEGs; what the cache saves is decoding and
+        resizing the originals, and rescanning unchanged sources.
+        :return: Path of the generated data.yaml.
+        """
+        entries = self.manifest['entries']
+        wanted = set()
+        for content_hash, entry in entries.items():
+            image_path, label_path = self._paths(content_hash)
+            wanted.update((image_path, label_path))
+
+            if not image_path.exists():  # Deleted by hand; letterbox it again from one of its sources
+                image = cv2.imread(next(iter(entry['sources'])), cv2.IMREAD_COLOR)
+                if image is not None:
+                    self._store(content_hash, image)
+            label_path.parent.mkdir(parents=True, exist_ok=True)
+            label_text = ''.join(
+                f"{cls} {x:.6f} {y:.6f} {w:.6f} {h:.6f}\n" for cls, x, y, w, h in self._merged_labels(entry)
+            )
+            if not label_path.exists() or label_path.read_text() != label_text:
+                label_path.write_text(label_text)
+
+        # Remove files of entries that no longer exist
+        for folder in ('images', 'labels'):
+            for path in (self.prepared_dir / folder).rglob('*.*'):
+                if path.suffix in ('.jpg', '.txt') and path not in wanted:
+                    path.unlink()
+
+        names = self.manifest['names']
+        class_count = max([int(k) + 1 for k in names] +
+                          [label[0] + 1 for entry in entries.values() for labels in entry['sources'].values()
+                           for label in labels] + [1])
+        has_val = any(entry['split'] == 'val' for entry in entries.values())
+        data_yaml = {
+            'path': str(self.prepared_dir.resolve()),
+            'train': 'images/train',
+            'val': 'images/val' if has_val else 'images/train',  # Tiny datasets may have no val split
+            'nc': class_count,
+            'names': [names.get(str(i), f'class{i}') for i in range(class_count)]
+        }
+        data_path = self.prepared_dir / 'data.yaml'
+        self.prepared_dir.mkdir(parents=True, exist_ok=True)
+        with open(data_path, 'w') as f:
+            yaml.dump(data_yaml, f)
+        return data_path
+
+    def prepare(self):
+        """Update the cache from the registered sources and export the YOLOv5 dataset."""
+        stats = self.update()
+        return self.export(), stats
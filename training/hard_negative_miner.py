@@ -0,0 +1,180 @@
+# File: training/hard_negative_miner.py
+
+import os
+import queue
+import shutil
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from configs.config import hard_negative_config
+from training.dataset_cache import DatasetCache
+
+
+def dhash(frame, hash_size=8):
+    """
+    Difference hash of a frame: 64 bits comparing horizontally adjacent pixels of a tiny greyscale copy.
+    Near-identical frames have hashes a small Hamming distance apart.
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def accept_reviewed(root=None, cache=None):
+    """
+    Move reviewed samples out of the review queue into the training set.
+    A sample counts as reviewed once its label file exists in review/labels/ (written by a
+    labelling tool; an empty file marks a frame without objects). Only the reviewed/ folder
+    is registered as a DatasetCache source, so unreviewed predictions never reach training.
+    :param root: Staging directory, defaults to hard_negative_config["root"].
+    :param cache: DatasetCache to register reviewed/ with, defaults to DatasetCache().
+    :return: Number of samples moved.
+    """
+    root = Path(root or hard_negative_config["root"])
+    review_dir, reviewed_dir = root / 'review', root / 'reviewed'
+    moved = 0
+    for label_path in sorted((review_dir / 'labels').glob('*.txt')):
+        image_path = review_dir / 'images' / f"{label_path.stem}.jpg"
+        if not image_path.exists():
+            continue
+        for path, folder in ((image_path, 'images'), (label_path, 'labels')):
+            (reviewed_dir / folder).mkdir(parents=True, exist_ok=True)
+            os.replace(path, reviewed_dir / folder / path.name)
+        (review_dir / 'predictions' / label_path.name).unlink(missing_ok=True)
+        moved += 1
+    if moved:
+        if (review_dir / 'classes.txt').exists():
+            shutil.copyfile(review_dir / 'classes.txt', reviewed_dir / 'classes.txt')
+        (cache or DatasetCache()).add_source(reviewed_dir)
+    return moved
+
+
+class HardNegativeSampler:
+    def __init__(self, root=None):
+        """
+        Collect uncertain and alert-triggering frames from the live streams for labelling.
+        Frames are handed over by reference and written by a background thread; offers are
+        rate limited per camera and dropped outright when the writer is busy, so live
+        processing never waits on it.
+        Samples go to a review queue (review/images/), with the model's detections in
+        review/predictions/ as a starting point for the reviewer. They are false positives
+        as often as not, so they are never used as labels; see accept_reviewed.
+        :param root: Staging directory (review/ and reviewed/).
+        """
+        self.root = Path(root or hard_negative_config["root"])
+        self.review_dir = self.root / 'review'
+        self.images_dir = self.review_dir / 'images'
+        self.predictions_dir = self.review_dir / 'predictions'
+        self.images_dir.mkdir(parents=True, exist_ok=True)
+        self.predictions_dir.mkdir(parents=True, exist_ok=True)
+
+        self.max_samples = hard_negative_config["max_samples"]
+        self.min_interval = hard_negative_config["min_interval"]
+        self.min_confidence = hard_negative_config["min_confidence"]
+        self.max_confidence = hard_negative_config["max_confidence"]
+        self.hash_distance = hard_negative_config["hash_distance"]
+
+        self.last_sample_time = {}
+        self.class_names = None
+        self.stats = {'offered': 0, 'queued': 0, 'duplicates': 0, 'saved': 0, 'evicted': 0}
+
+        # Existing samples, oldest first; the hash is part of the file name
+        self.samples = deque()
+        for image_path in sorted(self.images_dir.glob('*.jpg'), key=lambda p: p.stat().st_mtime):
+            try:
+                self.samples.append((image_path.stem, int(image_path.stem.rsplit('_', 1)[1], 16)))
+            except (IndexError, ValueError):
+                continue
+
+        self.queue = queue.Queue(maxsize=hard_negative_config["queue_size"])
+        self.thread = threading.Thread(target=self._write_samples, daemon=True)
+        self.thread.start()
+
+    def set_class_names(self, names):
+        """Class names of the model producing the predictions, written to review/classes.txt for the labelling tool."""
+        if isinstance(names, dict):
+            names = [names[i] for i in sorted(names)]
+        names = list(names)
+        if names != self.class_names:
+            self.class_names = names
+            (self.review_dir / 'classes.txt').write_text(''.join(f"{name}\n" for name in names))
+
+    def is_uncertain(self, detections):
+        return any(self.min_confidence <= det['confidence'] < self.max_confidence for det in detections)
+
+    def offer(self, camera_name, frame, detections, reason=None):
+        """
+        Offer a frame for sampling. Cheap and non-blocking.
+        :param camera_name: Source camera, used for rate limiting.
+        :param frame: BGR frame; must not be modified afterwards.
+        :param detections: Predicted detections with 'class_id', 'confidence' and 'bbox'.
+        :param reason: Set for alert-triggering frames, which are sampled regardless of confidence.
+        :return: True if the frame was queued.
+        """
+        self.stats['offered'] += 1
+        if frame is None or not detections:
+            return False
+        if reason is None and not self.is_uncertain(detections):
+            return False
+
+        now = time.monotonic()
+        if now - self.last_sample_time.get(camera_name, float('-inf')) < self.min_interval:
+            return False
+
+        try:
+            self.queue.put_nowait((camera_name, frame, list(detections), reason))
+        except queue.Full:
+            return False
+        self.last_sample_time[camera_name] = now
+        self.stats['queued'] += 1
+        return True
+
+    def _is_duplicate(self, frame_hash):
+        return any((frame_hash ^ other).bit_count() <= self.hash_distance for _, other in self.samples)
+
+    def _write_samples(self):
+        while True:
+            camera_name, frame, detections, reason = self.queue.get()
+            try:
+                self._write_sample(camera_name, frame, detections, reason)
+            except Exception as e:
+                print(f"Error saving hard-negative sample: {e}")
+
+    def _write_sample(self, camera_name, frame, detections, reason):
+        frame_hash = dhash(frame)
+        if self._is_duplicate(frame_hash):
+            self.stats['duplicates'] += 1
+            return
+
+        camera_tag = str(camera_name or 'camera').replace(' ', '_')
+        kind = str(reason or 'uncertain').replace(' ', '-').replace('_', '-')
+        name = f"{camera_tag}_{kind}_{time.strftime('%Y%m%d-%H%M%S')}_{frame_hash:016x}"
+
+        # Predictions in YOLO label format: class x_center y_center width height, normalised to the image size
+        height, width = frame.shape[:2]
+        lines = []
+        for det in detections:
+            if det.get('class_id') is None:
+                continue
+            x1, y1, x2, y2 = det['bbox']
+            lines.append(
+                f"{det['class_id']} {(x1 + x2) / 2 / width:.6f} {(y1 + y2) / 2 / height:.6f} "
+                f"{(x2 - x1) / width:.6f} {(y2 - y1) / height:.6f}\n"
+            )
+
+        cv2.imwrite(str(self.images_dir / f"{name}.jpg"), frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        (self.predictions_dir / f"{name}.txt").write_text(''.join(lines))
+        self.samples.append((name, frame_hash))
+        self.stats['saved'] += 1
+
+        while len(self.samples) > self.max_samples:
+            old_name, _ = self.samples.popleft()
+            (self.images_dir / f"{old_name}.jpg").unlink(missing_ok=True)
+            (self.predictions_dir / f"{old_name}.txt").unlink(missing_ok=True)
+            self.stats['evicted'] += 1
@@ -0,0 +1,191 @@
+# File: training/training_process.py
+
+import os
+import multiprocessing
+
+from configs.config import training_config
+
+# Names of the values YOLOv5 passes to on_fit_epoch_end, in order
+METRIC_KEYS = [
+    'train/box_loss', 'train/obj_loss', 'train/cls_loss',
+    'metrics/precision', 'metrics/recall', 'metrics/mAP_0.5', 'metrics/mAP_0.5:0.95',
+    'val/box_loss', 'val/obj_loss', 'val/cls_loss',
+    'x/lr0', 'x/lr1', 'x/lr2'
+]
+
+
+class TrainingCancelled(Exception):
+    pass
+
+
+def training_cpu_set(reserved_cores):
+    """
+    CPUs the training process may use, leaving the first reserved_cores to live detection.
+    :return: List of CPU indices, or None if the machine is too small to reserve any.
+    """
+    cpu_count = os.cpu_count() or 1
+    if cpu_count <= reserved_cores:
+        return None
+    return list(range(reserved_cores, cpu_count))
+
+
+def _lower_priority(nice, cpus):
+    """
+    Drop the current process to background priority and pin it to the given CPUs.
+    CPUs are not pinned where the platform cannot do it (e.g. macOS); the lower priority still applies.
+    """
+    try:
+        import psutil
+        process = psutil.Process()
+        if os.name == 'nt':
+            process.nice(psutil.BELOW_NORMAL_PRIORITY_CLASS)
+        else:
+            process.nice(nice)
+        if cpus and hasattr(process, 'cpu_affinity'):
+            try:
+                process.cpu_affinity(cpus)
+            except (NotImplementedError, AttributeError, OSError) as e:
+                print(f"Training runs on all CPUs, could not pin it: {e}")
+    except ImportError:
+        if hasattr(os, 'nice'):
+            os.nice(nice)
+        if cpus and hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(0, cpus)
+
+
+def _run_training(options, conn, cancel_event, nice, cpus):
+    """
+    Entry point of the training process.
+    Progress is reported over conn as (kind, payload) tuples.
+    """
+    try:
+        _lower_priority(nice, cpus)
+
+        import torch
+        if cpus:
+            torch.set_num_threads(len(cpus))
+
+        from lib.yolov5 import train as yolo_train
+        from lib.yolov5.utils.callbacks import Callbacks
+
+        options = dict(options)
+        dataset = options.pop('dataset', None)
+        if dataset is not None:
+            # Bring the cached dataset up to date before training; only new or changed files are processed
+            from training.dataset_cache import DatasetCache
+            data_path, stats = DatasetCache(dataset['root'], dataset['img_size']).prepare()
+            options['data'] = str(data_path)
+            conn.send(('dataset', stats))
+
+        opt = yolo_train.parse_opt(True)
+        for key, value in options.items():
+            setattr(opt, key, value)
+
+        def check_cancelled(*args):
+            if cancel_event.is_set():
+                raise TrainingCancelled()
+
+        def on_train_epoch_end(epoch):
+            check_cancelled()
+            conn.send(('epoch', {'epoch': epoch, 'epochs': opt.epochs}))
+
+        def on_fit_epoch_end(log_vals, epoch, best_fitness, fi):
+            metrics = {key: float(value) for key, value in zip(METRIC_KEYS, log_vals)}
+            metrics['fitness'] = float(best_fitness)
+            conn.send(('metrics', {'epoch': epoch, 'epochs': opt.epochs, 'metrics': metrics}))
+
+        callbacks = Callbacks()
+        callbacks.register_action('on_train_batch_end', callback=check_cancelled)
+        callbacks.register_action('on_train_epoch_end', callback=on_train_epoch_end)
+        callbacks.register_action('on_fit_epoch_end', callback=on_fit_epoch_end)
+
+        yolo_train.main(opt, callbacks=callbacks)
+        conn.send(('done', {'save_dir': str(getattr(opt, 'save_dir', ''))}))
+    except TrainingCancelled:
+        conn.send(('cancelled', {}))
+    except Exception as e:
+        conn.send(('error', {'message': str(e)}))
+    finally:
+        conn.close()
+
+
+class TrainingProcess:
+    def __init__(self, reserved_cores=None, nice=None):
+        """
+        Run YOLOv5 training in a separate, low-priority process.
+        :param reserved_cores: CPU cores left free for live detection.
+        :param nice: Priority increment applied to the training process.
+        """
+        self.reserved_cores = training_config["reserved_cores"] if reserved_cores is None else reserved_cores
+        self.nice = training_config["nice"] if nice is None else nice
+        self.context = multiprocessing.get_context('spawn')
+        self.process = None
+        self.conn = None
+        self.cancel_event = None
+        self.finished = False
+
+    def start(self, options):
+        """
+        Start training.
+        :param options: Overrides applied to the YOLOv5 training options (attribute -> value).
+                        An optional 'dataset' entry ({'root', 'img_size'}) prepares a DatasetCache first.
+        """
+        if self.is_running():
+            raise RuntimeError("Training is already running")
+
+        self.finished = False
+        self.conn, child_conn = self.context.Pipe(duplex=False)
+        self.cancel_event = self.context.Event()
+        self.process = self.context.Process(
+            target=_run_training,
+            args=(options, child_conn, self.cancel_event, self.nice, training_cpu_set(self.reserved_cores)),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()  # Only the child writes; lets poll() see EOF when it exits
+
+    def is_running(self):
+        return self.process is not None and self.process.is_alive()
+
+    def poll(self):
+        """
+        Collect progress messages without blocking.
+        :return: List of (kind, payload) tuples.
+                 kind is 'dataset', 'epoch', 'metrics', 'done', 'cancelled' or 'error'.
+        """
+        messages = []
+        if self.conn is None:
+            return messages
+        try:
+            while self.conn.poll():
+                kind, payload = self.conn.recv()
+                messages.append((kind, payload))
+                self.finished = self.finished or kind in ('done', 'cancelled', 'error')
+            if self.finished:
+                self._cleanup()  # Nothing follows the final message
+        except (EOFError, OSError):
+            if not self.finished:
+                self.finished = True
+                exit_code = self.process.exitcode if self.process is not None else None
+                messages.append(('error', {'message': f"Training process exited unexpectedly (code {exit_code})"}))
+            self._cleanup()
+        return messages
+
+    def cancel(self, force=False):
+        """
+        Ask the training process to stop after the current batch.
+        :param force: Terminate the process immediately instead.
+        """
+        if not self.is_running():
+            return
+        self.cancel_event.set()
+        if force:
+            self.process.terminate()
+
+    def _cleanup(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        if self.process is not None:
+            self.process.join(1)
+            self.process = None